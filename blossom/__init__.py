@@ -12,6 +12,10 @@ from blossom.simulation.default_fields import world_fields, \
     organism_fields
 from blossom.simulation import dataset_io
 from blossom.simulation import parameter_io
+from blossom.simulation import population_store
+from blossom.simulation import ensemble
+from blossom.simulation import sweep
+from blossom.simulation import stopping
 
 from blossom.simulation import organism_behavior
 from blossom.simulation import world_generator
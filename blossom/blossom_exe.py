@@ -3,7 +3,7 @@ import os
 import click
 
 from ._version import __version__ 
-from .simulation import universe
+from .simulation import universe, dataset_io, ensemble, sweep
 from .visualization import dashboard, render
 
 
@@ -19,6 +19,9 @@ def cli(ctx):
 
 
 cli.add_command(universe.run_universe)
+cli.add_command(dataset_io.convert_run_command)
+cli.add_command(ensemble.run_ensemble_command)
+cli.add_command(sweep.run_sweep_command)
 cli.add_command(dashboard.dashboard)
 cli.add_command(render.make_gif)
 
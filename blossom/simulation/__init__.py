@@ -6,6 +6,10 @@ from .default_fields import world_fields, \
     organism_fields
 from . import dataset_io
 from . import parameter_io
+from . import population_store
+from . import ensemble
+from . import sweep
+from . import stopping
 
 from . import organism_behavior
 from . import world_generator
@@ -0,0 +1,550 @@
+"""
+Stages of a time step for the columnar population engine.
+
+Each species is stepped over its columns. Actions are chosen per organism,
+then all organisms of a species taking an action with a vectorized behavior
+method (see :mod:`blossom.simulation.dispatch`) are handled by a single call.
+Every other organism falls back to :meth:`Organism.step` on a view of its
+row, so custom behaviors work as with the object engine.
+
+Vectorized actions only affect the acting organism, so their intent is just
+the organism's own row of the next population state, and they are kept as
+arrays of rows (see :class:`StepIntents`) rather than lists of organisms.
+Drinking and eating are
+only requested during the action stage; once intents are resolved, all
+requests of the time step are settled per cell in :func:`consume`, so that
+contention for resources doesn't depend on the order organisms act in.
+"""
+
+import numpy as np
+
+from . import parse_intent
+from .population_store import PopulationStore, SpeciesColumns, OrganismView
+from .organism_behavior import action
+
+
+# Behavior field used by each built-in action
+action_fields = {'move': 'movement_type',
+                 'reproduce': 'reproduction_type',
+                 'drink': 'drinking_type',
+                 'eat': 'eating_type'}
+
+# World layer and organism field for each consumable resource
+resources = {'water': ('water', 'water_current'),
+             'food': ('food', 'food_current')}
+
+consumption_modes = ['first_come', 'proportional']
+
+# Actions that have a vectorized stage in step_species
+vectorized_actions = ['move', 'drink', 'eat']
+
+
+class SpeciesBatch(object):
+    """
+    Rows of one species handled by vectorized behaviors during a time step,
+    along with their pending resource requests.
+    """
+
+    def __init__(self, species_columns):
+        self.species_columns = species_columns
+        self.rows = []
+        self.requests = {resource: [] for resource in resources}
+
+    def add_rows(self, rows):
+        self.rows.append(rows)
+
+    def add_request(self, resource, rows, amounts):
+        self.requests[resource].append((rows, amounts))
+
+    def all_rows(self):
+        if len(self.rows) == 0:
+            return np.array([], dtype=int)
+        return np.concatenate(self.rows)
+
+
+class StepIntents(object):
+    """
+    Intents of a time step, in order. Consecutive intents are grouped in
+    segments, which are either an array of rows of one species, each of
+    whose intent is the organism's own row of the next population state, or
+    a list of intents as for parse_intent.parse (lists of Organisms), from
+    the scalar fallback.
+    """
+
+    def __init__(self):
+        self.segments = []
+
+    def add_rows(self, species, rows):
+        """
+        Add the single-row intents of rows of a species.
+        """
+        if len(rows) > 0:
+            self.segments.append((species, np.asarray(rows, dtype=int)))
+
+    def add_intent(self, organism_set):
+        """
+        Add an intent given as a list of Organisms.
+        """
+        if len(self.segments) == 0 or self.segments[-1][0] is not None:
+            self.segments.append((None, []))
+        self.segments[-1][1].append(organism_set)
+
+    def extend(self, intents):
+        self.segments.extend(intents.segments)
+
+    def __len__(self):
+        return sum(len(segment) for _, segment in self.segments)
+
+
+def kill(species_columns, rows, cause):
+    """
+    Mark organisms as dead, in place.
+
+    Parameters
+    ----------
+    species_columns : SpeciesColumns
+        Columns of the species.
+    rows : np.ndarray
+        Rows of the organisms that die.
+    cause : str
+        Cause of death.
+    """
+    columns = species_columns.columns
+    columns['alive'][rows] = False
+    columns['age_at_death'][rows] = columns['age'][rows]
+    species_columns.fill('cause_of_death', rows, cause)
+
+
+def choose_actions(universe, species_columns, rows):
+    """
+    Choose the action of each organism in rows. If the species' action
+    method has a vectorized form, it is called once for all rows; otherwise
+    the action method is called per organism, on views of the current state,
+    so it should not modify the organism.
+
+    Returns
+    -------
+    action_names : list of str
+        Distinct action names.
+    codes : np.ndarray
+        Index into action_names for each row.
+    """
+    table = species_columns.dispatch_table
+    method = table['action_type']
+    if method is None:
+        raise ValueError('No action type defined!')
+
+    vectorized = table.vectorized['action_type']
+    if vectorized is not None:
+        codes = np.asarray(vectorized(species_columns, rows, universe))
+        if codes.dtype.kind in 'iu':
+            if len(codes) > 0 and (codes.min() < 0
+                                   or codes.max() >= len(action.actions)):
+                raise ValueError('Invalid action code!')
+            return action.actions, codes
+        names = codes
+    else:
+        names = [method(OrganismView(species_columns, i), universe)
+                 for i in rows]
+
+    action_names = list(action.actions)
+    name_codes = {name: code for code, name in enumerate(action_names)}
+    codes = np.empty(len(rows), dtype=int)
+    for j, name in enumerate(names):
+        code = name_codes.get(name)
+        if code is None:
+            code = len(action_names)
+            action_names.append(name)
+            name_codes[name] = code
+        codes[j] = code
+    return action_names, codes
+
+
+def metabolize(columns, rows, resource):
+    """
+    Apply metabolism of one resource to the given rows, in place. Mirrors
+    Organism._update_water and Organism._update_food: levels are clamped to
+    capacity, and the time without the resource is counted while the level
+    is empty and reset otherwise.
+
+    Returns
+    -------
+    starved : np.ndarray
+        Boolean mask over rows, True where the time without the resource
+        exceeds its maximum.
+    """
+    level = columns[f'{resource}_current'][rows]
+    capacity = columns[f'{resource}_capacity'][rows]
+    time_without = columns[f'time_without_{resource}'][rows]
+
+    level = level - columns[f'{resource}_metabolism'][rows]
+    over = level > capacity
+    empty = ~over & (level <= 0)
+    level[over] = capacity[over]
+    level[empty] = 0
+    time_without[empty] += 1
+    time_without[~over & ~empty] = 0
+
+    columns[f'{resource}_current'][rows] = level
+    columns[f'time_without_{resource}'][rows] = time_without
+    return time_without > columns[f'max_time_without_{resource}'][rows]
+
+
+def update_health(species_columns, rows):
+    """
+    Apply water and food metabolism to the given rows, and mark organisms
+    that die from thirst or hunger, as masked array updates over the rows.
+    As with Organism.step, food is still metabolized for organisms dying of
+    thirst, and hunger takes precedence as the recorded cause.
+    """
+    columns = species_columns.columns
+    rows = rows[columns['alive'][rows]]
+    for resource, cause, behavior in [('water', 'thirst', 'drinking_type'),
+                                      ('food', 'hunger', 'eating_type')]:
+        resource_rows = rows[np.not_equal(columns[behavior][rows], None)]
+        if len(resource_rows) == 0:
+            continue
+        starved = metabolize(columns, resource_rows, resource)
+        kill(species_columns, resource_rows[starved], cause)
+
+
+def step_species(universe, last_columns, current_columns, next_columns):
+    """
+    Compute the intents of all organisms of one species.
+
+    Parameters
+    ----------
+    universe : Universe
+        Universe containing the organisms.
+    last_columns : SpeciesColumns
+        Living organisms at the previous time step.
+    current_columns : SpeciesColumns
+        Same organisms with updated ages, visible to behaviors during the
+        step.
+    next_columns : SpeciesColumns
+        Copy of current_columns that vectorized behaviors write into.
+
+    Returns
+    -------
+    intents : StepIntents
+        One intent per organism.
+    batch : SpeciesBatch
+        Rows handled by vectorized behaviors, whose health still needs to be
+        updated once intents are resolved, and their resource requests.
+    """
+    batch = SpeciesBatch(next_columns)
+    intents = StepIntents()
+    if len(current_columns) == 0:
+        return intents, batch
+    table = current_columns.dispatch_table
+    columns = current_columns.columns
+    species = next_columns.species_name
+
+    # Organisms at their old age limit die without acting
+    old = columns['age'] > columns['max_age']
+    old_rows = np.flatnonzero(old)
+    kill(next_columns, old_rows, 'old_age')
+    intents.add_rows(species, old_rows)
+
+    acting_rows = np.flatnonzero(~old)
+    action_names, codes = choose_actions(universe,
+                                         current_columns,
+                                         acting_rows)
+    for code, action_name in enumerate(action_names):
+        rows = acting_rows[codes == code]
+        if len(rows) == 0:
+            continue
+        kernel = None
+        if action_name in vectorized_actions:
+            kernel = table.vectorized[action_fields[action_name]]
+        if kernel is None:
+            # Fall back to stepping each organism individually
+            for i in rows:
+                intents.add_intent(
+                    OrganismView(last_columns, i).step(
+                        universe,
+                        action_name=action_name
+                    )
+                )
+            continue
+
+        if action_name == 'move':
+            next_columns.columns['location'][rows] = kernel(current_columns,
+                                                            rows,
+                                                            universe)
+        elif action_name in ['drink', 'eat']:
+            resource = 'water' if action_name == 'drink' else 'food'
+            batch.add_request(resource,
+                              rows,
+                              kernel(current_columns, rows, universe))
+        next_columns.columns['last_action'][rows] = action_name
+        batch.add_rows(rows)
+        intents.add_rows(species, rows)
+    return intents, batch
+
+
+def allocate(available, cells, requested, mode='first_come', seed=None):
+    """
+    Split resources between requests, per cell.
+
+    Parameters
+    ----------
+    available : np.ndarray
+        Flattened world layer with the amount available in each cell.
+    cells : np.ndarray
+        Flattened cell index of each request.
+    requested : np.ndarray
+        Requested amount of each request.
+    mode : str
+        'first_come' serves requests on the same cell in a random order,
+        each taking as much as is left, up to its requested amount.
+        'proportional' scales all requests on an oversubscribed cell by the
+        same factor.
+    seed : int, Generator, optional
+        Random seed, used to order requests for 'first_come'.
+
+    Returns
+    -------
+    granted : np.ndarray
+        Granted amount of each request.
+    """
+    if len(cells) == 0:
+        return np.zeros(0)
+    if mode == 'proportional':
+        unique_cells, inverse = np.unique(cells, return_inverse=True)
+        totals = np.bincount(inverse, weights=requested)
+        cell_available = available[unique_cells]
+        ratio = np.ones(len(unique_cells))
+        oversubscribed = totals > cell_available
+        ratio[oversubscribed] = (cell_available[oversubscribed]
+                                 / totals[oversubscribed])
+        return requested * ratio[inverse]
+    elif mode == 'first_come':
+        rng = np.random.default_rng(seed)
+        priority = rng.permutation(len(cells))
+        order = np.lexsort((priority, cells))
+        sorted_cells = cells[order]
+        sorted_requested = requested[order]
+
+        # Amount requested by earlier requests on the same cell
+        preceding = np.cumsum(sorted_requested) - sorted_requested
+        starts = np.flatnonzero(np.r_[True,
+                                      sorted_cells[1:] != sorted_cells[:-1]])
+        counts = np.diff(np.r_[starts, len(cells)])
+        preceding -= np.repeat(preceding[starts], counts)
+
+        granted = np.empty(len(cells))
+        granted[order] = np.clip(available[sorted_cells] - preceding,
+                                 0,
+                                 sorted_requested)
+        return granted
+    else:
+        raise ValueError(f'Invalid consumption mode: {mode}')
+
+
+def consume(universe, batches, kept_rows, mode='first_come'):
+    """
+    Settle the resource requests of all species in one pass per resource,
+    updating world layers and organism resource levels.
+
+    Parameters
+    ----------
+    universe : Universe
+        Universe containing the organisms.
+    batches : dict of SpeciesBatch
+        Vectorized rows and requests per species.
+    kept_rows : dict of np.ndarray
+        Rows per species whose intents were selected; requests from other
+        rows are discarded.
+    mode : str
+        Consumption mode, see :func:`allocate`.
+    """
+    for resource, (layer, field) in resources.items():
+        requests = []
+        for species, batch in batches.items():
+            if len(batch.requests[resource]) == 0:
+                continue
+            kept = np.zeros(len(batch.species_columns), dtype=bool)
+            kept[kept_rows[species]] = True
+            for rows, amounts in batch.requests[resource]:
+                selected = kept[rows]
+                if np.any(selected):
+                    requests.append((batch.species_columns,
+                                     rows[selected],
+                                     amounts[selected]))
+        if len(requests) == 0:
+            continue
+
+        grid = np.ascontiguousarray(getattr(universe.world, layer))
+        locations = np.concatenate([
+            species_columns.columns['location'][rows]
+            for species_columns, rows, _ in requests
+        ])
+        requested = np.concatenate([
+            amounts for _, _, amounts in requests
+        ]).astype(float)
+        cells = np.ravel_multi_index(tuple(locations.T), grid.shape)
+        granted = allocate(grid.ravel(), cells, requested,
+                           mode=mode, seed=universe.rng)
+
+        # Subtract everything consumed from each cell in one operation
+        unique_cells, inverse = np.unique(cells, return_inverse=True)
+        consumed = np.bincount(inverse, weights=granted)
+        if grid.dtype.kind != 'f' and np.any(np.mod(consumed, 1) != 0):
+            grid = grid.astype(float)
+        flat_grid = grid.reshape(-1)
+        flat_grid[unique_cells] = flat_grid[unique_cells] - consumed
+        setattr(universe.world, layer, grid)
+        universe.world.mark_changed(layer)
+
+        offset = 0
+        for species_columns, rows, _ in requests:
+            species_columns.columns[field][rows] += granted[offset:offset
+                                                            + len(rows)]
+            offset += len(rows)
+
+
+def _concatenate(parts):
+    """
+    Concatenate integer arrays, which may be an empty list.
+    """
+    if len(parts) == 0:
+        return np.zeros(0, dtype=int)
+    return np.concatenate(parts)
+
+
+def resolve(intents, last_population, next_population, seed=None):
+    """
+    Resolve conflicting intents with parse_intent.resolve, using row
+    positions in the population as organism indices.
+
+    Single-row intents of next_population (from vectorized behaviors) are
+    indexed by their row directly, with array operations, so only intents
+    from the scalar fallback need their organism ids looked up. Organisms
+    without a selected intent step without acting, as in parse_intent.parse.
+
+    Parameters
+    ----------
+    intents : StepIntents
+        Intents of all species, in order.
+    last_population : PopulationStore
+        Living organisms at the previous time step.
+    next_population : PopulationStore
+        Next population state, whose rows single-row intents refer to.
+    seed : int, Generator, optional
+        Random seed
+
+    Returns
+    -------
+    kept_rows : dict of np.ndarray
+        Selected rows of next_population, per species.
+    others : dict of lists of Organisms
+        Other organisms, per species.
+    """
+    species_names = next_population.species_names
+    offsets = {}
+    n_last = 0
+    for species in species_names:
+        offsets[species] = n_last
+        n_last += len(last_population.species[species])
+    species_codes = {species: code
+                     for code, species in enumerate(species_names)}
+
+    # Per intent: its length, its species and row if it is a single-row
+    # intent, or its position in organism_sets otherwise
+    lengths, entries, intent_species, intent_rows = [], [], [], []
+    organism_sets = []
+    index = None
+    for species, segment in intents.segments:
+        if species is not None:
+            lengths.append(np.ones(len(segment), dtype=int))
+            entries.append(offsets[species] + segment)
+            intent_species.append(np.full(len(segment),
+                                          species_codes[species]))
+            intent_rows.append(segment)
+            continue
+        if index is None:
+            index = {}
+            for name in species_names:
+                ids = last_population.species[name].columns['organism_id']
+                index.update(zip(ids.tolist(),
+                                 range(offsets[name],
+                                       offsets[name] + len(ids))))
+        segment_lengths = np.fromiter((len(organism_set)
+                                       for organism_set in segment),
+                                      dtype=int,
+                                      count=len(segment))
+        lengths.append(segment_lengths)
+        entries.append(np.fromiter(
+            (index.setdefault(parse_intent.organism_key(organism),
+                              n_last + len(index))
+             for organism_set in segment
+             for organism in organism_set),
+            dtype=int,
+            count=int(segment_lengths.sum())
+        ))
+        intent_species.append(np.full(len(segment), -1))
+        intent_rows.append(np.arange(len(organism_sets),
+                                     len(organism_sets) + len(segment)))
+        organism_sets.extend(segment)
+
+    intent_species = _concatenate(intent_species)
+    intent_rows = _concatenate(intent_rows)
+    n_indices = n_last + (0 if index is None else len(index))
+    order, accepted, claimed = parse_intent.resolve(_concatenate(lengths),
+                                                    _concatenate(entries),
+                                                    n_indices=n_indices,
+                                                    seed=seed)
+
+    # Selected intents, in priority order
+    selected = order[accepted[order]]
+    selected_species = intent_species[selected]
+    selected_rows = intent_rows[selected]
+    kept_rows = {
+        species: selected_rows[selected_species == species_codes[species]]
+        for species in species_names
+    }
+    others = {species: [] for species in species_names}
+    for k in selected_rows[selected_species == -1].tolist():
+        for organism in organism_sets[k]:
+            others[organism.species_name].append(organism)
+
+    # Add back organisms whose steps were not chosen (and increment status)
+    for species in species_names:
+        last_columns = last_population.species[species]
+        start = offsets[species]
+        unclaimed = np.flatnonzero(
+            ~claimed[start:start + len(last_columns)]
+            & last_columns.columns['alive']
+        )
+        others[species].extend(
+            OrganismView(last_columns, i).step_without_acting()
+            for i in unclaimed
+        )
+    return kept_rows, others
+
+
+def assemble(next_population, kept_rows, others, dimensionality=None):
+    """
+    Build the population at the end of the time step from the kept rows of
+    next_population and the other organisms, packed into new columns.
+
+    Returns
+    -------
+    population : PopulationStore
+        Population at the end of the time step.
+    """
+    species_columns = {}
+    for species in next_population.species_names:
+        parts = [next_population.species[species].take(kept_rows[species])]
+        if len(others[species]) > 0:
+            parts.append(SpeciesColumns.from_organisms(
+                species,
+                others[species],
+                dimensionality=dimensionality
+            ))
+        if len(parts) == 1:
+            species_columns[species] = parts[0]
+        else:
+            species_columns[species] = SpeciesColumns.concatenate(parts)
+    return PopulationStore(species_columns, next_population.species_names)
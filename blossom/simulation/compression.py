@@ -0,0 +1,230 @@
+"""
+Compression of saved datasets and run logs, with stdlib codecs.
+
+Compressed files carry the codec's suffix after their usual one (e.g.
+``.json.gz``), so readers pick the codec from the filename. Files are
+compressed and decompressed as streams, without temporary files. Run logs are
+compressed in blocks of records, as a sequence of independent, length-prefixed
+frames, so that they stay append-only and can still be read from a byte
+offset.
+"""
+
+import io
+import gzip
+import lzma
+import zlib
+import struct
+import zipfile
+from pathlib import Path
+
+
+# Codecs, with the suffix of compressed files
+codecs = {'gzip': '.gz', 'lzma': '.xz', 'zlib': '.zz'}
+
+# Compression of the arrays within npz archives, per codec
+zip_compression = {
+    'gzip': zipfile.ZIP_DEFLATED,
+    'zlib': zipfile.ZIP_DEFLATED,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+_default_levels = {'gzip': 6, 'lzma': 6, 'zlib': 6}
+
+# Header of frames, holding the compressed size
+_frame_header = struct.Struct('>I')
+
+
+def check_codec(compression):
+    """
+    Raise an error for unknown codecs. None means no compression.
+    """
+    if compression is not None and compression not in codecs:
+        raise ValueError(f'Invalid compression: {compression}')
+
+
+def get_compression(fn):
+    """
+    Get the codec of a file from its suffix, or None if it is uncompressed.
+    """
+    suffix = Path(fn).suffix
+    for compression, codec_suffix in codecs.items():
+        if suffix == codec_suffix:
+            return compression
+    return None
+
+
+def strip_suffix(fn):
+    """
+    Remove the codec suffix of a compressed filename, if any.
+    """
+    fn = Path(fn)
+    if get_compression(fn) is not None:
+        return fn.with_suffix('')
+    return fn
+
+
+def add_suffix(fn, compression=None):
+    """
+    Add the codec suffix to a filename, if compressed.
+    """
+    fn = Path(fn)
+    if compression is None:
+        return fn
+    return fn.with_name(fn.name + codecs[compression])
+
+
+class _ZlibWriter(io.RawIOBase):
+    """
+    Write-only file object compressing to a zlib stream.
+    """
+
+    def __init__(self, fileobj, level):
+        self._fileobj = fileobj
+        self._compressor = zlib.compressobj(level)
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._fileobj.write(self._compressor.compress(b))
+        return len(b)
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.write(self._compressor.flush())
+            self._fileobj.close()
+        super().close()
+
+
+class _ZlibReader(io.RawIOBase):
+    """
+    Read-only file object decompressing a zlib stream.
+    """
+
+    def __init__(self, fileobj, chunk_size=2**16):
+        self._fileobj = fileobj
+        self._decompressor = zlib.decompressobj()
+        self._chunk_size = chunk_size
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._decompressor.eof:
+            data = self._decompressor.unconsumed_tail
+            if not data:
+                data = self._fileobj.read(self._chunk_size)
+                if not data:
+                    raise EOFError('Compressed file ended before the end of '
+                                   'the stream')
+            out = self._decompressor.decompress(data, len(b))
+            if out:
+                b[:len(out)] = out
+                return len(out)
+        return 0
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.close()
+        super().close()
+
+
+def open_file(fn, mode='rt', compression=None, level=None):
+    """
+    Open a file, compressing or decompressing it as a stream.
+
+    Parameters
+    ----------
+    fn : str
+        Filename.
+    mode : str
+        One of 'r', 'w', 'rb', 'wb', 'rt' or 'wt'.
+    compression : str, optional
+        Codec, either 'gzip', 'lzma' or 'zlib'. If None, the file is not
+        compressed.
+    level : int, optional
+        Compression level (or preset, for lzma). Uses each codec's default if
+        None.
+
+    Returns
+    -------
+    f : file object
+        Binary or text file object.
+    """
+    check_codec(compression)
+    binary_mode = mode.replace('t', '') + ('b' if 'b' not in mode else '')
+    if compression is None:
+        return open(fn, mode)
+    if level is None:
+        level = _default_levels[compression]
+    if compression == 'gzip':
+        f = gzip.open(fn, binary_mode, compresslevel=level)
+    elif compression == 'lzma':
+        f = lzma.open(fn, binary_mode,
+                      preset=level if 'w' in mode else None)
+    elif 'w' in mode:
+        f = io.BufferedWriter(_ZlibWriter(open(fn, 'wb'), level))
+    else:
+        f = io.BufferedReader(_ZlibReader(open(fn, 'rb')))
+    if 'b' in mode:
+        return f
+    return io.TextIOWrapper(f)
+
+
+def compress(data, compression, level=None):
+    """
+    Compress bytes into a single, self-contained frame, prefixed with its
+    compressed size.
+    """
+    check_codec(compression)
+    if level is None:
+        level = _default_levels[compression]
+    if compression == 'gzip':
+        data = gzip.compress(data, compresslevel=level)
+    elif compression == 'lzma':
+        data = lzma.compress(data, preset=level)
+    else:
+        data = zlib.compress(data, level)
+    return _frame_header.pack(len(data)) + data
+
+
+def decompress(data, compression):
+    """
+    Decompress the contents of a frame, without its header.
+    """
+    if compression == 'gzip':
+        return gzip.decompress(data)
+    elif compression == 'lzma':
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+def iter_frames(f, compression):
+    """
+    Decompress consecutive frames, as written by :func:`compress`.
+
+    Parameters
+    ----------
+    f : file object
+        Binary file, positioned at the start of a frame. The last frame may
+        be incomplete, e.g. while it is being written, in which case it is
+        skipped.
+    compression : str
+        Codec of the frames.
+
+    Yields
+    ------
+    frame : bytes
+        Decompressed contents of a frame.
+    size : int
+        Size of the frame in bytes, including its header.
+    """
+    while True:
+        header = f.read(_frame_header.size)
+        if len(header) < _frame_header.size:
+            return
+        length, = _frame_header.unpack(header)
+        data = f.read(length)
+        if len(data) < length:
+            return
+        yield decompress(data, compression), _frame_header.size + length
@@ -6,16 +6,706 @@ write world and organism data back to file.
 import copy
 import json
 import pickle
+import re
+import zipfile
 from pathlib import Path
+import click
 import numpy as np
 
 from .world import World
 from .organism import Organism
+from .id_allocator import IDAllocator
+from .population_store import PopulationStore, SpeciesColumns, \
+    make_field_column
+from . import snapshot_format
+from . import run_log
+from . import layer_store
+from . import compression as cmp
+
+
+# Dataset formats written by save_universe, with their file suffixes
+snapshot_formats = {'json': '.json', 'npz': '.npz'}
+
+
+def find_datasets(data_dir):
+    """
+    Find all saved universe datasets in a directory, in any format and
+    compression.
+
+    Parameters
+    ----------
+    data_dir : str
+        Directory containing the datasets of a single run.
+
+    Returns
+    -------
+    dataset_fns : list of Path
+        Dataset filenames, sorted by timestep.
+    """
+    data_dir = Path(data_dir)
+    return sorted(
+        fn for suffix in snapshot_formats.values()
+        for codec_suffix in [''] + list(cmp.codecs.values())
+        for fn in data_dir.glob(f'*{suffix}{codec_suffix}')
+    )
+
+
+def dataset_format(fn):
+    """
+    Get the snapshot format of a dataset from its filename.
+    """
+    suffix = cmp.strip_suffix(fn).suffix
+    for snapshot_format_name, format_suffix in snapshot_formats.items():
+        if suffix == format_suffix:
+            return snapshot_format_name
+    raise ValueError(f'Unknown dataset format: {fn}')
+
+
+def seed_filename(fn):
+    """
+    Get the filename of the random state pickled along with a dataset, by
+    versions that didn't store it in the dataset itself.
+    """
+    return cmp.strip_suffix(fn).with_suffix('.seed')
+
+
+def run_info(universe):
+    """
+    Run information stored in datasets: the initial seed, the next free
+    organism ID, and the state of the random number generator, from which
+    resumed runs continue.
+    """
+    return {
+        'initial_seed': universe.initial_seed,
+        'next_organism_id': universe.ids.next_id,
+        'rng_state': universe.rng.bit_generator.state
+    }
+
+
+def restore_rng(rng_state):
+    """
+    Create a random number generator in a saved state.
+
+    Parameters
+    ----------
+    rng_state : dict
+        State of the generator's bit generator, as saved by
+        :func:`run_info`.
+
+    Returns
+    -------
+    rng : np.random.Generator
+        Random number generator, continuing from the saved state.
+    """
+    bit_generator = getattr(np.random, rng_state['bit_generator'])()
+    bit_generator.state = rng_state
+    return np.random.Generator(bit_generator)
+
+
+def read_json_file(fn):
+    """
+    Parse a dataset saved in JSON format, decompressing it on the fly if
+    needed, without building any objects from it.
+
+    Returns
+    -------
+    universe_dict : dict
+        Saved population, world and run information, as plain dicts
+    """
+    with cmp.open_file(fn, 'rt', cmp.get_compression(fn)) as f:
+        return json.load(f)
+
+
+def world_from_dict(world_dict, data_dir):
+    """
+    Build a World from a saved world dict, opening layers saved in separate
+    files (see :mod:`blossom.simulation.layer_store`) relative to data_dir.
+    """
+    world_dict = dict(world_dict)
+    for field, value in world_dict.items():
+        if layer_store.is_reference(value):
+            world_dict[field] = layer_store.load_layer(data_dir, value)
+    return World(world_dict)
+
+
+def population_from_dict(population_dict_json, fields=None,
+                         dimensionality=1):
+    """
+    Build column storage directly from a population saved in JSON format,
+    without creating Organism objects.
+
+    Parameters
+    ----------
+    population_dict_json : dict
+        Saved population, with a list of organism dicts per species.
+    fields : list of str, optional
+        Only build columns for these fields.
+    dimensionality : int
+        Dimensionality of the world.
+
+    Returns
+    -------
+    population : PopulationStore
+        Column storage of the saved population
+    statistics : dict
+        Saved statistics per species
+    """
+    species_columns = {}
+    statistics = {}
+    for species, species_dict in population_dict_json.items():
+        organism_dicts = species_dict['organisms']
+        if fields is None:
+            species_columns[species] = SpeciesColumns.from_dicts(
+                species,
+                organism_dicts,
+                dimensionality=dimensionality
+            )
+        else:
+            species_columns[species] = SpeciesColumns(
+                species,
+                {
+                    field: make_field_column(field,
+                                             [organism_dict[field]
+                                              for organism_dict
+                                              in organism_dicts])
+                    for field in fields
+                    if all(field in organism_dict
+                           for organism_dict in organism_dicts)
+                },
+                dimensionality=dimensionality
+            )
+        statistics[species] = species_dict['statistics']
+    population = PopulationStore(species_columns, list(population_dict_json))
+    return population, statistics
+
+
+def read_json_dataset(fn):
+    """
+    Read a dataset saved in JSON format, decompressing it on the fly if
+    needed. Organisms are decoded one at a time (see
+    :class:`JSONDatasetStream`), so the file is never held in memory as a
+    whole.
+
+    Returns
+    -------
+    population_dict : dict
+        A dict of Organism objects reconstructed from the saved dataset
+    world : World
+        World object reconstructed from the saved dataset
+    info : dict
+        Run information, such as the initial seed
+    """
+    population_dict = {}
+    with JSONDatasetStream(fn) as stream:
+        for species, organisms in stream.batches():
+            population_dict.setdefault(species, {'organisms': []})
+            population_dict[species]['organisms'].extend(organisms)
+        world = world_from_dict(stream.world_dict, Path(fn).parent)
+        info = stream.info
+    for species in population_dict:
+        population_dict[species]['statistics'] = stream.statistics[species]
+    return population_dict, world, info
+
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+
+
+class JSONDatasetStream(object):
+    """
+    Incremental reader for datasets saved in JSON format.
+
+    The file is read in chunks, and organisms are decoded one at a time and
+    handed out species by species or in batches of fixed size, so memory use
+    is bounded by the batch size rather than by the size of the file.
+    Statistics, world and run information are kept as they are reached; in
+    files written by :func:`write_json_dataset`, the world and run
+    information come after the population, so they are only available once
+    all batches have been read.
+    """
+
+    def __init__(self, fn, chunk_size=2**20):
+        """
+        Parameters
+        ----------
+        fn : str
+            Dataset filename, possibly compressed.
+        chunk_size : int
+            Number of characters to read from the file at a time.
+        """
+        self.fn = Path(fn)
+        self.chunk_size = chunk_size
+        self.statistics = {}
+        self.world_dict = None
+        self.info = None
+        self._f = None
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+        self._started = False
+        self._decoder = json.JSONDecoder()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def _read(self, size=None):
+        """
+        Read more of the file into the buffer, dropping what was already
+        decoded. Returns False at the end of the file.
+        """
+        data = self._f.read(size or self.chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._position:] + data
+        self._position = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            self._position = _whitespace.match(self._buffer,
+                                               self._position).end()
+            if self._position < len(self._buffer) or not self._read():
+                return
+
+    def _next_char(self):
+        self._skip_whitespace()
+        if self._position >= len(self._buffer):
+            raise ValueError(f'Unexpected end of {self.fn}')
+        char = self._buffer[self._position]
+        self._position += 1
+        return char
+
+    def _peek(self):
+        char = self._next_char()
+        self._position -= 1
+        return char
+
+    def _expect(self, char):
+        if self._next_char() != char:
+            raise ValueError(f'Expected {char!r} in {self.fn}')
+
+    def _value(self):
+        """
+        Decode a complete JSON value, reading more of the file until the
+        value fits in the buffer.
+        """
+        self._skip_whitespace()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer,
+                                                      self._position)
+                # Numbers at the end of the buffer may continue in the file
+                if end < len(self._buffer) or self._eof:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._read(size)
+            size *= 2
+
+    def _keys(self):
+        """
+        Iterate over the keys of the object at the current position. The
+        caller decodes each value before asking for the next key.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            yield key
+            char = self._next_char()
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f'Expected \',\' or \'}}\' in {self.fn}')
+
+    def _elements(self):
+        """
+        Iterate over the elements of the array at the current position. The
+        caller decodes each element before asking for the next one.
+        """
+        self._expect('[')
+        if self._peek() == ']':
+            self._position += 1
+            return
+        while True:
+            yield
+            char = self._next_char()
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f'Expected \',\' or \']\' in {self.fn}')
+
+    def _organisms(self, species, batch_size, as_dicts):
+        batch = []
+        yielded = False
+        for _ in self._elements():
+            organism_dict = self._value()
+            batch.append(organism_dict if as_dicts
+                         else Organism(organism_dict))
+            if batch_size is not None and len(batch) >= batch_size:
+                yield species, batch
+                batch = []
+                yielded = True
+        if len(batch) > 0 or not yielded:
+            yield species, batch
+
+    def batches(self, batch_size=None, as_dicts=False):
+        """
+        Read the dataset, yielding organisms as they are decoded. Can only be
+        called once per stream.
+
+        Parameters
+        ----------
+        batch_size : int, optional
+            Maximum number of organisms per batch. If None, each species is
+            yielded as a single batch.
+        as_dicts : bool
+            Whether to yield organisms as dicts of their fields, instead of
+            Organism objects.
+
+        Yields
+        ------
+        species : str
+            Species name
+        organisms : list of Organism or dict
+            Next batch of organisms of the species. Every species is yielded
+            at least once, with an empty batch if it has no organisms.
+        """
+        if self._started:
+            raise ValueError('JSONDatasetStream can only be read once')
+        self._started = True
+        self._f = cmp.open_file(self.fn, 'rt', cmp.get_compression(self.fn))
+        for key in self._keys():
+            if key == 'population':
+                for species in self._keys():
+                    for field in self._keys():
+                        if field == 'organisms':
+                            yield from self._organisms(species,
+                                                       batch_size,
+                                                       as_dicts)
+                        elif field == 'statistics':
+                            self.statistics[species] = self._value()
+                        else:
+                            self._value()
+            elif key == 'world':
+                self.world_dict = self._value()
+            elif key == 'info':
+                self.info = self._value()
+            else:
+                self._value()
+        self.close()
+
+
+def convert_dataset(fn, out_fn, compression=None, level=None,
+                    batch_size=10000):
+    """
+    Convert a dataset saved in JSON format to the binary columnar npz
+    format, reading organisms in batches so that the JSON is never loaded as
+    a whole. A random state pickled next to the dataset by earlier versions
+    is stored in the converted dataset.
+
+    Parameters
+    ----------
+    fn : str
+        JSON dataset filename, possibly compressed.
+    out_fn : str
+        Filename of the npz dataset to write.
+    compression : str, optional
+        Codec to compress the arrays with (see
+        :mod:`blossom.simulation.compression`).
+    level : int, optional
+        Compression level.
+    batch_size : int
+        Number of organisms to decode at a time.
+
+    Returns
+    -------
+    out_fn : Path
+        Filename of the npz dataset.
+    """
+    parts = {}
+    with JSONDatasetStream(fn) as stream:
+        for species, organism_dicts in stream.batches(batch_size=batch_size,
+                                                      as_dicts=True):
+            parts.setdefault(species, [])
+            if len(organism_dicts) > 0:
+                parts[species].append(
+                    SpeciesColumns.from_dicts(species, organism_dicts)
+                )
+    world = world_from_dict(stream.world_dict, Path(fn).parent)
+
+    species_columns = {}
+    for species, species_parts in parts.items():
+        if len(species_parts) > 0:
+            species_columns[species] = SpeciesColumns.concatenate(species_parts)
+            species_columns[species].dimensionality = world.dimensionality
+        else:
+            species_columns[species] = SpeciesColumns.from_dicts(
+                species,
+                [],
+                dimensionality=world.dimensionality
+            )
+    population = PopulationStore(species_columns, list(parts))
+
+    info = dict(stream.info)
+    seed_fn = seed_filename(fn)
+    if 'rng_state' not in info and seed_fn.is_file():
+        with open(seed_fn, 'rb') as f:
+            info['rng_state'] = pickle.load(f).bit_generator.state
+
+    population_header, arrays = snapshot_format.encode_population(
+        population,
+        statistics=stream.statistics
+    )
+    world_header, world_arrays = snapshot_format.encode_world(world)
+    arrays.update(world_arrays)
+    header = {
+        'format': snapshot_format.FORMAT,
+        'version': snapshot_format.VERSION,
+        'population': population_header,
+        'world': world_header,
+        'info': info
+    }
+    out_fn = Path(out_fn)
+    _write_npz(out_fn, header, arrays, compression=compression, level=level)
+    return out_fn
+
+
+def convert_run(data_dir, out_dir, compression=None, level=None,
+                batch_size=10000):
+    """
+    Convert all JSON datasets of a run to the binary columnar npz format,
+    with :func:`convert_dataset`.
+
+    Parameters
+    ----------
+    data_dir : str
+        Data directory of the run.
+    out_dir : str
+        Directory to write the npz datasets to. Must differ from data_dir,
+        so that each time step has a single dataset.
+    compression : str, optional
+        Codec to compress the arrays with.
+    level : int, optional
+        Compression level.
+    batch_size : int
+        Number of organisms to decode at a time.
+
+    Returns
+    -------
+    out_fns : list of Path
+        Filenames of the npz datasets.
+    """
+    data_dir = Path(data_dir).resolve()
+    out_dir = Path(out_dir).resolve()
+    if out_dir == data_dir:
+        raise ValueError('Converted datasets must go to a separate directory')
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_fns = []
+    for fn in find_datasets(data_dir):
+        if dataset_format(fn) != 'json':
+            continue
+        out_fn = out_dir / cmp.strip_suffix(fn).with_suffix(
+            snapshot_formats['npz']
+        ).name
+        out_fns.append(convert_dataset(fn, out_fn,
+                                       compression=compression,
+                                       level=level,
+                                       batch_size=batch_size))
+    return out_fns
+
+
+def _read_npz_header(fn, arrays):
+    header = json.loads(arrays['header'].tobytes())
+    if header.get('format') != snapshot_format.FORMAT:
+        raise ValueError(f'{fn} is not a blossom columnar dataset')
+    if header['version'] > snapshot_format.VERSION:
+        raise ValueError(f'Unsupported dataset version: {header["version"]}')
+    return header
+
+
+def read_npz_header(fn):
+    """
+    Read only the JSON header of a dataset saved in npz format.
+    """
+    with np.load(fn) as arrays:
+        return _read_npz_header(fn, arrays)
+
+
+def _decode_npz_population(fn, header, arrays, fields=None,
+                           keyframe_cache=None):
+    if 'keyframe' not in header:
+        return snapshot_format.decode_population(header['population'],
+                                                 arrays,
+                                                 fields=fields)
+
+    keyframe_fn = Path(fn).parent / header['keyframe']
+    cache_key = (str(keyframe_fn), None if fields is None else tuple(fields))
+    keyframe = None
+    if keyframe_cache is not None:
+        keyframe = keyframe_cache.get(cache_key)
+    if keyframe is None:
+        with np.load(keyframe_fn) as keyframe_arrays:
+            keyframe_header = _read_npz_header(keyframe_fn, keyframe_arrays)
+            keyframe, _ = snapshot_format.decode_population(
+                keyframe_header['population'],
+                keyframe_arrays,
+                fields=fields
+            )
+        if keyframe_cache is not None:
+            # Datasets are usually read in order, so only keep the latest
+            keyframe_cache.clear()
+            keyframe_cache[cache_key] = keyframe
+    return snapshot_format.decode_population_delta(keyframe,
+                                                   header['population'],
+                                                   arrays,
+                                                   fields=fields)
+
+
+def _decode_npz_world(fn, header, arrays):
+    if 'keyframe' in header:
+        with np.load(Path(fn).parent / header['keyframe']) as keyframe_arrays:
+            arrays = snapshot_format.decode_grids_delta(keyframe_arrays,
+                                                        header['grids'],
+                                                        arrays)
+    return snapshot_format.decode_world(header['world'],
+                                        arrays,
+                                        data_dir=Path(fn).parent)
+
+
+def read_npz_population(fn, fields=None, keyframe_cache=None):
+    """
+    Read only the population of a dataset saved in npz format. Only the
+    arrays of the requested fields are read from the file.
+
+    Parameters
+    ----------
+    fn : str
+        Dataset filename
+    fields : list of str, optional
+        Only read these fields
+    keyframe_cache : dict, optional
+        Decoded keyframes to reuse when reading several deltas of the same
+        run. Only the latest keyframe is kept.
+
+    Returns
+    -------
+    population : PopulationStore
+        Column storage of the saved population
+    statistics : dict
+        Saved statistics per species
+    """
+    with np.load(fn) as arrays:
+        header = _read_npz_header(fn, arrays)
+        return _decode_npz_population(fn, header, arrays,
+                                      fields=fields,
+                                      keyframe_cache=keyframe_cache)
+
+
+def read_npz_world(fn):
+    """
+    Read only the world of a dataset saved in npz format.
+    """
+    with np.load(fn) as arrays:
+        header = _read_npz_header(fn, arrays)
+        return _decode_npz_world(fn, header, arrays)
+
+
+def read_npz_dataset(fn):
+    """
+    Read a dataset saved in the binary columnar npz format (see
+    :mod:`blossom.simulation.snapshot_format`). Datasets saved as deltas are
+    reconstructed from their keyframe.
+
+    Returns
+    -------
+    population : PopulationStore
+        Column storage of the saved population
+    statistics : dict
+        Saved statistics per species
+    world : World
+        World object reconstructed from the saved dataset
+    info : dict
+        Run information, such as the initial seed
+    """
+    with np.load(fn) as arrays:
+        header = _read_npz_header(fn, arrays)
+        population, statistics = _decode_npz_population(fn, header, arrays)
+        world = _decode_npz_world(fn, header, arrays)
+    return population, statistics, world, header['info']
+
+
+def read_dataset(fn):
+    """
+    Read a dataset in any format, as a population dict of Organism objects.
+
+    Returns
+    -------
+    population_dict : dict
+        A dict of Organism objects reconstructed from the saved dataset
+    world : World
+        World object reconstructed from the saved dataset
+    info : dict
+        Run information, such as the initial seed
+    """
+    if dataset_format(fn) == 'npz':
+        population, statistics, world, info = read_npz_dataset(fn)
+        population_dict = {
+            species: {
+                'statistics': statistics[species],
+                'organisms': population.species[species].to_organisms()
+            }
+            for species in population.species_names
+        }
+        return population_dict, world, info
+    return read_json_dataset(fn)
+
+
+def _ids_from_uuids(population_dict, ids):
+    """
+    Map organism IDs and ancestry saved as UUID strings (with
+    ``export_uuids``) back to the integer IDs they were derived from, in
+    place, so that resumed runs don't mix them with new integer IDs.
+    """
+    organisms = [organism
+                 for species in population_dict
+                 for organism in population_dict[species]['organisms']]
+    uuids = set()
+    for organism in organisms:
+        uuids.add(organism.organism_id)
+        for entry in organism.ancestry:
+            uuids.update(entry if isinstance(entry, list) else [entry])
+    uuids = {value for value in uuids if isinstance(value, str)}
+    if len(uuids) == 0:
+        return
+    lookup = ids.from_uuids(uuids)
+    for organism in organisms:
+        organism.organism_id = lookup.get(organism.organism_id,
+                                          organism.organism_id)
+        organism.ancestry = [
+            [lookup.get(parent_id, parent_id) for parent_id in entry]
+            if isinstance(entry, list) else lookup.get(entry, entry)
+            for entry in organism.ancestry
+        ]
 
 
 def load_universe(fn, seed=None):
     """
-    Load dataset file from JSON.
+    Load dataset file, either from JSON or from the binary npz format.
 
     Parameters
     ----------
@@ -30,58 +720,47 @@ def load_universe(fn, seed=None):
         A dict of Organism objects reconstructed from the saved dataset
     world : World
         World object reconstructed from the saved dataset
-    seed : int, Generator
-        Numpy random number generator from last timestep
+    config_params : dict
+        Initial seed, NumPy random number generator from last timestep, and
+        organism ID allocator
     """
-    with open(fn, 'r') as f:
-        universe_dict = json.load(f)
+    population_dict, world, info = read_dataset(fn)
 
-    world = World(universe_dict['world'])
-
-    population_dict_json = universe_dict['population']
-    population_dict = {}
-    for species in population_dict_json:
-        population_dict[species] = {}
-        population_dict[species]['statistics'] = population_dict_json[species]['statistics']
-        population_dict[species]['organisms'] = [
-            Organism(organism_dict)
-            for organism_dict in population_dict_json[species]['organisms']
-        ]
-
-    seed_fn = Path(fn).with_suffix('.seed')
-    if seed is None and seed_fn.is_file():
-        seed = universe_dict['info']['initial_seed']
+    seed_fn = seed_filename(fn)
+    if seed is None and 'rng_state' in info:
+        seed = info['initial_seed']
+        rng = restore_rng(info['rng_state'])
+    elif seed is None and seed_fn.is_file():
+        # Datasets saved before the random state moved into the dataset
+        seed = info['initial_seed']
         with open(seed_fn, 'rb') as f:
             rng = pickle.load(f)
     else:
         if seed is None:
             seed = np.random.default_rng().integers(2**32)
         rng = np.random.default_rng(seed)
+
+    # Continue the organism ID sequence of the saved run
+    ids = IDAllocator(info.get('next_organism_id', 0),
+                      seed=info.get('initial_seed'))
+    _ids_from_uuids(population_dict, ids)
+    for species in population_dict:
+        ids.reserve(organism.organism_id
+                    for organism in population_dict[species]['organisms'])
     config_params = {
         'initial_seed': seed,
-        'rng': rng
+        'rng': rng,
+        'ids': ids
     }
 
     return population_dict, world, config_params
 
 
-def save_universe(universe):
+def write_json_dataset(data_fn, universe):
     """
-    Save population_dict and world to file in JSON format.
-
-    Parameters
-    ----------
-    universe : Universe
-        Universe containing organism
+    Write population_dict and world to file in JSON format, compressed as a
+    stream if the universe has compression set.
     """
-    padded_time = str(universe.current_time).zfill(universe.pad_zeros)
-    data_fn = (
-        universe.run_data_dir / f'{universe.project_dir.name}.{padded_time}.json'
-    )
-    log_fn = (
-        universe.run_logs_dir / f'{universe.project_dir.name}.{padded_time}.log'
-    )
-
     population_dict_json = {}
     for species in universe.population_dict:
         population_dict_json[species] = {}
@@ -90,44 +769,367 @@ def save_universe(universe):
             organism.to_dict()
             for organism in universe.population_dict[species]['organisms']
         ]
+        if universe.export_uuids:
+            for organism_dict in population_dict_json[species]['organisms']:
+                organism_dict['organism_id'] = universe.ids.to_uuid(
+                    organism_dict['organism_id']
+                )
+                organism_dict['ancestry'] = universe.ids.ancestry_to_uuid(
+                    organism_dict['ancestry']
+                )
+    world_dict = universe.world.to_dict()
+    if universe.world_layers is not None:
+        world_dict.update(universe.world_layers)
     universe_dict = {
         'population': population_dict_json,
-        'world': universe.world.to_dict(),
-        'info': {
-            'initial_seed': universe.initial_seed
-        }
+        'world': world_dict,
+        'info': run_info(universe)
     }
-    with open(data_fn, 'w') as f:
+    with cmp.open_file(data_fn, 'wt',
+                       compression=universe.compression,
+                       level=universe.compression_level) as f:
         json.dump(universe_dict, f, indent=2, cls=NPEncoder)
 
+
+def write_npz_dataset(data_fn, universe):
+    """
+    Write the population columns and world grids to file in the binary npz
+    format, with a JSON header for everything else. If the universe has
+    compression set, each array is compressed within the archive, so that
+    arrays can still be loaded one at a time.
+    """
+    # The columnar engine already stores the population in columns (except
+    # when saving the initial state, which is written before it is set up)
+    population = getattr(universe, 'population', None)
+    if population is None:
+        population = PopulationStore.from_population_dict(
+            universe.population_dict,
+            dimensionality=universe.world.dimensionality
+        )
+    if universe.export_uuids:
+        population = population.copy()
+        for species_columns in population.species.values():
+            columns = species_columns.columns
+            organism_ids = np.empty(len(species_columns), dtype=object)
+            organism_ids[:] = [universe.ids.to_uuid(organism_id)
+                               for organism_id in columns['organism_id']]
+            columns['organism_id'] = organism_ids
+            ancestries = np.empty(len(species_columns), dtype=object)
+            ancestries[:] = [universe.ids.ancestry_to_uuid(ancestry)
+                             for ancestry in columns['ancestry']]
+            columns['ancestry'] = ancestries
+
+    statistics = {
+        species: universe.population_dict[species]['statistics']
+        for species in population.species_names
+    }
+    world_header, world_arrays = snapshot_format.encode_world(
+        universe.world,
+        references=universe.world_layers
+    )
+    header = {
+        'format': snapshot_format.FORMAT,
+        'version': snapshot_format.VERSION
+    }
+    keyframes = universe.keyframes
+    if keyframes is None or keyframes.due():
+        population_header, arrays = snapshot_format.encode_population(
+            population,
+            statistics=statistics
+        )
+        arrays.update(world_arrays)
+        if keyframes is not None:
+            keyframes.set(data_fn, population, world_arrays)
+    else:
+        header['keyframe'] = keyframes.fn
+        population_header, arrays = snapshot_format.encode_population_delta(
+            keyframes.population,
+            population,
+            statistics=statistics
+        )
+        header['grids'], grid_arrays = snapshot_format.encode_grids_delta(
+            keyframes.world_arrays,
+            world_arrays
+        )
+        arrays.update(grid_arrays)
+    if keyframes is not None:
+        keyframes.count += 1
+    header.update({
+        'population': population_header,
+        'world': world_header,
+        'info': run_info(universe)
+    })
+    _write_npz(data_fn, header, arrays,
+               compression=universe.compression,
+               level=universe.compression_level)
+
+
+def _write_npz(data_fn, header, arrays, compression=None, level=None):
+    header_bytes = json.dumps(header, cls=NPEncoder).encode()
+    arrays['header'] = np.frombuffer(header_bytes, dtype=np.uint8)
+    if compression is None:
+        with open(data_fn, 'wb') as f:
+            np.savez(f, **arrays)
+    else:
+        _savez_compressed(data_fn, arrays,
+                          compression=compression,
+                          level=level)
+
+
+def _savez_compressed(data_fn, arrays, compression, level=None):
+    """
+    Like np.savez_compressed, but with a choice of codec and level. Arrays
+    are written straight into the archive, one at a time.
+    """
+    with zipfile.ZipFile(data_fn, mode='w',
+                         compression=cmp.zip_compression[compression],
+                         compresslevel=level,
+                         allowZip64=True) as zf:
+        for key, array in arrays.items():
+            with zf.open(f'{key}.npy', 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, np.asanyarray(array),
+                                          allow_pickle=False)
+
+
+class Keyframes(object):
+    """
+    Latest keyframe of a run saving npz datasets as deltas. Every
+    ``keyframe_every``-th checkpoint is saved in full, as a keyframe, and the
+    checkpoints in between only store what changed since that keyframe.
+    """
+
+    def __init__(self, keyframe_every):
+        """
+        Parameters
+        ----------
+        keyframe_every : int
+            Number of checkpoints per keyframe, including the keyframe
+            itself.
+        """
+        if keyframe_every < 1:
+            raise ValueError('keyframe_every must be at least 1')
+        self.keyframe_every = keyframe_every
+        self.fn = None
+        self.population = None
+        self.world_arrays = None
+        self.count = 0
+
+    def due(self):
+        """
+        Whether the next checkpoint should be saved as a keyframe.
+        """
+        return self.fn is None or self.count >= self.keyframe_every
+
+    def set(self, fn, population, world_arrays):
+        """
+        Keep the contents of a newly saved keyframe, to encode later
+        checkpoints against. Grids are copied, since the world modifies them
+        in place.
+        """
+        self.fn = Path(fn).name
+        self.population = population
+        self.world_arrays = {key: np.array(grid)
+                             for key, grid in world_arrays.items()}
+        self.count = 0
+
+
+class UniverseState(object):
+    """
+    Copy of the parts of a universe written by :func:`save_universe`, taken
+    at the end of a time step so that it can be saved while the universe
+    keeps stepping.
+
+    Organisms are never modified in place once a time step is over (each
+    step works on clones, or on copies of the columns), so they are shared
+    by reference. The world grids and random number generator are modified
+    in place and are copied, except for world layers already saved to layer
+    files. If no checkpoint is to be saved, only the statistics are kept.
+    """
+
+    def __init__(self, universe, checkpoint=True):
+        for attr in ['current_time', 'pad_zeros', 'project_dir',
+                     'run_data_dir', 'run_logs_dir', 'snapshot_format',
+                     'export_uuids', 'initial_seed', 'elapsed_time',
+                     'world_layers', 'keyframes',
+                     'compression', 'compression_level']:
+            setattr(self, attr, getattr(universe, attr))
+        self.checkpoint = checkpoint
+        self.population_dict = {
+            species: {'statistics': dict(species_dict['statistics'])}
+            for species, species_dict in universe.population_dict.items()
+        }
+        if checkpoint:
+            self.population = getattr(universe, 'population', None)
+            if self.population is not None:
+                # Views of the columns are only built for JSON datasets
+                self.population_dict = self.population.to_population_dict()
+            else:
+                for species, species_dict in universe.population_dict.items():
+                    self.population_dict[species]['organisms'] = list(
+                        species_dict['organisms']
+                    )
+            world_layers = self.world_layers or {}
+            self.world = World({
+                field: None if field in world_layers
+                else value.copy() if isinstance(value, np.ndarray)
+                else copy.deepcopy(value)
+                for field, value in universe.world.to_dict().items()
+            })
+            self.ids = IDAllocator(universe.ids.next_id,
+                                   seed=universe.ids.seed)
+            self.rng = restore_rng(universe.rng.bit_generator.state)
+
+
+def save_checkpoint(universe):
+    """
+    Save population and world to file, in the universe's snapshot format
+    (JSON by default, or the binary columnar npz format), including the
+    state of the random number generator. If the universe has
+    ``export_uuids`` set, organism IDs (including ancestry) are written as
+    UUID strings instead of integers.
+
+    Parameters
+    ----------
+    universe : Universe or UniverseState
+        Universe containing organism, or a copy of its state
+
+    Returns
+    -------
+    data_fn : Path
+        Filename of the saved dataset
+    """
+    padded_time = str(universe.current_time).zfill(universe.pad_zeros)
+    suffix = snapshot_formats[universe.snapshot_format]
+    data_fn = (
+        universe.run_data_dir / f'{universe.project_dir.name}.{padded_time}{suffix}'
+    )
+    if universe.snapshot_format == 'json':
+        data_fn = cmp.add_suffix(data_fn, universe.compression)
+
+    if universe.snapshot_format == 'npz':
+        write_npz_dataset(data_fn, universe)
+    else:
+        write_json_dataset(data_fn, universe)
+
+    return data_fn
+
+
+def save_statistics(universe, size=0):
+    """
+    Log population statistics and timing for the current time step, by
+    appending a record to the run log (see :mod:`blossom.simulation.run_log`).
+
+    Parameters
+    ----------
+    universe : Universe or UniverseState
+        Universe containing organism, or a copy of its state
+    size : int
+        Size in bytes of the dataset saved at this time step, if any
+    """
+    log_fn = run_log.log_filename(universe.run_logs_dir,
+                                  universe.project_dir.name,
+                                  compression=universe.compression)
     log_dict = {
         'species': {
             species: universe.population_dict[species]['statistics'] 
             for species in universe.population_dict
         },
         'world': {
-            'timestep': universe.world.current_time,
+            'timestep': universe.current_time,
             'elapsed_time': universe.elapsed_time
         },
         'info': {
             'initial_seed': universe.initial_seed,
-            'size': data_fn.stat().st_size
+            'size': size
         }
     }
-    with open(log_fn, 'w') as f:
-        json.dump(log_dict, f, indent=2, cls=NPEncoder)
+    run_log.append(log_fn, log_dict, cls=NPEncoder,
+                   level=universe.compression_level)
 
-    # Save seed information for last completed timestep
-    last_padded_time = str(universe.current_time-1).zfill(universe.pad_zeros)
-    last_seed_fn = (
-        universe.run_data_dir / f'{universe.project_dir.name}.{last_padded_time}.seed'
-    )
-    last_seed_fn.unlink(missing_ok=True)
-    seed_fn = (
-        universe.run_data_dir / f'{universe.project_dir.name}.{padded_time}.seed'
-    )
-    with open(seed_fn, 'wb') as f:
-        pickle.dump(universe.rng, f)
+
+def save_universe(universe, checkpoint=True):
+    """
+    Log statistics for the current time step, and save a checkpoint of the
+    full state if requested.
+
+    Parameters
+    ----------
+    universe : Universe or UniverseState
+        Universe containing organism, or a copy of its state
+    checkpoint : bool
+        Whether to save a checkpoint
+    """
+    size = 0
+    if checkpoint:
+        size = save_checkpoint(universe).stat().st_size
+    save_statistics(universe, size=size)
+
+
+def make_run_dirs(project_dir, run_name):
+    """
+    Create the data and log directories of a new run, under ``data/`` and
+    ``logs/`` in a project directory. If either already exists, e.g. for runs
+    with the same seed started within the same second, a number is appended
+    to the run name, so that runs never share directories, even when started
+    concurrently.
+
+    Parameters
+    ----------
+    project_dir : str
+        Project directory.
+    run_name : str
+        Preferred name of the run.
+
+    Returns
+    -------
+    run_data_dir : Path
+        Data directory of the run.
+    run_logs_dir : Path
+        Log directory of the run.
+    """
+    project_dir = Path(project_dir)
+    (project_dir / 'data').mkdir(parents=True, exist_ok=True)
+    (project_dir / 'logs').mkdir(parents=True, exist_ok=True)
+    name = run_name
+    suffix = 0
+    while True:
+        run_data_dir = project_dir / 'data' / name
+        run_logs_dir = project_dir / 'logs' / name
+        # Creating the directory is atomic, so only one run can claim a name
+        try:
+            run_data_dir.mkdir()
+            try:
+                run_logs_dir.mkdir()
+                return run_data_dir, run_logs_dir
+            except FileExistsError:
+                run_data_dir.rmdir()
+        except FileExistsError:
+            pass
+        suffix += 1
+        name = f'{run_name}-{suffix}'
+
+
+def find_latest_checkpoint(project_dir):
+    """
+    Find the latest checkpoint of the most recently updated run in a project
+    directory.
+
+    Parameters
+    ----------
+    project_dir : str
+        Project directory, containing run directories under ``data/``.
+
+    Returns
+    -------
+    dataset_fn : Path or None
+        Filename of the latest dataset, or None if there are none.
+    """
+    run_dirs = [run_dir for run_dir in (Path(project_dir) / 'data').glob('*')
+                if run_dir.is_dir() and len(find_datasets(run_dir)) > 0]
+    if len(run_dirs) == 0:
+        return None
+    run_dir = max(run_dirs, key=lambda run_dir: run_dir.stat().st_mtime)
+    return find_datasets(run_dir)[-1]
 
 
 class NPEncoder(json.JSONEncoder):
@@ -146,4 +1148,26 @@ class NPEncoder(json.JSONEncoder):
         elif isinstance(obj, np.ndarray):
             return obj.tolist()
         else:
-            return super().default(obj)
\ No newline at end of file
+            return super().default(obj)
+
+
+@click.command(name='convert')
+@click.argument('data_dir', type=click.Path(exists=True, file_okay=False))
+@click.argument('out_dir', type=click.Path(file_okay=False))
+@click.option('-z', '--compression',
+              type=click.Choice(list(cmp.codecs)),
+              help='Compress the converted datasets')
+@click.option('--compression-level', type=int,
+              help='Compression level')
+@click.option('--batch-size', type=int, default=10000,
+              help='Number of organisms to decode at a time')
+def convert_run_command(data_dir, out_dir, compression=None,
+                        compression_level=None, batch_size=10000):
+    """
+    Convert the JSON datasets of a run to the npz format.
+    """
+    out_fns = convert_run(data_dir, out_dir,
+                          compression=compression,
+                          level=compression_level,
+                          batch_size=batch_size)
+    print(f'Converted {len(out_fns)} datasets to {out_dir}')
@@ -52,3 +52,31 @@ species_fields = {'species_name': 'species1',
 # Combine organism and species field names
 organism_fields = dict(specific_organism_fields,
                        **species_fields)
+
+
+# NumPy dtypes used when organisms are stored column-wise, as in
+# blossom.simulation.population_store. Fields that are not listed here, or
+# whose values don't fit the given dtype, are kept in object columns. Missing
+# (None) values in float columns are stored as NaN.
+organism_field_dtypes = {'organism_id': 'int64',
+                         'age': 'int64',
+                         'alive': 'bool',
+                         'age_at_death': 'float64',
+                         'location': 'int64',
+                         'water_current': 'float64',
+                         'time_without_water': 'int64',
+                         'food_current': 'float64',
+                         'time_without_food': 'int64',
+                         'dna_length': 'int64',
+                         'max_age': 'float64',
+                         'max_time_without_food': 'float64',
+                         'max_time_without_water': 'float64',
+                         'mutation_rate': 'float64',
+                         'food_capacity': 'float64',
+                         'food_initial': 'float64',
+                         'food_metabolism': 'float64',
+                         'food_intake': 'float64',
+                         'water_capacity': 'float64',
+                         'water_initial': 'float64',
+                         'water_metabolism': 'float64',
+                         'water_intake': 'float64'}
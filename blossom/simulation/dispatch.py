@@ -0,0 +1,169 @@
+"""
+Per-species dispatch tables for organism behaviors.
+
+The callables for ``movement_type``, ``reproduction_type``, ``drinking_type``,
+``eating_type`` and ``action_type`` are looked up once per species, first in
+the linked custom modules and then in the built-in behavior modules, so that
+calling a behavior during a step is a direct function call. Names that can't
+be resolved raise an error when the species is loaded.
+
+Behaviors may also have a vectorized form, which handles many organisms of a
+species at once. The vectorized form of a method ``name`` is the function
+``name_vectorized`` defined in the same module as the method itself, so a
+custom method never picks up a built-in kernel of the same name.
+"""
+
+from . import module_registry
+from .utils import cast_to_list
+from .organism_behavior import movement, reproduction, drinking, eating, action
+
+
+# Built-in behavior modules searched after the custom modules
+behavior_modules = {'movement_type': movement,
+                    'reproduction_type': reproduction,
+                    'drinking_type': drinking,
+                    'eating_type': eating,
+                    'action_type': action}
+
+_tables = {}
+
+
+def _find_module(field, name, custom_modules=[]):
+    """
+    Find the module providing the behavior method with a given name.
+    """
+    for custom_module in custom_modules:
+        if callable(getattr(custom_module, name, None)):
+            return custom_module
+    method = getattr(behavior_modules[field], name, None)
+    if callable(method) and not isinstance(method, type):
+        return behavior_modules[field]
+    raise ValueError(
+        f'Invalid {field} \'{name}\': no such method in the linked custom '
+        f'modules or in the built-in {behavior_modules[field].__name__} '
+        f'methods.'
+    )
+
+
+def resolve(field, name, custom_modules=[]):
+    """
+    Find the behavior method with a given name.
+
+    Parameters
+    ----------
+    field : str
+        Behavior field, e.g. 'movement_type'.
+    name : str
+        Name of the behavior method.
+    custom_modules : list of modules
+        Custom modules, searched in order before the built-in module.
+
+    Returns
+    -------
+    method : callable
+        Behavior method.
+    """
+    return getattr(_find_module(field, name, custom_modules), name)
+
+
+def resolve_vectorized(field, name, custom_modules=[]):
+    """
+    Find the vectorized form of the behavior method with a given name.
+
+    Parameters
+    ----------
+    field : str
+        Behavior field, e.g. 'movement_type'.
+    name : str
+        Name of the behavior method.
+    custom_modules : list of modules
+        Custom modules, searched in order before the built-in module.
+
+    Returns
+    -------
+    method : callable or None
+        Vectorized behavior method, or None if the module providing the
+        method doesn't define one.
+    """
+    module = _find_module(field, name, custom_modules)
+    method = getattr(module, f'{name}_vectorized', None)
+    if callable(method):
+        return method
+    return None
+
+
+class DispatchTable(object):
+    """
+    Resolved behavior methods for a single species.
+    """
+
+    def __init__(self, types, custom_module_fns=None):
+        """
+        Parameters
+        ----------
+        types : dict
+            Mapping of behavior fields (e.g. 'movement_type') to method names,
+            or None if the species doesn't have that behavior.
+        custom_module_fns : list of str, optional
+            Filenames of linked custom modules.
+        """
+        self.custom_modules = module_registry.load_modules(custom_module_fns)
+        self.methods = {}
+        self.vectorized = {}
+        for field in behavior_modules:
+            name = types.get(field)
+            if name is None:
+                self.methods[field] = None
+                self.vectorized[field] = None
+            else:
+                self.methods[field] = resolve(field,
+                                              name,
+                                              self.custom_modules)
+                self.vectorized[field] = resolve_vectorized(
+                    field,
+                    name,
+                    self.custom_modules
+                )
+
+    def __getitem__(self, field):
+        return self.methods[field]
+
+
+def get_table(fields):
+    """
+    Get the (cached) dispatch table for a species or organism. Tables are
+    cached by behavior names and custom module filenames, and rebuilt when
+    the module registry has reloaded one of the custom modules since, e.g.
+    after the file was edited.
+
+    Parameters
+    ----------
+    fields : dict
+        Species or organism parameters, containing the behavior fields and
+        optionally 'custom_module_fns'.
+
+    Returns
+    -------
+    table : DispatchTable
+        Dispatch table for the species.
+    """
+    custom_module_fns = fields.get('custom_module_fns')
+    if custom_module_fns is not None:
+        custom_module_fns = cast_to_list(custom_module_fns)
+    key = (tuple(fields.get(field) for field in behavior_modules),
+           None if custom_module_fns is None else tuple(custom_module_fns))
+    table = _tables.get(key)
+    if (table is None
+            or table.custom_modules
+            != module_registry.load_modules(custom_module_fns)):
+        table = DispatchTable(fields, custom_module_fns)
+        _tables[key] = table
+    return table
+
+
+def clear():
+    """
+    Clear cached dispatch tables and loaded custom modules.
+    """
+    _tables.clear()
+    module_registry.clear()
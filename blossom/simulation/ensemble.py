@@ -0,0 +1,292 @@
+"""
+Ensembles of runs of a single config over many random seeds.
+
+Each replicate is a separate universe, run in a pool of worker processes,
+with at most ``max_workers`` runs at a time. Replicates share a project
+directory, where each gets its own run directories under ``data/`` and
+``logs/``. Once all runs are done, the species counts at every time step of
+every replicate are gathered from the run logs into a single summary table,
+with one row per replicate, time step and species. Failed runs don't stop the
+ensemble, and are recorded in the summary with their error.
+"""
+
+import io
+import os
+import csv
+import datetime
+import contextlib
+import concurrent.futures
+from pathlib import Path
+import click
+import yaml
+
+from . import run_log
+from .universe import Universe, find_config, universe_options
+
+
+# Columns of the summary table
+summary_fields = ['seed', 'run', 'status', 'timestep', 'species',
+                  'alive', 'dead', 'total', 'error']
+
+
+def run_replicate(config, project_dir, seed, options, run_name=None,
+                  dataset_fn=None):
+    """
+    Run a single replicate of an ensemble. Runs in a worker process, without
+    printing progress.
+
+    Parameters
+    ----------
+    config : str or dict
+        Config filename, or contents of a config file.
+    project_dir : str
+        Project directory of the ensemble.
+    seed : int
+        Random seed of the replicate.
+    options : dict
+        Keyword arguments for Universe.
+    run_name : str, optional
+        Name of the run's directories.
+    dataset_fn : str, optional
+        Checkpoint to resume the run from, instead of starting it from the
+        config.
+
+    Returns
+    -------
+    result : dict
+        Seed, run name (the name of its directories), status ('completed',
+        'failed', or the reason the run stopped early, e.g. 'organism_limit'
+        if it exceeded the organism limit), last time step and error message,
+        if any.
+    """
+    result = {'seed': seed, 'run': None, 'status': 'failed',
+              'timestep': None, 'error': None}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if dataset_fn is not None:
+                # The random state is restored from the checkpoint
+                init_kwargs = {'dataset_fn': dataset_fn, 'seed': None}
+            elif isinstance(config, dict):
+                init_kwargs = {'config_dict': config, 'seed': seed}
+            else:
+                init_kwargs = {'config_fn': config, 'seed': seed}
+            universe = Universe(**init_kwargs,
+                                project_dir=project_dir,
+                                run_name=run_name,
+                                **options)
+            result['run'] = universe.run_data_dir.name
+            universe.run(verbosity=0)
+        result['timestep'] = universe.current_time
+        result['status'] = universe.stop_reason or 'completed'
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    return result
+
+
+def run_replicates(tasks, max_workers=None, callback=None):
+    """
+    Run replicates in a pool of worker processes.
+
+    Parameters
+    ----------
+    tasks : list of tuple
+        Arguments of :func:`run_replicate` for each replicate.
+    max_workers : int, optional
+        Maximum number of runs at a time. Defaults to the number of CPUs.
+        With a single worker, runs are done in the current process.
+    callback : callable, optional
+        Called with the index of each task and its result, as runs end.
+
+    Returns
+    -------
+    results : list of dict
+        Results of the replicates, in the order of the tasks.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    if max_workers < 1:
+        raise ValueError('max_workers must be at least 1')
+    results = [None] * len(tasks)
+    if max_workers == 1:
+        for i, task in enumerate(tasks):
+            results[i] = run_replicate(*task)
+            if callback is not None:
+                callback(i, results[i])
+        return results
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        futures = {executor.submit(run_replicate, *task): i
+                   for i, task in enumerate(tasks)}
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if callback is not None:
+                callback(i, results[i])
+    return results
+
+
+def report(result):
+    """
+    Print a line about the end of a run.
+    """
+    message = (f'Seed {result["seed"]}: {result["status"]}'
+               + (f' at t = {result["timestep"]}'
+                  if result['timestep'] is not None else '')
+               + (f' ({result["run"]})'
+                  if result['run'] is not None else ''))
+    if result['error'] is not None:
+        message += f': {result["error"]}'
+    print(message)
+
+
+def summarize(project_dir, results):
+    """
+    Gather the species counts at every time step of an ensemble's replicates
+    from their run logs.
+
+    Parameters
+    ----------
+    project_dir : str
+        Project directory of the ensemble.
+    results : list of dict
+        Results of the replicates, from :func:`run_replicate`.
+
+    Returns
+    -------
+    rows : list of dict
+        Rows of the summary table, with the columns in
+        :data:`summary_fields`. Replicates that logged nothing get a single
+        row, without counts.
+    """
+    project_dir = Path(project_dir)
+    rows = []
+    for result in results:
+        replicate = {'seed': result['seed'],
+                     'run': result['run'],
+                     'status': result['status'],
+                     'error': result['error']}
+        records = []
+        if result['run'] is not None:
+            log_fn = run_log.find_log(project_dir / 'logs' / result['run'],
+                                      project_dir.name)
+            records, _ = run_log.read(log_fn)
+        for record in records:
+            for species, statistics in sorted(record['species'].items()):
+                rows.append(dict(replicate,
+                                 timestep=record['world']['timestep'],
+                                 species=species,
+                                 **{field: statistics[field]
+                                    for field in ['alive', 'dead', 'total']}))
+        if len(records) == 0:
+            rows.append(replicate)
+    return rows
+
+
+def write_summary(fn, rows):
+    """
+    Write the summary table of an ensemble to a CSV file.
+    """
+    with open(fn, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=summary_fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_ensemble(config_fn, seeds, project_dir=None, max_workers=None,
+                 summary_fn=None, verbose=True, **options):
+    """
+    Run a config with many seeds, in a pool of worker processes, and write a
+    summary table of the species counts of all replicates.
+
+    Parameters
+    ----------
+    config_fn : str
+        Config filename.
+    seeds : int or list of int
+        Random seeds of the replicates, or the number of replicates, which
+        then use seeds 0 to seeds - 1.
+    project_dir : str, optional
+        Project directory of the ensemble. Defaults to the directory of the
+        config file.
+    max_workers : int, optional
+        Maximum number of runs at a time. Defaults to the number of CPUs.
+        With a single worker, runs are done in the current process.
+    summary_fn : str, optional
+        Filename of the summary table. Defaults to a timestamped CSV file in
+        the project directory.
+    verbose : bool
+        Whether to print a line as each run ends.
+    **options
+        Universe options for the options that the config file doesn't set,
+        as for ``blossom run``.
+
+    Returns
+    -------
+    results : list of dict
+        Results of the replicates, in the order of the seeds.
+    summary_fn : Path
+        Filename of the summary table.
+    """
+    config_fn = Path(config_fn).resolve()
+    if project_dir is None:
+        project_dir = config_fn.parent
+    project_dir = Path(project_dir).resolve()
+    if isinstance(seeds, int):
+        seeds = list(range(seeds))
+    if len(set(seeds)) != len(seeds):
+        raise ValueError('Seeds must be unique')
+    if summary_fn is None:
+        datestring = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        summary_fn = project_dir / f'ensemble-{datestring}.csv'
+    summary_fn = Path(summary_fn)
+
+    with open(config_fn, 'r') as f:
+        cfg = yaml.load(f, Loader=yaml.FullLoader)
+    options = universe_options(cfg, **options)
+
+    results = run_replicates(
+        [(config_fn, project_dir, seed, options) for seed in seeds],
+        max_workers=max_workers,
+        callback=(lambda i, result: report(result)) if verbose else None
+    )
+
+    write_summary(summary_fn, summarize(project_dir, results))
+    return results, summary_fn
+
+
+@click.command(name='ensemble')
+@click.option('-n', '--runs', type=int, default=10,
+              help='Number of replicates')
+@click.option('-s', '--seed', type=int, default=0,
+              help='Seed of the first replicate; the others use the next '
+                   'seeds')
+@click.option('-j', '--max-workers', type=int,
+              help='Maximum number of runs at a time (default: number of '
+                   'CPUs)')
+@click.option('-o', '--output', type=click.Path(),
+              help='Filename of the summary table (CSV)')
+@click.option('-t', '--timesteps', default=1000,
+              help='Max timestep')
+@click.option('-l', '--organism_limit', type=int,
+              help='Max number of organisms')
+@click.option('-e', '--engine',
+              type=click.Choice(['object', 'columnar', 'parallel']),
+              default='object',
+              help='Population engine')
+def run_ensemble_command(runs=10, seed=0, max_workers=None, output=None,
+                         timesteps=1000, organism_limit=None,
+                         engine='object'):
+    """
+    Run the config file in the current directory with many seeds.
+    """
+    project_dir = Path('.').resolve()
+    results, summary_fn = run_ensemble(find_config(project_dir),
+                                       seeds=list(range(seed, seed + runs)),
+                                       project_dir=project_dir,
+                                       max_workers=max_workers,
+                                       summary_fn=output,
+                                       timesteps=timesteps,
+                                       organism_limit=organism_limit,
+                                       engine=engine)
+    failed = sum(result['status'] == 'failed' for result in results)
+    print(f'{len(results) - failed} of {len(results)} runs succeeded; '
+          f'summary saved to {summary_fn}')
@@ -0,0 +1,157 @@
+"""
+Allocation of organism IDs.
+
+Each universe numbers its organisms with consecutive integers, starting from
+zero, so IDs are cheap to hash and store and are reproducible for a given
+seed. The next free ID is saved along with the universe, so that a resumed
+simulation continues the same sequence. UUID strings can still be derived
+from the integer IDs for export, and mapped back to them.
+"""
+
+import uuid
+import hashlib
+import numpy as np
+
+
+class IDAllocator(object):
+    """
+    Monotonic int64 organism ID allocator for a single universe.
+    """
+
+    def __init__(self, next_id=0, seed=None):
+        """
+        Parameters
+        ----------
+        next_id : int
+            Next ID to be allocated.
+        seed : int, optional
+            Initial seed of the universe, which is mixed into exported UUIDs
+            so that different runs don't share them.
+        """
+        self.next_id = int(next_id)
+        self.seed = seed
+        # First 8 bytes of exported UUIDs, with the UUID version bits set
+        tag = bytearray(hashlib.blake2b(f'{seed}'.encode(),
+                                        digest_size=8).digest())
+        tag[6] = (tag[6] & 0x0f) | 0x40
+        self._uuid_tag = bytes(tag)
+
+    def new_id(self):
+        """
+        Allocate a single ID.
+
+        Returns
+        -------
+        organism_id : int
+            New organism ID.
+        """
+        organism_id = self.next_id
+        self.next_id += 1
+        return organism_id
+
+    def new_ids(self, n):
+        """
+        Allocate n consecutive IDs.
+
+        Returns
+        -------
+        organism_ids : np.ndarray
+            New organism IDs, as an int64 array.
+        """
+        organism_ids = np.arange(self.next_id, self.next_id + n, dtype=np.int64)
+        self.next_id += n
+        return organism_ids
+
+    def assign(self, organisms):
+        """
+        Give new IDs, in order, to organisms that don't have one yet, such as
+        children created without an allocator.
+        """
+        for organism in organisms:
+            if organism.organism_id is None:
+                organism.organism_id = self.new_id()
+
+    def reserve(self, organism_ids):
+        """
+        Make sure that IDs already in use (e.g. when loading a saved
+        population) are never allocated again. Non-integer IDs, such as UUID
+        strings from older datasets, are ignored.
+        """
+        for organism_id in organism_ids:
+            if isinstance(organism_id, (int, np.integer)):
+                self.next_id = max(self.next_id, int(organism_id) + 1)
+
+    def to_uuid(self, organism_id):
+        """
+        Get the UUID string for export corresponding to an organism ID.
+        Values that aren't integer IDs are returned unchanged.
+
+        The UUID holds a tag derived from the allocator's seed followed by
+        the integer ID itself, so that it can be mapped back to the ID
+        directly (see :meth:`from_uuid`).
+        """
+        if not isinstance(organism_id, (int, np.integer)):
+            return organism_id
+        organism_id = int(organism_id)
+        if not 0 <= organism_id < 2**62:
+            raise ValueError(f'Organism ID out of range for UUID export: '
+                             f'{organism_id}')
+        # The top two bits of the ID's bytes hold the UUID variant
+        return str(uuid.UUID(bytes=self._uuid_tag
+                             + (organism_id | 2**63).to_bytes(8, 'big')))
+    def ancestry_to_uuid(self, ancestry):
+        """
+        Convert an ancestry list, whose entries are single parent IDs or
+        lists of two parent IDs, to UUID strings.
+        """
+        return [
+            [self.to_uuid(parent_id) for parent_id in entry]
+            if isinstance(entry, list) else self.to_uuid(entry)
+            for entry in ancestry
+        ]
+
+    def from_uuid(self, organism_uuid):
+        """
+        Get the integer ID from which an exported UUID string was derived.
+
+        Parameters
+        ----------
+        organism_uuid : str
+            UUID string.
+
+        Returns
+        -------
+        organism_id : int or None
+            Integer ID, or None if the UUID wasn't derived from an ID by an
+            allocator with this seed, e.g. the random UUIDs of older datasets.
+        """
+        try:
+            organism_bytes = uuid.UUID(organism_uuid).bytes
+        except (TypeError, ValueError):
+            return None
+        if organism_bytes[:8] != self._uuid_tag:
+            return None
+        return int.from_bytes(organism_bytes[8:], 'big') & (2**62 - 1)
+
+    def from_uuids(self, uuids):
+        """
+        Find the integer IDs from which exported UUID strings were derived,
+        e.g. to resume a run from a dataset saved with ``export_uuids``. UUIDs
+        that weren't derived from this allocator's IDs are left out.
+
+        Parameters
+        ----------
+        uuids : iterable of str
+            UUID strings to look up.
+
+        Returns
+        -------
+        lookup : dict
+            Integer ID of each UUID string found.
+        """
+        lookup = {}
+        for organism_uuid in uuids:
+            organism_id = self.from_uuid(organism_uuid)
+            if organism_id is not None:
+                lookup[organism_uuid] = organism_id
+        return lookup
@@ -0,0 +1,147 @@
+"""
+Versioned, memory-mapped storage of world grids.
+
+With a LayerStore, each world layer (water, food, obstacles) is kept as a
+``.npy`` file under ``world/`` in the run's data directory, and the world
+works on a copy-on-write memory map of it. Checkpoints reference layers by
+filename instead of containing them. A new version of a layer is only
+written when it changed since it was saved, so layers that never change
+(such as obstacles) are stored once per run.
+
+Layers are compared with their saved version at every checkpoint, so edits
+made in place by any behavior are saved. Behaviors that know they changed a
+layer can mark it with ``World.mark_changed``, as the built-in drinking and
+eating behaviors do, which saves it without comparing.
+"""
+
+import re
+from pathlib import Path
+import numpy as np
+
+
+# World fields holding grids
+world_layers = ['water', 'food', 'obstacles']
+
+
+def load_layer(data_dir, reference):
+    """
+    Open a layer referenced by a dataset as a copy-on-write memory map.
+
+    Parameters
+    ----------
+    data_dir : str
+        Directory of the dataset.
+    reference : dict
+        Layer reference, as saved in the dataset.
+
+    Returns
+    -------
+    layer : np.memmap
+        Layer grid. Changes are kept in memory and never written back.
+    """
+    return np.load(Path(data_dir) / reference['layer'], mmap_mode='c')
+
+
+def is_reference(value):
+    """
+    Whether a saved world field is a reference to a layer file.
+    """
+    return isinstance(value, dict) and 'layer' in value
+
+
+class LayerStore(object):
+    """
+    Versioned layer files of a single run.
+    """
+
+    def __init__(self, run_data_dir, world=None):
+        """
+        Parameters
+        ----------
+        run_data_dir : str
+            Data directory of the run. Layers are stored in its ``world``
+            subdirectory.
+        world : World, optional
+            World loaded from a checkpoint of the run, whose layers are still
+            the memory maps of its saved files.
+        """
+        self.run_data_dir = Path(run_data_dir).resolve()
+        self.layer_dir = self.run_data_dir / 'world'
+        self.layer_dir.mkdir(parents=True, exist_ok=True)
+        self.sources = {}
+        self.next_versions = {}
+        for fn in self.layer_dir.glob('*.npy'):
+            match = re.fullmatch(r'(.+)\.v(\d+)\.npy', fn.name)
+            if match is not None:
+                name, version = match.group(1), int(match.group(2))
+                self.next_versions[name] = max(
+                    self.next_versions.get(name, 0),
+                    version + 1
+                )
+        if world is not None:
+            for name in world_layers:
+                if getattr(world, name, None) is not None:
+                    self._source(world, name)
+
+    def _source(self, world, name):
+        """
+        File currently backing a world layer, if any. Layers loaded from
+        this run's files (e.g. when resuming) are picked up from their memory
+        maps, unless they were replaced since (e.g. by shared memory).
+        """
+        layer = getattr(world, name)
+        filename = getattr(layer, 'filename', None)
+        if (filename is not None
+                and Path(filename).resolve().parent == self.layer_dir):
+            self.sources.setdefault(name, Path(filename).resolve())
+        return self.sources.get(name)
+
+    def _changed(self, layer, source):
+        saved = np.load(source, mmap_mode='r')
+        if saved.shape != layer.shape or saved.dtype != layer.dtype:
+            return True
+        return not np.array_equal(saved, layer,
+                                  equal_nan=layer.dtype.kind == 'f')
+
+    def commit(self, world):
+        """
+        Save new versions of the world layers that changed since they were
+        last saved, and switch the world to memory maps of the saved files.
+
+        Parameters
+        ----------
+        world : World
+            World whose layers to save.
+
+        Returns
+        -------
+        references : dict
+            Layer references to store in datasets, keyed by field name.
+        """
+        references = {}
+        changed_layers = getattr(world, '_changed_layers', None)
+        for name in world_layers:
+            layer = getattr(world, name, None)
+            if layer is None:
+                continue
+            source = self._source(world, name)
+            if source is None:
+                changed = True
+            elif changed_layers is not None and name in changed_layers:
+                changed = True
+            else:
+                changed = self._changed(np.asarray(layer), source)
+            if changed:
+                version = self.next_versions.get(name, 0)
+                self.next_versions[name] = version + 1
+                source = self.layer_dir / f'{name}.v{version}.npy'
+                np.save(source, np.asarray(layer))
+                self.sources[name] = source
+                # Pages are only copied into memory once they are modified
+                setattr(world, name, np.load(source, mmap_mode='c'))
+            references[name] = {
+                'layer': source.relative_to(self.run_data_dir).as_posix()
+            }
+        if changed_layers is not None:
+            changed_layers.clear()
+        return references
@@ -0,0 +1,112 @@
+"""
+Process-wide registry of custom behavior modules.
+
+Custom modules (``linked_modules`` in the config file) are loaded once per
+process and shared by every organism that links to them, instead of being
+re-executed whenever an Organism is constructed. Modules are keyed by their
+resolved path and modification time, so that editing a module between runs
+in the same process picks up the changes.
+"""
+
+import os
+import sys
+import hashlib
+import importlib.util
+
+from .utils import cast_to_list
+
+
+_modules = {}
+_resolved_paths = {}
+
+
+def module_name(path):
+    """
+    Get a stable, unique module name for a custom module path. The name only
+    depends on the resolved path, so it is the same in every process.
+
+    Parameters
+    ----------
+    path : str
+        Filename of the custom module.
+
+    Returns
+    -------
+    name : str
+        Module name, as registered in ``sys.modules``.
+    """
+    resolved = os.path.realpath(path)
+    stem = os.path.splitext(os.path.basename(resolved))[0]
+    stem = ''.join(c if c.isalnum() else '_' for c in stem)
+    digest = hashlib.sha1(resolved.encode('utf-8')).hexdigest()[:10]
+    return f'blossom_custom_{stem}_{digest}'
+
+
+def load_module(path):
+    """
+    Load custom module from file, or return the already loaded module if the
+    file hasn't changed since it was last loaded.
+
+    Parameters
+    ----------
+    path : str
+        Filename of the custom module.
+
+    Returns
+    -------
+    module : module
+        Loaded custom module.
+    """
+    # Relative paths are resolved against the current working directory
+    path_key = path if os.path.isabs(path) else (os.getcwd(), path)
+    resolved = _resolved_paths.get(path_key)
+    if resolved is None:
+        resolved = os.path.realpath(path)
+        _resolved_paths[path_key] = resolved
+    key = (resolved, os.stat(resolved).st_mtime_ns)
+
+    module = _modules.get(key)
+    if module is None:
+        name = module_name(resolved)
+        spec = importlib.util.spec_from_file_location(name, resolved)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+        # Drop stale versions of the same file
+        for stale_key in [k for k in _modules if k[0] == resolved]:
+            del _modules[stale_key]
+        _modules[key] = module
+    return module
+
+
+def load_modules(paths):
+    """
+    Load a list of custom modules.
+
+    Parameters
+    ----------
+    paths : str or list of str
+        Filenames of custom modules.
+
+    Returns
+    -------
+    modules : list of modules
+        Loaded custom modules, in the same order as paths.
+    """
+    if paths is None:
+        return []
+    return [load_module(path) for path in cast_to_list(paths)]
+
+
+def clear():
+    """
+    Forget all loaded modules, so that they are re-executed on next load.
+    """
+    for resolved, _ in _modules:
+        sys.modules.pop(module_name(resolved), None)
+    _modules.clear()
+    _resolved_paths.clear()
@@ -1,12 +1,23 @@
-import uuid
-import copy
-import imp
-import sys
-import numpy as np
+import operator
 
 from . import default_fields
+from . import dispatch
 from .utils import cast_to_list
-from .organism_behavior import movement, reproduction, drinking, eating, action
+
+
+# Fixed field layout of Organism instances, following default_fields. Custom
+# fields are stored in the instance __dict__.
+_fields = tuple(default_fields.organism_fields.keys())
+_get_fields = operator.attrgetter(*_fields)
+
+# Straight-line copy of every field, generated once from the field layout
+# (in the same spirit as collections.namedtuple), which is several times
+# faster than looping over setattr.
+_copy_fields_source = (
+    'def _copy_fields(source, target):\n'
+    + ''.join(f'    target.{field} = source.{field}\n' for field in _fields)
+)
+exec(_copy_fields_source)
 
 
 class Organism(object):
@@ -14,10 +25,15 @@ class Organism(object):
     A basic organism structure for all species.
     """
 
-    def __init__(self, init_dict={}, seed=None):
+    __slots__ = _fields + ('_dispatch', '_custom_modules', '__dict__')
+
+    def __init__(self, init_dict={}, seed=None, ids=None):
         """
         Create a new organism from a dictary of parameters. The dictionary
         is specified in blossom.default_fields.
+
+        If the organism has no ID yet, a new one is taken from the universe's
+        IDAllocator ``ids``, if given (see :meth:`get_new_id`).
         """
         # Set up defaults based on organism parameters
         for (field, default) in default_fields.organism_fields.items():
@@ -31,7 +47,7 @@ class Organism(object):
 
         # Set unique id for organism
         if self.organism_id is None:
-            self.organism_id = self.get_new_id(seed=seed)
+            self.organism_id = self.get_new_id(seed=seed, ids=ids)
 
         # Set current water level for uninitialized organism
         if self.drinking_type is not None and self.water_current is None:
@@ -41,29 +57,46 @@ class Organism(object):
         if self.eating_type is not None and self.food_current is None:
             self.food_current = self.food_initial
 
-        # Import custom modules / paths
-        if self.custom_module_fns is not None:
-            self._custom_modules = []
-            for i, path in enumerate(cast_to_list(self.custom_module_fns)):
-                temp_module = imp.load_source('%s' % i, path)
-                self._custom_modules.append(temp_module)
+        # Look up behavior methods, resolved once per species
+        self._dispatch = dispatch.get_table(self.to_dict())
+        self._custom_modules = self._dispatch.custom_modules
 
     def to_dict(self):
         """
         Convert Organism to dict.
         """
-        organism_vars = vars(self)
-        public_vars = {key: val
-                       for key, val in organism_vars.items()
-                       if not key.startswith('_')}
+        public_vars = dict(zip(_fields, _get_fields(self)))
+        for key, val in vars(self).items():
+            if not key.startswith('_'):
+                public_vars[key] = val
         return public_vars
 
-    def get_new_id(self, seed=None):
+    def __getstate__(self):
         """
-        Generates pseudo-random ID for the organism, seeded by the universe.
+        Pickle the organism's fields only, e.g. to send it to a worker
+        process. Behavior methods are looked up again when unpickling.
         """
-        rng = np.random.default_rng(seed)
-        return str(uuid.UUID(bytes=rng.bytes(16)))
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        for field, value in state.items():
+            setattr(self, field, value)
+        self._dispatch = dispatch.get_table(state)
+        self._custom_modules = self._dispatch.custom_modules
+
+    def get_new_id(self, seed=None, ids=None):
+        """
+        Gets a new ID for the organism: the next integer ID of the universe's
+        IDAllocator ``ids``, usually ``universe.ids``. The seed is unused, and
+        kept for compatibility.
+
+        Without an allocator, e.g. for children of custom reproduction methods
+        that call ``organism.get_child(seed=universe.rng)``, the ID is None,
+        and the universe numbers the organism at the end of the time step.
+        """
+        if ids is None:
+            return None
+        return ids.new_id()
 
     @classmethod
     def clone(cls, organism):
@@ -80,10 +113,15 @@ class Organism(object):
         new_organism : Organism
             Copied organism.
         """
-        new_organism = cls(organism.to_dict())
-        # Use copy module to properly handle mutable lists
-        new_organism.ancestry = copy.copy(new_organism.ancestry)
-        new_organism.location = copy.copy(new_organism.location)
+        # Copy the fixed field layout directly instead of re-running
+        # __init__; only the mutable lists need new objects
+        new_organism = object.__new__(cls)
+        _copy_fields(organism, new_organism)
+        new_organism.__dict__.update(vars(organism))
+        new_organism.ancestry = list(organism.ancestry)
+        new_organism.location = list(organism.location)
+        new_organism._dispatch = organism._dispatch
+        new_organism._custom_modules = organism._custom_modules
         return new_organism
 
     def clone_self(self):
@@ -92,7 +130,7 @@ class Organism(object):
         """
         return self.clone(self)
 
-    def get_child(self, other_parent=None, seed=None):
+    def get_child(self, other_parent=None, seed=None, ids=None):
         """
         Creates an Organism object with similar properties to self, and can
         add another parent if it exists. Note that this doesn't assume
@@ -103,6 +141,12 @@ class Organism(object):
         ----------
         other_parent : Organism
             Parent that reproduces with self to produce the child.
+        seed : int, Generator, optional
+            Random seed. Unused, and kept for compatibility.
+        ids : IDAllocator, optional
+            ID allocator of the universe, usually ``universe.ids``. Children
+            created without one are numbered by the universe at the end of
+            the time step.
 
         Returns
         -------
@@ -111,7 +155,7 @@ class Organism(object):
         """
         child = self.clone_self()
         child.age = 0
-        child.organism_id = child.get_new_id(seed=seed)
+        child.organism_id = child.get_new_id(seed=seed, ids=ids)
         if other_parent is None:
             child.ancestry.append(self.organism_id)
         else:
@@ -163,8 +207,8 @@ class Organism(object):
 
     def move(self, universe):
         """
-        Method for handling movement. Searches through custom methods and
-        built-in movement methods.
+        Method for handling movement. Calls the movement method resolved
+        for this species.
 
         Parameters
         ----------
@@ -176,32 +220,15 @@ class Organism(object):
         affected_organisms : Organisms, or list of Organisms
             Organism or list of organisms affected by this organism's movement.
         """
-        try:
-            if self.movement_type is None:
-                raise ValueError('No movement type defined!')
-            elif self.custom_module_fns is not None:
-                for custom_module in self._custom_modules:
-                    if hasattr(custom_module, self.movement_type):
-                        return getattr(custom_module, self.movement_type)(
-                            self,
-                            universe
-                        )
-            return getattr(movement, self.movement_type)(
-                self,
-                universe
-            )
-        except AttributeError as e:
-            raise AttributeError(
-                str(e)
-                + '. Check that \'%s\' method is indeed ' % self.movement_type
-                + 'contained within the provided custom modules and that the '
-                + 'method is written correctly.'
-            ).with_traceback(sys.exc_info()[2])
+        method = self._dispatch['movement_type']
+        if method is None:
+            raise ValueError('No movement type defined!')
+        return method(self, universe)
 
     def reproduce(self, universe):
         """
-        Method for handling reproduction. Searches through custom methods
-        and built-in reproduction methods.
+        Method for handling reproduction. Calls the reproduction method
+        resolved for this species.
 
         Parameters
         ----------
@@ -216,32 +243,15 @@ class Organism(object):
             child organisms.
 
         """
-        try:
-            if self.reproduction_type is None:
-                raise ValueError('No reproduction type defined!')
-            elif self.custom_module_fns is not None:
-                for custom_module in self._custom_modules:
-                    if hasattr(custom_module, self.reproduction_type):
-                        return getattr(custom_module, self.reproduction_type)(
-                            self,
-                            universe
-                        )
-            return getattr(reproduction, self.reproduction_type)(
-                self,
-                universe
-            )
-        except AttributeError as e:
-            raise AttributeError(
-                str(e) + '. Check '
-                + 'that \'%s\' method is indeed ' % self.reproduction_type
-                + 'contained within the provided custom modules and that the '
-                + 'method is written correctly.'
-            ).with_traceback(sys.exc_info()[2])
+        method = self._dispatch['reproduction_type']
+        if method is None:
+            raise ValueError('No reproduction type defined!')
+        return method(self, universe)
 
     def drink(self, universe):
         """
-        Method for handling drinking. Searches through custom methods and
-        built-in drinking methods.
+        Method for handling drinking. Calls the drinking method resolved
+        for this species.
 
         Parameters
         ----------
@@ -254,32 +264,15 @@ class Organism(object):
             Organism or list of organisms affected by this organism's drinking.
 
         """
-        try:
-            if self.drinking_type is None:
-                raise ValueError('No drinking type defined!')
-            elif self.custom_module_fns is not None:
-                for custom_module in self._custom_modules:
-                    if hasattr(custom_module, self.drinking_type):
-                        return getattr(custom_module, self.drinking_type)(
-                            self,
-                            universe
-                        )
-            return getattr(drinking, self.drinking_type)(
-                self,
-                universe
-            )
-        except AttributeError as e:
-            raise AttributeError(
-                str(e)
-                + '. Check that \'%s\' method is indeed ' % self.drinking_type
-                + 'contained within the provided custom modules and that the '
-                + 'method is written correctly.'
-            ).with_traceback(sys.exc_info()[2])
+        method = self._dispatch['drinking_type']
+        if method is None:
+            raise ValueError('No drinking type defined!')
+        return method(self, universe)
 
     def eat(self, universe):
         """
-        Method for handling eating. Searches through custom methods and
-        built-in eating methods.
+        Method for handling eating. Calls the eating method resolved for
+        this species.
 
         Parameters
         ----------
@@ -292,32 +285,14 @@ class Organism(object):
             Organism or list of organisms affected by this organism's eating.
 
         """
-        try:
-            if self.eating_type is None:
-                raise ValueError('No eating type defined!')
-            elif self.custom_module_fns is not None:
-                for custom_module in self._custom_modules:
-                    if hasattr(custom_module, self.eating_type):
-                        return getattr(custom_module, self.eating_type)(
-                            self,
-                            universe
-                        )
-            return getattr(eating, self.eating_type)(
-                self,
-                universe
-            )
-        except AttributeError as e:
-            raise AttributeError(
-                str(e)
-                + '. Check that \'%s\' method is indeed ' % self.eating_type
-                + 'contained within the provided custom modules and that the '
-                + 'method is written correctly.'
-            ).with_traceback(sys.exc_info()[2])
+        method = self._dispatch['eating_type']
+        if method is None:
+            raise ValueError('No eating type defined!')
+        return method(self, universe)
 
-    def act(self, universe):
+    def act(self, universe, action_name=None):
         """
         Method that decides and calls an action for the current timestep.
-        Searches through custom methods and built-in movement methods.
         The action method specifically selects an action to take, from "move",
         "reproduce", "drink", and "eat". Then the appropriate instance method
         from this class is executed to yield the final list of affect
@@ -327,6 +302,9 @@ class Organism(object):
         ----------
         universe : Universe
             Universe containing organism
+        action_name : str, optional
+            Action to take. If None, the action is chosen with
+            :meth:`choose_action`.
 
         Returns
         -------
@@ -334,27 +312,8 @@ class Organism(object):
             Organism or list of organisms affected by this organism's action.
 
         """
-        action_name = None
-        try:
-            if self.custom_module_fns is not None:
-                for custom_module in self._custom_modules:
-                    if hasattr(custom_module, self.action_type):
-                        action_name = getattr(custom_module, self.action_type)(
-                            self,
-                            universe
-                        )
-            if action_name is None:
-                action_name = getattr(action, self.action_type)(
-                    self,
-                    universe
-                )
-        except AttributeError as e:
-            raise AttributeError(
-                str(e)
-                + '. Check that \'%s\' method is indeed ' % self.action_type
-                + 'contained within the provided custom modules and that the '
-                + 'method is written correctly.'
-            ).with_traceback(sys.exc_info()[2])
+        if action_name is None:
+            action_name = self.choose_action(universe)
 
         self.last_action = action_name
 
@@ -374,6 +333,26 @@ class Organism(object):
 
         return self, affected_organisms
 
+    def choose_action(self, universe):
+        """
+        Calls the action method resolved for this species, which selects an
+        action to take, such as "move", "reproduce", "drink", or "eat".
+
+        Parameters
+        ----------
+        universe : Universe
+            Universe containing organism
+
+        Returns
+        -------
+        action_name : str
+            Name of the selected action.
+        """
+        method = self._dispatch['action_type']
+        if method is None:
+            raise ValueError('No action type defined!')
+        return method(self, universe)
+
     def _update_age(self):
         """
         Increments age by 1.
@@ -476,7 +455,7 @@ class Organism(object):
                                                              original=original)
         return updated_organism
 
-    def step(self, universe, do_action=True):
+    def step(self, universe, do_action=True, action_name=None):
         """
         Steps through one time step for this organism. Reflects changes
         based on actions / behaviors and updates to health parameters.
@@ -490,6 +469,9 @@ class Organism(object):
             Universe containing organism
         do_action: bool
             If True, this organism will act, otherwise, it will not.
+        action_name : str, optional
+            Action to take, if already chosen. If None, the action is chosen
+            by the species' action method.
 
         Returns
         -------
@@ -510,7 +492,10 @@ class Organism(object):
             return [organism.die('old_age')]
 
         if do_action:
-            organism, affected_organisms = organism.act(universe)
+            organism, affected_organisms = organism.act(
+                universe,
+                action_name=action_name
+            )
         else:
             affected_organisms = [organism]
 
@@ -1,3 +1,22 @@
+"""
+Built-in action methods, which select the action an organism takes.
+
+Each method also has a vectorized form, ``<name>_vectorized``, that selects
+actions for many organisms of a species at once and returns an array of
+action codes, i.e. indices into :data:`actions`. Custom modules can opt in
+the same way: if a module defining an action method ``name`` also defines
+``name_vectorized(species_columns, rows, universe)``, the columnar engine
+calls it once per species instead of calling ``name`` per organism. It may
+return either action codes or an array of action names.
+"""
+import numpy as np
+
+
+# Built-in actions, indexed by action code
+actions = ['move', 'reproduce', 'drink', 'eat']
+MOVE, REPRODUCE, DRINK, EAT = range(len(actions))
+
+
 def move_only(organism, universe):
     """
     Only move.
@@ -27,3 +46,49 @@ def move_reproduce_drink(organism, universe):
     """
     return universe.rng.choice(['reproduce', 'drink', 'move'], 
                                p=[1/8, 3/8, 1/2])
+
+
+def move_only_vectorized(species_columns, rows, universe):
+    """
+    Vectorized form of :func:`move_only`.
+
+    Parameters
+    ----------
+    species_columns : SpeciesColumns
+        Columns of the species acting
+    rows : np.ndarray
+        Rows of the organisms choosing an action
+    universe : Universe
+        Universe containing organisms
+
+    Returns
+    -------
+    codes : np.ndarray
+        Action code per organism
+    """
+    return np.full(len(rows), MOVE)
+
+
+def move_and_reproduce_vectorized(species_columns, rows, universe):
+    """
+    Vectorized form of :func:`move_and_reproduce`.
+    """
+    return universe.rng.choice([REPRODUCE, MOVE],
+                               size=len(rows),
+                               p=[1/8, 7/8])
+
+
+def move_and_drink_vectorized(species_columns, rows, universe):
+    """
+    Vectorized form of :func:`move_and_drink`.
+    """
+    return universe.rng.choice([DRINK, MOVE], size=len(rows))
+
+
+def move_reproduce_drink_vectorized(species_columns, rows, universe):
+    """
+    Vectorized form of :func:`move_reproduce_drink`.
+    """
+    return universe.rng.choice([REPRODUCE, DRINK, MOVE],
+                               size=len(rows),
+                               p=[1/8, 3/8, 1/2])
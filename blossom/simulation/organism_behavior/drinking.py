@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def constant_drink(organism, universe):
     """
     Intake constant amount of water from world if water is present.
@@ -20,5 +23,34 @@ def constant_drink(organism, universe):
         universe.world.water[organism.location[0]] -= intake
     else:
         universe.world.water[organism.location[0]][organism.location[1]] -= intake
+    universe.world.mark_changed('water')
 
     return [organism]
+
+
+def constant_drink_vectorized(species_columns, rows, universe):
+    """
+    Vectorized form of :func:`constant_drink`.
+
+    Returns the amount of water each organism tries to drink. The amounts
+    actually consumed are resolved per cell over all organisms drinking in
+    the same time step, so that organisms sharing a cell split the water
+    available there.
+
+    Parameters
+    ----------
+    species_columns : SpeciesColumns
+        Columns of the species drinking
+    rows : np.ndarray
+        Rows of the organisms that drink
+    universe : Universe
+        Universe containing organisms
+
+    Returns
+    -------
+    requested : np.ndarray
+        Requested water intake per organism
+    """
+    columns = species_columns.columns
+    diff = columns['water_capacity'][rows] - columns['water_current'][rows]
+    return np.clip(diff, 0, columns['water_intake'][rows])
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def constant_eat(organism, universe):
     """
     Intake constant amount of food from world if food is present.
@@ -20,5 +23,19 @@ def constant_eat(organism, universe):
         universe.world.food[organism.location[0]] -= intake
     else:
         universe.world.food[organism.location[0]][organism.location[1]] -= intake
+    universe.world.mark_changed('food')
 
     return [organism]
+
+
+def constant_eat_vectorized(species_columns, rows, universe):
+    """
+    Vectorized form of :func:`constant_eat`.
+
+    Returns the amount of food each organism tries to eat. The amounts
+    actually consumed are resolved per cell over all organisms eating in the
+    same time step.
+    """
+    columns = species_columns.columns
+    diff = columns['food_capacity'][rows] - columns['food_current'][rows]
+    return np.clip(diff, 0, columns['food_intake'][rows])
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def stationary(organism, universe):
     """
     Organism stays still.
@@ -45,3 +48,38 @@ def simple_random(organism, universe):
     else:
         raise ValueError(f'Invalid world dimensionality: {len(size)}')
     return [organism]
+
+
+def stationary_vectorized(species_columns, indices, universe):
+    """
+    Vectorized form of :func:`stationary`.
+
+    Parameters
+    ----------
+    species_columns : SpeciesColumns
+        Columns of the species being moved
+    indices : np.ndarray
+        Rows of the organisms that move
+    universe : Universe
+        Universe containing organisms
+
+    Returns
+    -------
+    locations : np.ndarray
+        New locations, of shape (len(indices), dimensionality)
+    """
+    return species_columns.columns['location'][indices]
+
+
+def simple_random_vectorized(species_columns, indices, universe):
+    """
+    Vectorized form of :func:`simple_random`, drawing the steps of all
+    organisms at once and clipping them to the world boundaries.
+    """
+    locations = species_columns.columns['location'][indices]
+    size = universe.world.world_size
+    if len(size) not in [1, 2]:
+        raise ValueError(f'Invalid world dimensionality: {len(size)}')
+
+    steps = 2 * universe.rng.integers(0, 2, size=locations.shape) - 1
+    return np.clip(locations + steps, 0, np.asarray(size) - 1)
@@ -1,4 +1,3 @@
-import uuid
 import numpy as np
 
 
@@ -12,7 +11,7 @@ def pure_replication(organism, universe):
 
     # Generate new organisms
     for i in range(2):
-        child = organism.get_child(seed=universe.rng)
+        child = organism.get_child(seed=universe.rng, ids=universe.ids)
         if organism.drinking_type is not None:
             child.update_parameter('water_current',
                                    organism.water_current // 2,
@@ -0,0 +1,346 @@
+"""
+Parallel time steps with spatial domain decomposition.
+
+The world is split into a fixed grid of tiles. At every time step, each
+living organism is assigned to the tile containing its location, and the
+intents of each tile's organisms are evaluated in a process pool, against a
+copy of the world and of the organisms in and around the tile (within
+``halo`` cells of it). Organisms that moved across a tile border are simply
+assigned to their new tile at the next time step. All intents are then
+resolved together by :func:`parse_intent.parse`, as in the serial object
+engine, so conflicts between organisms of different tiles are settled the
+same way as conflicts within a tile.
+
+Tiles own the cells of the world inside them. By default, worker processes
+change the world grids in place, in shared memory (see
+:mod:`blossom.simulation.shared_world`), and a single in-process worker
+changes the world itself, so the world is never copied for a tile. Without
+``shared_world``, each tile gets a pickled copy of the world instead: changes
+it makes to the water and food grids at its own cells are copied back into
+the world, and changes anywhere else are discarded. Built-in behaviors only
+read and change the cell an organism is on, which is always inside its tile;
+custom behaviors should do the same, so that every mode gives the same
+results.
+
+Determinism: each tile draws from its own random number generator, seeded
+from the universe's generator at every time step, and organisms born in a
+tile get provisional IDs that are renumbered in tile order once all tiles
+are done. For a given seed and tile grid, runs are therefore identical for
+any number of workers, including a single in-process worker. They differ
+from runs of the serial object engine, which draws random numbers in a
+different order.
+"""
+
+import copy
+import concurrent.futures
+import numpy as np
+
+from .id_allocator import IDAllocator
+from . import population_funcs as pf
+from . import shared_world
+
+
+# World grids that behaviors may change, merged back from each tile
+resource_layers = ['water', 'food']
+
+# Organisms born in tile i are provisionally numbered from
+# _provisional_base + i * _provisional_block
+_provisional_base = 2**62
+_provisional_block = 2**40
+
+
+def default_tiles(dimensionality):
+    """
+    Default tile grid, with about 16 tiles in total.
+    """
+    return [int(round(16 ** (1 / dimensionality)))] * dimensionality
+
+
+def tile_edges(world_size, tiles):
+    """
+    Cell boundaries of the tiles along each axis.
+
+    Parameters
+    ----------
+    world_size : list of int
+        Size of the world along each axis.
+    tiles : list of int
+        Number of tiles along each axis. Capped at the size of the axis.
+
+    Returns
+    -------
+    edges : list of np.ndarray
+        Boundaries of the tiles along each axis, starting at 0 and ending at
+        the size of the axis.
+    """
+    if len(tiles) != len(world_size):
+        raise ValueError('tiles must give a number of tiles per world axis')
+    if any(n < 1 for n in tiles):
+        raise ValueError('There must be at least one tile per axis')
+    return [np.linspace(0, size, min(n, size) + 1).astype(int)
+            for size, n in zip(world_size, tiles)]
+
+
+class TileUniverse(object):
+    """
+    Stand-in for the universe within a single tile, with the attributes
+    behaviors use. Its organisms are the current state (with updated ages)
+    of the organisms in and around the tile.
+    """
+
+    def __init__(self, tile, world, organisms, seed, current_time,
+                 species_names):
+        self.tile = tile
+        self.world = world
+        self.rng = np.random.default_rng(seed)
+        self.ids = IDAllocator(_provisional_base + tile * _provisional_block)
+        self.current_time = current_time
+        self.species_names = species_names
+        self.organisms = [organism.clone_self()._update_age()
+                          for organism in organisms]
+        self.population_dict = pf.get_population_dict(self.organisms,
+                                                      species_names)
+        self.organisms_by_location = pf.hash_by_location(self.organisms)
+
+
+def step_tile(tile, organisms, owned, world, region, seed, current_time,
+              species_names):
+    """
+    Evaluate the intents of the organisms of a single tile. Runs in a worker
+    process.
+
+    Parameters
+    ----------
+    tile : int
+        Flat index of the tile.
+    organisms : list of Organism
+        Organisms in and around the tile, from the last time step.
+    owned : np.ndarray
+        Whether each organism is in the tile, and should act.
+    world : World
+        Copy of the world at the start of the time step, the world itself
+        for an in-process worker, or a copy of the world without its grids,
+        if they are shared.
+    region : tuple of slice
+        Cells of the world owned by the tile.
+    seed : int
+        Seed of the tile's random number generator for this time step.
+    current_time : int
+        Current time step.
+    species_names : list of str
+        Names of all species.
+
+    Returns
+    -------
+    intent_list : list of list of Organism
+        Intents of the tile's organisms, in order.
+    grids : dict of np.ndarray
+        Resource grids within the tile's region, after the tile's organisms
+        acted. Empty if the grids are shared.
+    """
+    shared = getattr(world, '_shared_layers', None)
+    if shared is not None:
+        for name, layer in shared_world.attach(shared).items():
+            setattr(world, name, layer)
+    universe = TileUniverse(tile, world, organisms, seed, current_time,
+                            species_names)
+    intent_list = [organism.step(universe)
+                   for organism, is_owned in zip(organisms, owned)
+                   if is_owned]
+    if shared is not None:
+        return intent_list, {}
+    grids = {
+        layer: np.asarray(getattr(world, layer))[region].copy()
+        for layer in resource_layers
+        if getattr(world, layer, None) is not None
+    }
+    return intent_list, grids
+
+
+class ParallelStepper(object):
+    """
+    Evaluates organism intents tile by tile, in a pool of worker processes.
+    """
+
+    def __init__(self, world_size, tiles=None, workers=1, halo=1,
+                 shared_world=True):
+        """
+        Parameters
+        ----------
+        world_size : list of int
+            Size of the world along each axis.
+        tiles : list of int, optional
+            Number of tiles along each axis. Results depend on the tile grid,
+            but not on the number of workers.
+        workers : int
+            Number of worker processes. With a single worker, tiles are
+            evaluated in the current process.
+        halo : int
+            Width in cells of the border around each tile whose organisms
+            are visible to behaviors in the tile (e.g. as prey), without
+            acting.
+        shared_world : bool
+            Whether to keep the world grids in shared memory, which worker
+            processes change in place, rather than sending a copy of the
+            world with every tile. Ignored with a single worker, which
+            changes the world in place.
+        """
+        if tiles is None:
+            tiles = default_tiles(len(world_size))
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+        self.edges = tile_edges(world_size, tiles)
+        self.shape = [len(axis_edges) - 1 for axis_edges in self.edges]
+        self.n_tiles = int(np.prod(self.shape))
+        self.workers = workers
+        self.halo = halo
+        self.shared_world = shared_world
+        self.shared_layers = None
+        self._executor = None
+
+    def region(self, tile):
+        """
+        Cells of the world owned by a tile, as a tuple of slices.
+        """
+        index = np.unravel_index(tile, self.shape)
+        return tuple(slice(axis_edges[i], axis_edges[i + 1])
+                     for i, axis_edges in zip(index, self.edges))
+
+    def assign(self, locations):
+        """
+        Flat index of the tile containing each location.
+        """
+        index = [
+            np.searchsorted(axis_edges, locations[:, axis], side='right') - 1
+            for axis, axis_edges in enumerate(self.edges)
+        ]
+        return np.ravel_multi_index(index, self.shape)
+
+    def _context(self, tile, locations):
+        """
+        Mask of locations within the halo around a tile.
+        """
+        mask = np.ones(len(locations), dtype=bool)
+        for axis, cells in enumerate(self.region(tile)):
+            mask &= ((locations[:, axis] >= cells.start - self.halo)
+                     & (locations[:, axis] < cells.stop + self.halo))
+        return mask
+
+    def _map(self, tasks):
+        if self.workers == 1:
+            return [step_tile(*task) for task in tasks]
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers
+            )
+        return list(self._executor.map(step_tile, *zip(*tasks)))
+
+    def intents(self, universe, organisms):
+        """
+        Evaluate the intents of all living organisms, tile by tile, and merge
+        the tiles' changes to the world back into the universe.
+
+        Parameters
+        ----------
+        universe : Universe
+            Universe containing organisms. Its random number generator seeds
+            the tiles, and its ID allocator numbers newly born organisms.
+        organisms : list of Organism
+            Organisms from the last time step.
+
+        Returns
+        -------
+        intent_list : list of list of Organism
+            Intents of all living organisms, in tile order, ready for
+            :func:`parse_intent.parse`.
+        """
+        world = universe.world
+        for layer in resource_layers:
+            grid = getattr(world, layer, None)
+            if grid is not None and not isinstance(grid, np.ndarray):
+                setattr(world, layer, np.array(grid))
+        tile_world = self._tile_world(world)
+
+        alive = [organism for organism in organisms if organism.alive]
+        locations = np.array([organism.location for organism in alive],
+                             dtype=int).reshape(len(alive), len(self.shape))
+        tiles = self.assign(locations)
+        # Draw seeds for every tile, occupied or not, so that the universe's
+        # generator advances the same way whatever the population
+        seeds = universe.rng.integers(2**63, size=self.n_tiles)
+
+        tasks = []
+        for tile in np.unique(tiles):
+            rows = np.flatnonzero(self._context(tile, locations))
+            tasks.append((
+                int(tile),
+                [alive[i] for i in rows],
+                tiles[rows] == tile,
+                tile_world,
+                self.region(tile),
+                int(seeds[tile]),
+                universe.current_time,
+                universe.species_names
+            ))
+
+        intent_list = []
+        for task, (tile_intents, grids) in zip(tasks, self._map(tasks)):
+            region = task[4]
+            for layer, grid in grids.items():
+                getattr(world, layer)[region] = grid
+                world.mark_changed(layer)
+            self._renumber(tile_intents, universe.ids)
+            intent_list.extend(tile_intents)
+        if tile_world is not world:
+            # Shared grids were changed in place by the worker processes
+            for layer in resource_layers:
+                if getattr(world, layer, None) is not None:
+                    world.mark_changed(layer)
+        return intent_list
+
+    def _tile_world(self, world):
+        """
+        World to send to the tiles: either the world itself, or a copy
+        without the grids, which workers attach to in shared memory.
+        """
+        if not self.shared_world or self.workers == 1:
+            return world
+        if self.shared_layers is None:
+            self.shared_layers = shared_world.SharedLayers()
+        descriptors = self.shared_layers.share(world)
+        tile_world = copy.copy(world)
+        for name in descriptors:
+            setattr(tile_world, name, None)
+        tile_world._shared_layers = descriptors
+        return tile_world
+
+    def _renumber(self, intent_list, ids):
+        """
+        Replace provisional IDs of organisms born in a tile by IDs from the
+        universe's allocator, in order.
+        """
+        new_ids = {}
+        for intent in intent_list:
+            for organism in intent:
+                organism_id = organism.organism_id
+                if (isinstance(organism_id, (int, np.integer))
+                        and organism_id >= _provisional_base):
+                    if organism_id not in new_ids:
+                        new_ids[organism_id] = ids.new_id()
+                    organism.organism_id = new_ids[organism_id]
+
+    def close(self, world=None):
+        """
+        Shut down the worker processes and free shared grids.
+
+        Parameters
+        ----------
+        world : World, optional
+            World using shared grids, which get replaced by private copies.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.shared_layers is not None:
+            self.shared_layers.close(world)
+            self.shared_layers = None
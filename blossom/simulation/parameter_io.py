@@ -13,7 +13,9 @@ import copy
 from .utils import cast_to_list
 from .world import World
 from .organism import Organism
+from .id_allocator import IDAllocator
 from . import default_fields
+from . import dispatch
 
 
 def load_world(fn=None, init_dict={}):
@@ -195,12 +197,15 @@ def load_species(fns=None,
 def create_organisms(species_init_dict,
                      init_world=World({}),
                      location_callback=None,
-                     seed=None):
+                     seed=None,
+                     ids=None):
     '''
     Make organism list from an species_init_dict either provided directly or
     scraped from parameter file. All organisms are from a single species.
     '''
     rng = np.random.default_rng(seed)
+    if ids is None:
+        ids = IDAllocator()
 
     organism_list = []
     list_field_keys = []
@@ -234,7 +239,7 @@ def create_organisms(species_init_dict,
         organism_init_dict['location'] = location
 
         # Add organism to organism list
-        organism_list.append(Organism(organism_init_dict, seed=seed))
+        organism_list.append(Organism(organism_init_dict, seed=seed, ids=ids))
 
     return organism_list
 
@@ -242,7 +247,8 @@ def create_organisms(species_init_dict,
 def load_species_from_dict(init_dicts,
                            init_world,
                            custom_module_fns=None,
-                           seed=None):
+                           seed=None,
+                           ids=None):
     """
     Create a list of organisms loaded from Python dicts.
 
@@ -259,6 +265,9 @@ def load_species_from_dict(init_dicts,
         filename included here.
     seed : int, Generator, optional
         Random seed for the simulation
+    ids : IDAllocator, optional
+        ID allocator of the universe, used to number the organisms. Defaults
+        to a new allocator, numbering from zero.
 
     Returns
     -------
@@ -267,6 +276,8 @@ def load_species_from_dict(init_dicts,
 
     """
     init_dicts = cast_to_list(init_dicts)
+    if ids is None:
+        ids = IDAllocator()
 
     population_dict = {}
     for init_dict in init_dicts:
@@ -341,6 +352,9 @@ def load_species_from_dict(init_dicts,
             # Track custom method file paths
             species_init_dict['custom_module_fns'] = custom_module_fns
 
+        # Resolve behavior methods now, so misconfigured names fail at load
+        dispatch.get_table(species_init_dict)
+
         if 'initial_locations' in init_dict:
             assert len(init_dict['initial_locations']) == population_size
             for location in init_dict['initial_locations']:
@@ -348,7 +362,10 @@ def load_species_from_dict(init_dicts,
             species_init_dict['initial_locations'] \
                 = init_dict['initial_locations']
 
-        species_organism_list = create_organisms(species_init_dict, init_world, seed=seed)
+        species_organism_list = create_organisms(species_init_dict,
+                                                 init_world,
+                                                 seed=seed,
+                                                 ids=ids)
 
         # Populate population dict with relevant bulk stats and organism lists
         population_dict[species_init_dict['species_name']] = {
@@ -366,7 +383,8 @@ def load_species_from_dict(init_dicts,
 def load_species_from_param_files(fns,
                                   init_world,
                                   custom_module_fns=None,
-                                  seed=None):
+                                  seed=None,
+                                  ids=None):
     """
     Load all available species parameter files.
 
@@ -384,6 +402,9 @@ def load_species_from_param_files(fns,
         filename included here.
     seed : int, Generator, optional
         Random seed for the simulation
+    ids : IDAllocator, optional
+        ID allocator of the universe, used to number the organisms. Defaults
+        to a new allocator, numbering from zero.
 
     Returns
     -------
@@ -393,6 +414,8 @@ def load_species_from_param_files(fns,
     """
     # Find organism filenames, can be a list of patterns
     fns = cast_to_list(fns)
+    if ids is None:
+        ids = IDAllocator()
     org_files = [fn for pattern in fns for fn in glob.glob(pattern)]
 
     # Initialize list of dictionaries to hold all organism parameters
@@ -468,7 +491,13 @@ def load_species_from_param_files(fns,
         # Track custom method file paths
         species_init_dict['custom_module_fns'] = custom_module_fns
 
-        species_organism_list = create_organisms(species_init_dict, init_world, seed=seed)
+        # Resolve behavior methods now, so misconfigured names fail at load
+        dispatch.get_table(species_init_dict)
+
+        species_organism_list = create_organisms(species_init_dict,
+                                                 init_world,
+                                                 seed=seed,
+                                                 ids=ids)
 
         # Populate population dict with relevant bulk stats and organism lists
         population_dict[species_init_dict['species_name']] = {
@@ -494,18 +523,27 @@ def parse_config_number(x):
 
 def load_from_config(fn, seed=None):
     """
-    Create initial population and world from .yml configuration file.
+    Create initial population and world from .yml configuration file, or
+    from the contents of one as a dict. A given seed takes precedence over
+    the one in the file, if any.
     """
-    with open(fn, 'r') as f:
-        cfg = yaml.load(f, Loader=yaml.FullLoader)
+    if isinstance(fn, dict):
+        cfg = fn
+    else:
+        with open(fn, 'r') as f:
+            cfg = yaml.load(f, Loader=yaml.FullLoader)
 
-    initial_seed = cfg.get('seed', seed)
+    initial_seed = seed
+    if initial_seed is None:
+        initial_seed = cfg.get('seed')
     if initial_seed is None:
         initial_seed = np.random.default_rng().integers(2**32)
     rng = np.random.default_rng(initial_seed)    
+    ids = IDAllocator(seed=initial_seed)
     config_params = {
         'initial_seed': initial_seed,
-        'rng': rng
+        'rng': rng,
+        'ids': ids
     }
     
     # Load world
@@ -593,6 +631,7 @@ def load_from_config(fn, seed=None):
 
     population_dict = load_species_from_dict(species_init_dicts,
                                              world,
-                                             seed=rng)
+                                             seed=rng,
+                                             ids=ids)
 
     return population_dict, world, config_params
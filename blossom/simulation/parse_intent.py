@@ -1,6 +1,76 @@
-import random
 import numpy as np
-from . import population_funcs
+
+
+def resolve(intent_lengths, entries, n_indices=None, seed=None):
+    """
+    Select a conflict-free subset of intents, in random priority order.
+
+    Intents are given in flattened form: intent k consists of the organism
+    indices ``entries[offsets[k]:offsets[k + 1]]``, where offsets are the
+    cumulative intent lengths. Intents are visited in a random order, and an
+    intent is accepted if none of its organisms were claimed by an intent
+    accepted before it.
+
+    Organisms that appear in only one intent can't conflict, so intents made
+    up entirely of such organisms are accepted directly, and only contested
+    intents are visited one by one. This runs in O(total intent entries).
+
+    Parameters
+    ----------
+    intent_lengths : np.ndarray
+        Number of organisms in each intent.
+    entries : np.ndarray
+        Flattened integer organism indices of all intents.
+    n_indices : int, optional
+        Total number of organism indices.
+    seed : int, Generator, optional
+        Random seed
+
+    Returns
+    -------
+    order : np.ndarray
+        Random priority order of the intents.
+    accepted : np.ndarray
+        Boolean mask over intents, True for selected intents.
+    claimed : np.ndarray
+        Boolean mask over organism indices, True for organisms included in
+        a selected intent.
+    """
+    rng = np.random.default_rng(seed)
+    intent_lengths = np.asarray(intent_lengths, dtype=int)
+    entries = np.asarray(entries, dtype=int)
+    n_intents = len(intent_lengths)
+    if n_indices is None:
+        n_indices = entries.max() + 1 if len(entries) > 0 else 0
+
+    order = rng.permutation(n_intents)
+
+    owners = np.repeat(np.arange(n_intents), intent_lengths)
+    counts = np.bincount(entries, minlength=n_indices)
+    contested = np.zeros(n_intents, dtype=bool)
+    contested[owners[counts[entries] > 1]] = True
+
+    accepted = ~contested
+    claimed = np.zeros(n_indices, dtype=bool)
+    claimed[entries[accepted[owners]]] = True
+
+    offsets = np.concatenate([[0], np.cumsum(intent_lengths)])
+    for k in order[contested[order]]:
+        indices = entries[offsets[k]:offsets[k + 1]]
+        if not claimed[indices].any():
+            claimed[indices] = True
+            accepted[k] = True
+    return order, accepted, claimed
+
+
+def organism_key(organism):
+    """
+    Key identifying an organism across intents: its ID, or the organism
+    itself for new organisms that aren't numbered yet.
+    """
+    if organism.organism_id is None:
+        return ('new', id(organism))
+    return organism.organism_id
 
 
 def parse(intent_list, organism_list, seed=None):
@@ -17,7 +87,7 @@ def parse(intent_list, organism_list, seed=None):
     organism_list : list of Organisms
         List of current organisms
     seed : int, Generator, optional
-        Random seed 
+        Random seed
 
     Returns
     -------
@@ -30,33 +100,46 @@ def parse(intent_list, organism_list, seed=None):
     somehow effect its state. This method resolves those conflicts, so that
     there is only one organism with a given organism id present in the final
     output list at all times.
+
+    Organism ids are mapped to integer indices and conflicts are resolved
+    with :func:`resolve`. New organisms without an id yet are told apart by
+    identity. For a given seed, the selected intents and the order of the
+    output match the original set-based implementation, except that
+    ``intent_list`` itself is no longer shuffled in place.
     """
-    rng = np.random.default_rng(seed)
     # TODO: Figure out exactly how this should be controlled -- on the scale of
     # the universe, the world, or the organisms itself
-    updated_list = []
-
     id_org_dict = {}
     for organism in organism_list:
         id_org_dict[organism.organism_id] = organism
 
-    new_organism_ids = set()
+    # Current organisms get the first indices, new organisms (e.g. children)
+    # are numbered as they are encountered
+    index = {id: i for i, id in enumerate(id_org_dict)}
+    intent_lengths = np.fromiter((len(organism_set)
+                                  for organism_set in intent_list),
+                                 dtype=int,
+                                 count=len(intent_list))
+    entries = np.fromiter((index.setdefault(organism_key(organism),
+                                            len(index))
+                           for organism_set in intent_list
+                           for organism in organism_set),
+                          dtype=int,
+                          count=int(intent_lengths.sum()))
+
+    order, accepted, claimed = resolve(intent_lengths,
+                                       entries,
+                                       n_indices=len(index),
+                                       seed=seed)
 
-    # Randomly sample organism steps to select. Only use sets for conditionals,
-    # add to saved structures using lists and dicts (since key order is
-    # preserved)
-    rng.shuffle(intent_list)
-    for organism_set in intent_list:
-        set_ids = set(organism.organism_id for organism in organism_set)
-        if len(new_organism_ids & set_ids) == 0:
-            updated_list.extend(organism_set)
-            new_organism_ids.update(set_ids)
+    updated_list = []
+    for k in order:
+        if accepted[k]:
+            updated_list.extend(intent_list[k])
 
     # Add back organisms whose steps were not chosen (and increment status)
-    for id in id_org_dict.keys():
-        if id not in new_organism_ids:
-            organism = id_org_dict[id]
-            if organism.alive:
-                updated_list.append(organism.step_without_acting())
+    for i, organism in enumerate(id_org_dict.values()):
+        if not claimed[i] and organism.alive:
+            updated_list.append(organism.step_without_acting())
 
     return updated_list
@@ -0,0 +1,632 @@
+"""
+Column-wise (structure-of-arrays) storage of organism populations.
+
+Instead of one Organism object per organism, every field of
+``default_fields.organism_fields`` is kept in a NumPy array, grouped by
+species. Organisms can still be accessed individually through
+:class:`OrganismView` objects, which read and write a single row of the
+columns, so that custom behaviors written against the Organism API keep
+working.
+"""
+
+import math
+import numpy as np
+
+from . import default_fields
+from . import dispatch
+from .organism import Organism
+
+
+class Categories(object):
+    """
+    Small integer codes for a set of values, such as causes of death. New
+    values are added on first use, and code 0 is always None. Codes are only
+    meaningful within a process, so values are decoded whenever organisms
+    are converted to dicts.
+    """
+
+    def __init__(self, values, dtype='int16'):
+        self.dtype = dtype
+        self.values = [None]
+        self._codes = {None: 0}
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        """
+        Get the code of a value, adding it if it isn't known yet.
+        """
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if code > np.iinfo(self.dtype).max:
+                raise ValueError('Too many categories!')
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def encode(self, values):
+        return np.array([self.code(value) for value in values],
+                        dtype=self.dtype)
+
+    def decode(self, codes):
+        return [self.values[code] for code in codes]
+
+
+# Built-in causes of death get fixed codes; custom causes are added as they
+# occur
+death_causes = Categories(['old_age', 'thirst', 'hunger', 'replication',
+                           'unknown'])
+
+# Fields stored as Categories codes
+categorical_fields = {'cause_of_death': death_causes}
+
+
+def _encode(value, dtype):
+    """
+    Convert a Python value to something storable in a column of type dtype.
+    """
+    if value is None and np.dtype(dtype).kind == 'f':
+        return np.nan
+    return value
+
+
+def _decode(value):
+    """
+    Convert a single column entry back to a plain Python value.
+    """
+    if isinstance(value, np.ndarray):
+        return [_decode(x) for x in value]
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        if np.isnan(value):
+            return None
+        value = float(value)
+        if math.isfinite(value) and value.is_integer():
+            return int(value)
+        return value
+    return value
+
+
+def make_field_column(field, values):
+    """
+    Build the column of a specific organism field, using the dtype from
+    ``default_fields.organism_field_dtypes`` or a categorical encoding where
+    applicable.
+    """
+    if field in categorical_fields:
+        try:
+            return categorical_fields[field].encode(values)
+        except TypeError:
+            pass
+    return make_column(values, default_fields.organism_field_dtypes.get(field))
+
+
+def make_column(values, dtype=None):
+    """
+    Build a column from a list of values, using dtype if the values allow it
+    and falling back to an object column otherwise.
+
+    Parameters
+    ----------
+    values : list
+        Values of a single field, one per organism.
+    dtype : str, optional
+        Preferred NumPy dtype of the column.
+
+    Returns
+    -------
+    column : np.ndarray
+        Column containing the values.
+    """
+    if dtype is not None:
+        try:
+            column = np.array([_encode(value, dtype) for value in values],
+                              dtype=dtype)
+            if column.ndim == 1 or (column.ndim == 2 and len(values) > 0):
+                return column
+        except (TypeError, ValueError, OverflowError):
+            pass
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+class SpeciesColumns(object):
+    """
+    Column storage for all organisms of a single species.
+    """
+
+    def __init__(self, species_name, columns, dimensionality=1):
+        """
+        Parameters
+        ----------
+        species_name : str
+            Name of the species.
+        columns : dict of np.ndarray
+            Mapping of organism field names to columns of equal length.
+        dimensionality : int
+            Dimensionality of the world, used for the shape of the location
+            column.
+        """
+        self.species_name = species_name
+        self.columns = columns
+        self.dimensionality = dimensionality
+        if 'location' not in self.columns:
+            self.columns['location'] = np.zeros((0, dimensionality),
+                                                dtype='int64')
+        self._dispatch = None
+
+    @classmethod
+    def from_organisms(cls, species_name, organisms, dimensionality=None):
+        """
+        Pack a list of organisms of one species into columns.
+
+        Parameters
+        ----------
+        species_name : str
+            Name of the species.
+        organisms : list of Organisms
+            Organisms to store, all of species species_name.
+        dimensionality : int, optional
+            Dimensionality of the world. Inferred from the organism
+            locations if not provided.
+
+        Returns
+        -------
+        species_columns : SpeciesColumns
+            Column storage of the organisms.
+        """
+        return cls.from_dicts(species_name,
+                              [organism.to_dict() for organism in organisms],
+                              dimensionality=dimensionality)
+
+    @classmethod
+    def from_dicts(cls, species_name, organism_dicts, dimensionality=None):
+        """
+        Pack organisms of one species, given as dicts of their fields (e.g.
+        as saved in JSON datasets), into columns.
+
+        Parameters
+        ----------
+        species_name : str
+            Name of the species.
+        organism_dicts : list of dict
+            Fields of each organism.
+        dimensionality : int, optional
+            Dimensionality of the world. Inferred from the organism
+            locations if not provided.
+
+        Returns
+        -------
+        species_columns : SpeciesColumns
+            Column storage of the organisms.
+        """
+        fields = list(default_fields.organism_fields.keys())
+        for organism_dict in organism_dicts:
+            for field in organism_dict:
+                if field not in fields:
+                    fields.append(field)
+
+        columns = {}
+        for field in fields:
+            columns[field] = make_field_column(
+                field,
+                [organism_dict.get(field) for organism_dict in organism_dicts]
+            )
+        if dimensionality is None:
+            if len(organism_dicts) > 0:
+                dimensionality = len(organism_dicts[0]['location'])
+            else:
+                dimensionality = 1
+        if len(organism_dicts) == 0:
+            columns['location'] = np.zeros((0, dimensionality), dtype='int64')
+        return cls(species_name, columns, dimensionality=dimensionality)
+
+    @classmethod
+    def concatenate(cls, parts):
+        """
+        Stack the rows of several SpeciesColumns of the same species.
+
+        Parameters
+        ----------
+        parts : list of SpeciesColumns
+            Column storage to combine. Fields missing from some parts are
+            filled with None.
+
+        Returns
+        -------
+        species_columns : SpeciesColumns
+            Combined column storage.
+        """
+        fields = []
+        for part in parts:
+            for field in part.columns:
+                if field not in fields:
+                    fields.append(field)
+
+        columns = {}
+        for field in fields:
+            field_columns = []
+            for part in parts:
+                if field in part.columns:
+                    field_columns.append(part.columns[field])
+                else:
+                    field_columns.append(make_field_column(
+                        field,
+                        [None] * len(part)
+                    ))
+            columns[field] = np.concatenate(field_columns)
+        combined = cls(parts[0].species_name,
+                       columns,
+                       dimensionality=parts[0].dimensionality)
+        for part in parts:
+            if part._dispatch is not None:
+                combined._dispatch = part._dispatch
+                break
+        return combined
+
+    def __len__(self):
+        return len(self.columns['alive'])
+
+    @property
+    def dispatch_table(self):
+        """
+        Dispatch table of behavior methods for this species.
+        """
+        if self._dispatch is None and len(self) > 0:
+            self._dispatch = dispatch.get_table(self.row_dict(0))
+        return self._dispatch
+
+    def _is_categorical(self, field):
+        return (field in categorical_fields
+                and self.columns[field].dtype.kind in 'iu')
+
+    def get_value(self, field, index):
+        if self._is_categorical(field):
+            return categorical_fields[field].values[self.columns[field][index]]
+        return _decode(self.columns[field][index])
+
+    def set_value(self, field, index, value):
+        if field not in self.columns:
+            self.columns[field] = make_field_column(field, [None] * len(self))
+        column = self.columns[field]
+        try:
+            if self._is_categorical(field):
+                column[index] = categorical_fields[field].code(value)
+            else:
+                column[index] = _encode(value, column.dtype)
+        except (TypeError, ValueError, OverflowError):
+            if column.ndim != 1:
+                raise
+            if self._is_categorical(field):
+                column = make_column(categorical_fields[field].decode(column))
+            else:
+                column = column.astype(object)
+            column[index] = value
+            self.columns[field] = column
+
+    def fill(self, field, rows, value):
+        """
+        Set a field to the same value for several rows.
+        """
+        if len(rows) > 0:
+            self.set_value(field, rows, value)
+
+    def row_dict(self, index):
+        """
+        Get all fields of a single organism as a dict.
+        """
+        return {field: self.get_value(field, index)
+                for field in self.columns}
+
+    def take(self, indices):
+        """
+        Select a subset of rows, returning a new SpeciesColumns instance.
+        """
+        taken = SpeciesColumns(
+            self.species_name,
+            {field: column[indices] for field, column in self.columns.items()},
+            dimensionality=self.dimensionality
+        )
+        taken._dispatch = self._dispatch
+        return taken
+
+    def copy(self):
+        """
+        Copy columns, so that changes aren't reflected in the original.
+        """
+        return self.take(np.arange(len(self)))
+
+    def views(self):
+        """
+        Get a list of OrganismView objects, one per row.
+        """
+        return [OrganismView(self, i) for i in range(len(self))]
+
+    def to_organisms(self):
+        """
+        Unpack columns to a list of independent Organism objects.
+        """
+        return [Organism(self.row_dict(i)) for i in range(len(self))]
+
+    def statistics(self):
+        total = len(self)
+        alive = int(np.count_nonzero(self.columns['alive']))
+        return {
+            'total': total,
+            'alive': alive,
+            'dead': total - alive
+        }
+
+
+class PopulationStore(object):
+    """
+    Column storage for all species in a universe.
+    """
+
+    def __init__(self, species, species_names=None):
+        """
+        Parameters
+        ----------
+        species : dict of SpeciesColumns
+            Column storage keyed by species name.
+        species_names : list of str, optional
+            Names of all species, including ones that currently have no
+            organisms.
+        """
+        self.species = species
+        if species_names is None:
+            species_names = sorted(species.keys())
+        self.species_names = species_names
+
+    @classmethod
+    def from_organisms(cls, organism_list, species_names,
+                       dimensionality=None):
+        """
+        Pack a list of organisms into per-species columns.
+        """
+        grouped = {species: [] for species in species_names}
+        for organism in organism_list:
+            grouped[organism.species_name].append(organism)
+        return cls(
+            {
+                species: SpeciesColumns.from_organisms(
+                    species, grouped[species], dimensionality=dimensionality
+                )
+                for species in species_names
+            },
+            species_names
+        )
+
+    @classmethod
+    def from_population_dict(cls, population_dict, dimensionality=None):
+        """
+        Pack a population dict into per-species columns.
+        """
+        species_names = sorted(population_dict.keys())
+        return cls(
+            {
+                species: SpeciesColumns.from_organisms(
+                    species,
+                    population_dict[species]['organisms'],
+                    dimensionality=dimensionality
+                )
+                for species in species_names
+            },
+            species_names
+        )
+
+    def __len__(self):
+        return sum(len(self.species[species]) for species in self.species)
+
+    def select_alive(self):
+        """
+        Get a new PopulationStore containing only living organisms.
+        """
+        return PopulationStore(
+            {
+                species: columns.take(np.flatnonzero(columns.columns['alive']))
+                for species, columns in self.species.items()
+            },
+            self.species_names
+        )
+
+    def copy(self):
+        return PopulationStore(
+            {
+                species: columns.copy()
+                for species, columns in self.species.items()
+            },
+            self.species_names
+        )
+
+    def increment_age(self):
+        """
+        Increment age of all living organisms by 1, in place.
+        """
+        for columns in self.species.values():
+            columns.columns['age'][columns.columns['alive']] += 1
+        return self
+
+    def views(self):
+        """
+        Get a list of OrganismView objects over all species.
+        """
+        organism_list = []
+        for species in self.species_names:
+            organism_list.extend(self.species[species].views())
+        return organism_list
+
+    def to_population_dict(self):
+        """
+        Construct a population dict whose organism lists contain
+        OrganismView objects. Statistics are computed right away, but each
+        species' organism list is only built when it is first accessed.
+        """
+        return {
+            species: LazySpeciesDict(self.species[species])
+            for species in self.species_names
+        }
+
+    def hash_by_location(self, organisms=None):
+        """
+        Group organisms by location, as population_funcs.hash_by_location,
+        from the location columns.
+
+        Parameters
+        ----------
+        organisms : list of OrganismView, optional
+            Views of all rows, in species order (as from :meth:`views`), to
+            put in the hash table. New views are built if not given.
+
+        Returns
+        -------
+        hash_table : dict
+            Lists of organisms keyed by location tuple, in row order.
+        """
+        if organisms is None:
+            organisms = self.views()
+        if len(organisms) == 0:
+            return {}
+        locations = np.concatenate([
+            self.species[species].columns['location']
+            for species in self.species_names
+        ]).astype(np.int64, copy=False)
+        locations = locations.reshape(len(organisms), -1)
+        offset = locations.min(axis=0)
+        cells = np.ravel_multi_index(
+            tuple((locations - offset).T),
+            tuple(locations.max(axis=0) - offset + 1)
+        )
+        order = np.argsort(cells, kind='stable')
+        sorted_cells = cells[order]
+        starts = np.flatnonzero(np.r_[True,
+                                      sorted_cells[1:] != sorted_cells[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        keys = map(tuple, locations[order[starts]].tolist())
+        order = order.tolist()
+        return {
+            key: [organisms[i] for i in order[start:end]]
+            for key, start, end in zip(keys, starts.tolist(), ends.tolist())
+        }
+
+
+class LazySpeciesDict(dict):
+    """
+    Population dict entry of a single species, whose 'organisms' list of
+    OrganismView objects is only built when it is first accessed, or when
+    the entry is iterated over. Its 'statistics' are always available.
+    """
+
+    def __init__(self, species_columns):
+        super().__init__(statistics=species_columns.statistics())
+        self._species_columns = species_columns
+
+    def _load(self):
+        if self._species_columns is not None:
+            dict.__setitem__(self, 'organisms', self._species_columns.views())
+            self._species_columns = None
+
+    def __missing__(self, key):
+        self._load()
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'organisms':
+            self._species_columns = None
+        dict.__setitem__(self, key, value)
+
+    def __contains__(self, key):
+        self._load()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self._load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._load()
+        return dict.__len__(self)
+
+    def __repr__(self):
+        self._load()
+        return dict.__repr__(self)
+
+    def get(self, key, default=None):
+        self._load()
+        return dict.get(self, key, default)
+
+    def keys(self):
+        self._load()
+        return dict.keys(self)
+
+    def values(self):
+        self._load()
+        return dict.values(self)
+
+    def items(self):
+        self._load()
+        return dict.items(self)
+
+    def copy(self):
+        self._load()
+        return dict(self)
+
+
+class OrganismView(Organism):
+    """
+    Organism backed by a single row of a SpeciesColumns instance.
+
+    Reading and writing attributes accesses the columns directly. Cloning a
+    view (as done by Organism.step, update_parameter, die, etc.) produces an
+    independent Organism object.
+    """
+
+    __slots__ = ('_species_columns', '_index')
+
+    def __init__(self, species_columns, index):
+        object.__setattr__(self, '_species_columns', species_columns)
+        object.__setattr__(self, '_index', index)
+
+    def __getattr__(self, name):
+        species_columns = object.__getattribute__(self, '_species_columns')
+        if name == '_dispatch':
+            return species_columns.dispatch_table
+        if name == '_custom_modules':
+            return species_columns.dispatch_table.custom_modules
+        if name in species_columns.columns:
+            return species_columns.get_value(
+                name, object.__getattribute__(self, '_index')
+            )
+        raise AttributeError(
+            "'OrganismView' object has no attribute '%s'" % name
+        )
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            self._species_columns.set_value(name, self._index, value)
+
+    def to_dict(self):
+        """
+        Convert OrganismView to dict.
+        """
+        return self._species_columns.row_dict(self._index)
+
+    @classmethod
+    def clone(cls, organism):
+        new_organism = object.__new__(Organism)
+        for field, value in organism.to_dict().items():
+            setattr(new_organism, field, value)
+        new_organism.ancestry = list(new_organism.ancestry)
+        new_organism._dispatch = organism._dispatch
+        new_organism._custom_modules = new_organism._dispatch.custom_modules
+        return new_organism
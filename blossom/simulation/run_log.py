@@ -0,0 +1,304 @@
+"""
+Append-only run log.
+
+Each run keeps a single JSON Lines file, with one record per time step
+(population statistics, timing and dataset size). Records are only ever
+appended, so readers such as the dashboard can follow a running simulation
+by reading from the byte offset where they last stopped.
+
+Compressed run logs (see :mod:`blossom.simulation.compression`) hold blocks
+of ``block_size`` records, each compressed as a single frame. Records of the
+block being filled are kept uncompressed in a pending file next to the log
+(with a ``.pending`` suffix), which is compressed and appended to the log as
+the block fills up, or when the run is closed. Readers see pending records as
+well, and offsets into compressed logs are pairs: the byte offset of the next
+frame, and the number of records after it that were already read.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from . import compression as cmp
+
+
+# Records per compressed block
+block_size = 64
+
+
+def log_filename(run_logs_dir, project_name, compression=None):
+    """
+    Get the filename of the run log in a run's log directory.
+    """
+    return cmp.add_suffix(Path(run_logs_dir) / f'{project_name}.jsonl',
+                          compression)
+
+
+def find_log(run_logs_dir, project_name):
+    """
+    Find the existing run log in a run's log directory, whether compressed
+    or not. Defaults to the uncompressed filename if there is none yet.
+    """
+    for compression in [None] + list(cmp.codecs):
+        fn = log_filename(run_logs_dir, project_name, compression)
+        if fn.is_file() or pending_filename(fn).is_file():
+            return fn
+    return log_filename(run_logs_dir, project_name)
+
+
+def pending_filename(fn):
+    """
+    Get the filename of the pending records of a compressed run log.
+    """
+    fn = Path(fn)
+    return fn.with_name(fn.name + '.pending')
+
+
+def _lines(f):
+    """
+    Iterate over the complete lines of an open file.
+    """
+    for line in f:
+        if not line.endswith(b'\n'):
+            break
+        yield line
+
+
+def _frame_end(fn, offset, compression):
+    """
+    Byte offset after the complete frame starting at an offset of a
+    compressed run log, or None if there is none.
+    """
+    with open(fn, 'rb') as f:
+        f.seek(offset)
+        for _, size in cmp.iter_frames(f, compression):
+            return offset + size
+    return None
+
+
+def _read_pending(fn):
+    """
+    Read the pending records of a compressed run log.
+
+    Returns
+    -------
+    block_offset : int or None
+        Byte offset in the log at which the pending block goes, or None if
+        there are no pending records.
+    lines : list of bytes
+        Pending records, as JSON lines.
+    """
+    pending_fn = pending_filename(fn)
+    if not pending_fn.is_file():
+        return None, []
+    with open(pending_fn, 'rb') as f:
+        lines = list(_lines(f))
+    if len(lines) == 0:
+        return None, []
+    return json.loads(lines[0])['block_offset'], lines[1:]
+
+
+def _write_pending(fn, block_offset, lines):
+    """
+    Replace the pending records of a compressed run log.
+    """
+    pending_fn = pending_filename(fn)
+    if len(lines) == 0:
+        if pending_fn.is_file():
+            pending_fn.unlink()
+        return
+    header = (json.dumps({'block_offset': block_offset}) + '\n').encode()
+    with open(pending_fn, 'wb') as f:
+        f.write(header + b''.join(lines))
+
+
+def _write_block(fn, block_offset, lines, compression, level=None):
+    """
+    Compress records as a block at a byte offset of a compressed run log,
+    replacing anything after it, and clear the pending records.
+    """
+    with open(fn, 'r+b' if os.path.isfile(fn) else 'wb') as f:
+        f.seek(block_offset)
+        f.truncate()
+        f.write(cmp.compress(b''.join(lines), compression, level))
+    _write_pending(fn, None, [])
+
+
+def _pending_block(fn, compression):
+    """
+    Byte offset and records of the block being filled in a compressed run
+    log. Pending records whose block was already written to the log, e.g.
+    if the process stopped right after writing it, are dropped.
+    """
+    size = os.path.getsize(fn) if os.path.isfile(fn) else 0
+    block_offset, lines = _read_pending(fn)
+    if block_offset is None:
+        return size, []
+    if (block_offset < size
+            and _frame_end(fn, block_offset, compression) is not None):
+        return size, []
+    return block_offset, lines
+
+
+def append(fn, record, cls=None, level=None):
+    """
+    Append a single record to a run log.
+
+    Parameters
+    ----------
+    fn : str
+        Run log filename.
+    record : dict
+        JSON-serializable record.
+    cls : json.JSONEncoder, optional
+        Encoder class for values that aren't natively serializable.
+    level : int, optional
+        Compression level, for compressed run logs.
+    """
+    line = (json.dumps(record, cls=cls) + '\n').encode()
+    compression = cmp.get_compression(fn)
+    if compression is None:
+        with open(fn, 'ab') as f:
+            f.write(line)
+        return
+    block_offset, lines = _pending_block(fn, compression)
+    lines.append(line)
+    if len(lines) >= block_size:
+        _write_block(fn, block_offset, lines, compression, level)
+    elif len(lines) > 1:
+        with open(pending_filename(fn), 'ab') as f:
+            f.write(line)
+    else:
+        _write_pending(fn, block_offset, lines)
+
+
+def flush(fn, level=None):
+    """
+    Compress the pending records of a compressed run log into a block of
+    their own, e.g. once the run is over.
+    """
+    compression = cmp.get_compression(fn)
+    if compression is None:
+        return
+    block_offset, lines = _pending_block(fn, compression)
+    if len(lines) > 0:
+        _write_block(fn, block_offset, lines, compression, level)
+    else:
+        _write_pending(fn, None, [])
+
+
+def read(fn, offset=0, limit=None):
+    """
+    Read the records of a run log, starting at an offset.
+
+    Only complete records are read, so a record that is still being written
+    is picked up by the next call.
+
+    Parameters
+    ----------
+    fn : str
+        Run log filename.
+    offset : int or tuple
+        Offset to start reading from, usually returned by a previous call:
+        a byte offset for uncompressed run logs, and a pair of a byte offset
+        and a number of records to skip for compressed ones. Defaults to the
+        start of the log.
+    limit : int, optional
+        Maximum number of records to read, e.g. 1 to only read the first
+        record. All records if None.
+
+    Returns
+    -------
+    records : list of dict
+        Records read.
+    offset : int or tuple
+        Offset after the last record read, to continue from.
+    """
+    records = []
+    compression = cmp.get_compression(fn)
+    if compression is None:
+        if not os.path.isfile(fn):
+            return records, offset
+        with open(fn, 'rb') as f:
+            f.seek(offset)
+            for line in _lines(f):
+                if limit is not None and len(records) >= limit:
+                    break
+                offset += len(line)
+                if line.strip():
+                    records.append(json.loads(line))
+        return records, offset
+
+    def take(lines, skip):
+        # Records of a block past the ones already read, up to the limit
+        lines = lines[skip:]
+        if limit is not None:
+            lines = lines[:limit - len(records)]
+        records.extend(json.loads(line) for line in lines if line.strip())
+        return skip + len(lines)
+
+    block_offset, skip = (offset, 0) if isinstance(offset, int) else offset
+    if os.path.isfile(fn):
+        with open(fn, 'rb') as f:
+            f.seek(block_offset)
+            for frame, size in cmp.iter_frames(f, compression):
+                if limit is not None and len(records) >= limit:
+                    return records, (block_offset, skip)
+                lines = frame.splitlines(keepends=True)
+                taken = take(lines, skip)
+                if taken < len(lines):
+                    return records, (block_offset, taken)
+                block_offset += size
+                skip = max(0, skip - len(lines))
+    pending_offset, pending = _read_pending(fn)
+    if pending_offset != block_offset or len(pending) < skip:
+        return records, (block_offset, skip)
+    return records, (block_offset, take(pending, skip))
+
+
+def _until(lines, timestep):
+    """
+    Records up to a given time step.
+    """
+    for i, line in enumerate(lines):
+        if line.strip() and json.loads(line)['world']['timestep'] > timestep:
+            return lines[:i]
+    return lines
+
+
+def truncate(fn, timestep):
+    """
+    Drop records after a given time step, e.g. when a run is resumed from an
+    earlier checkpoint and these time steps are about to be logged again.
+    """
+    compression = cmp.get_compression(fn)
+    if compression is None:
+        if not os.path.isfile(fn):
+            return
+        offset = 0
+        with open(fn, 'rb') as f:
+            for line in _lines(f):
+                if len(_until([line], timestep)) == 0:
+                    break
+                offset += len(line)
+        with open(fn, 'r+b') as f:
+            f.truncate(offset)
+        return
+
+    # Records kept from a block cut short become the pending records
+    offset, lines = 0, None
+    if os.path.isfile(fn):
+        with open(fn, 'rb') as f:
+            for frame, size in cmp.iter_frames(f, compression):
+                block_lines = frame.splitlines(keepends=True)
+                kept = _until(block_lines, timestep)
+                if len(kept) < len(block_lines):
+                    lines = kept
+                    break
+                offset += size
+        with open(fn, 'r+b') as f:
+            f.truncate(offset)
+    if lines is None:
+        pending_offset, pending = _read_pending(fn)
+        lines = _until(pending, timestep) if pending_offset == offset else []
+    _write_pending(fn, offset, lines)
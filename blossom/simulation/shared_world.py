@@ -0,0 +1,173 @@
+"""
+World grids in shared memory, for the parallel engine's worker processes.
+
+With SharedLayers, each world layer (water, food, obstacles) is kept in a
+``multiprocessing.shared_memory`` block, and the world works on a NumPy view
+of it. Worker processes attach to the blocks by name, so the grids are never
+pickled, and behaviors change them in place.
+
+Ownership and synchronization:
+
+- The universe's process owns the blocks. It is the only one to create,
+  resize and free them, and only touches them between parallel phases of a
+  time step, while no tile is being stepped.
+- While tiles are stepped, each tile has exclusive access to the cells inside
+  it. Behaviors must only read and change the cell an organism is on, which
+  is in the organism's tile (as built-in drinking and eating do), so tiles
+  never touch the same cell and no locks are needed. Results are the same as
+  when each tile works on its own copy of the world.
+- Workers keep their attachments between time steps, and never free blocks.
+
+Blocks are freed by :meth:`SharedLayers.close`, which ``Universe.close``
+calls when a run ends, including on errors. Blocks of layers that were never
+closed are freed when the SharedLayers object is garbage collected or the
+interpreter exits.
+"""
+
+import weakref
+from multiprocessing import shared_memory
+import numpy as np
+
+from .layer_store import world_layers
+
+
+def _release(segments):
+    """
+    Close and free shared memory blocks.
+    """
+    for segment in segments.values():
+        try:
+            segment.close()
+        except BufferError:
+            # NumPy views are still alive somewhere; the memory is released
+            # once they are gone
+            pass
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+    segments.clear()
+
+
+class SharedLayers(object):
+    """
+    Shared memory blocks backing the layers of a single world.
+    """
+
+    def __init__(self):
+        self.segments = {}
+        self.views = {}
+        self.descriptors = {}
+        self._finalizer = weakref.finalize(self, _release, self.segments)
+
+    def _allocate(self, name, layer):
+        if name in self.segments:
+            self._free(name)
+        segment = shared_memory.SharedMemory(create=True,
+                                             size=max(layer.nbytes, 1))
+        self.segments[name] = segment
+        self.views[name] = np.ndarray(layer.shape,
+                                      dtype=layer.dtype,
+                                      buffer=segment.buf)
+        self.descriptors[name] = {'segment': segment.name,
+                                  'shape': layer.shape,
+                                  'dtype': layer.dtype.str}
+
+    def _free(self, name):
+        del self.views[name]
+        del self.descriptors[name]
+        _release({name: self.segments.pop(name)})
+
+    def share(self, world):
+        """
+        Move the world's layers into shared memory, if they aren't already.
+        Layers that were replaced since the last call (e.g. by a LayerStore)
+        are copied into their blocks, which are resized if needed.
+
+        Parameters
+        ----------
+        world : World
+            World whose layers to share. Its layers are set to views of the
+            shared blocks.
+
+        Returns
+        -------
+        descriptors : dict
+            Name, shape and dtype of the block of each shared layer, keyed by
+            field name, for :func:`attach`.
+        """
+        for name in world_layers:
+            layer = getattr(world, name, None)
+            if layer is None:
+                if name in self.segments:
+                    self._free(name)
+                continue
+            view = self.views.get(name)
+            if layer is view:
+                continue
+            layer = np.asarray(layer)
+            if (view is None or view.shape != layer.shape
+                    or view.dtype != layer.dtype):
+                self._allocate(name, layer)
+            self.views[name][...] = layer
+            setattr(world, name, self.views[name])
+        return self.descriptors
+
+    def close(self, world=None):
+        """
+        Free the shared memory blocks.
+
+        Parameters
+        ----------
+        world : World, optional
+            World using the layers, whose layers are replaced by private
+            copies so that it stays usable.
+        """
+        if world is not None:
+            for name, view in self.views.items():
+                if getattr(world, name, None) is view:
+                    setattr(world, name, np.array(view))
+        self.views.clear()
+        self.descriptors.clear()
+        self._finalizer()
+
+
+# Blocks attached by this (worker) process, keyed by block name
+_attached = {}
+
+
+def attach(descriptors):
+    """
+    Attach to shared layers from a worker process. Attachments are kept for
+    later time steps, and blocks that are no longer in use are detached.
+
+    Parameters
+    ----------
+    descriptors : dict
+        Shared layers, as returned by :meth:`SharedLayers.share`.
+
+    Returns
+    -------
+    layers : dict of np.ndarray
+        Views of the shared layers, keyed by field name.
+    """
+    in_use = {descriptor['segment'] for descriptor in descriptors.values()}
+    for segment_name in list(_attached):
+        if segment_name not in in_use:
+            segment, _ = _attached.pop(segment_name)
+            try:
+                segment.close()
+            except BufferError:
+                pass
+
+    layers = {}
+    for name, descriptor in descriptors.items():
+        segment_name = descriptor['segment']
+        if segment_name not in _attached:
+            segment = shared_memory.SharedMemory(name=segment_name)
+            view = np.ndarray(descriptor['shape'],
+                              dtype=np.dtype(descriptor['dtype']),
+                              buffer=segment.buf)
+            _attached[segment_name] = (segment, view)
+        layers[name] = _attached[segment_name][1]
+    return layers
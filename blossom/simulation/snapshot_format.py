@@ -0,0 +1,653 @@
+"""
+Binary columnar snapshot format.
+
+A snapshot is a NumPy ``.npz`` archive holding one array per organism field
+and species, plus the world grids. Everything else (world parameters, species
+statistics, and how each column is encoded) goes into a small JSON header,
+stored in the archive as the byte array ``header``.
+
+Columns are encoded according to their contents:
+
+- ``array``: numeric and boolean columns are stored as they are
+- ``constant``: object columns with the same value in every row (such as
+  species parameters) are stored once, in the header
+- ``categorical``: columns of strings or None are stored as integer codes,
+  with the distinct values in the header
+- ``ragged``: columns of integer lists (such as ancestry) are stored as the
+  concatenated values and the length of each list
+- ``json``: anything else is stored as a list in the header
+
+Snapshots can also be saved as deltas against an earlier full snapshot (a
+keyframe). A delta stores which of the keyframe's organisms are gone, the
+organisms born since, and for every other field only the rows that changed
+(or the whole column, if most rows changed). Grids are stored the same way,
+as the indices and values of changed cells.
+"""
+
+import copy
+import numpy as np
+
+from .world import World
+from .layer_store import world_layers, is_reference, load_layer
+from .population_store import PopulationStore, SpeciesColumns, \
+    categorical_fields
+
+
+FORMAT = 'blossom-columnar'
+VERSION = 2
+
+
+def _is_int(value):
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def _is_constant(values):
+    try:
+        return (len(values) > 0
+                and all(value == values[0] for value in values))
+    except ValueError:
+        # Ambiguous comparisons, e.g. of arrays
+        return False
+
+
+def encode_column(key, field, column):
+    """
+    Encode a single column.
+
+    Parameters
+    ----------
+    key : str
+        Prefix for the names of arrays storing the column.
+    field : str
+        Organism field name.
+    column : np.ndarray
+        Column to encode.
+
+    Returns
+    -------
+    spec : dict
+        JSON-serializable description of the encoding.
+    arrays : dict of np.ndarray
+        Arrays to store, keyed by name.
+    """
+    if column.dtype.kind in 'biuf':
+        spec = {'kind': 'array'}
+        if field in categorical_fields and column.dtype.kind in 'iu':
+            spec['categories'] = categorical_fields[field].values
+        return spec, {key: column}
+
+    values = column.tolist()
+    if _is_constant(values):
+        return {'kind': 'constant', 'value': values[0]}, {}
+    if all(value is None or isinstance(value, str) for value in values):
+        codes = {}
+        for value in values:
+            codes.setdefault(value, len(codes))
+        return (
+            {'kind': 'categorical', 'categories': list(codes)},
+            {key: np.array([codes[value] for value in values],
+                           dtype='int32')}
+        )
+    if all(isinstance(value, list) and all(_is_int(x) for x in value)
+           for value in values):
+        lengths = np.array([len(value) for value in values], dtype='int64')
+        flat = np.fromiter((x for value in values for x in value),
+                           dtype='int64',
+                           count=int(lengths.sum()))
+        return (
+            {'kind': 'ragged'},
+            {f'{key}/values': flat, f'{key}/lengths': lengths}
+        )
+    return {'kind': 'json', 'values': values}, {}
+
+
+def decode_column(key, field, spec, arrays, n):
+    """
+    Decode a single column, reversing :func:`encode_column`.
+
+    Parameters
+    ----------
+    key : str
+        Prefix for the names of arrays storing the column.
+    field : str
+        Organism field name.
+    spec : dict
+        Description of the encoding.
+    arrays : mapping of np.ndarray
+        Stored arrays, keyed by name. May be a lazily loaded NpzFile.
+    n : int
+        Number of rows.
+
+    Returns
+    -------
+    column : np.ndarray
+        Decoded column.
+    """
+    kind = spec['kind']
+    if kind == 'array':
+        column = arrays[key]
+        if 'categories' in spec:
+            # Codes are only meaningful within a process, so map the stored
+            # categories onto the current ones
+            categories = categorical_fields[field]
+            mapping = np.array([categories.code(value)
+                                for value in spec['categories']],
+                               dtype=categories.dtype)
+            column = mapping[column]
+        return column
+
+    column = np.empty(n, dtype=object)
+    if kind == 'constant':
+        value = spec['value']
+        if isinstance(value, (list, dict)):
+            for i in range(n):
+                column[i] = copy.deepcopy(value)
+        else:
+            column[:] = value
+    elif kind == 'categorical':
+        categories = np.empty(len(spec['categories']), dtype=object)
+        categories[:] = spec['categories']
+        column[:] = categories[arrays[key]]
+    elif kind == 'ragged':
+        lengths = arrays[f'{key}/lengths']
+        flat = arrays[f'{key}/values']
+        for i, value in enumerate(np.split(flat, np.cumsum(lengths)[:-1])
+                                  if n > 0 else []):
+            column[i] = value.tolist()
+    elif kind == 'json':
+        for i, value in enumerate(spec['values']):
+            column[i] = value
+    else:
+        raise ValueError(f'Unknown column encoding: {kind}')
+    return column
+
+
+def encode_population(population, statistics=None):
+    """
+    Encode a population stored in columns.
+
+    Parameters
+    ----------
+    population : PopulationStore
+        Population to encode.
+    statistics : dict, optional
+        Statistics per species to store, as in population dicts. Computed
+        from the columns if not provided.
+
+    Returns
+    -------
+    header : dict
+        Population part of the snapshot header.
+    arrays : dict of np.ndarray
+        Arrays to store, keyed by name.
+    """
+    header = {'species': []}
+    arrays = {}
+    for i, species in enumerate(population.species_names):
+        species_columns = population.species[species]
+        if statistics is None:
+            species_statistics = species_columns.statistics()
+        else:
+            species_statistics = statistics[species]
+        fields = {}
+        for field, column in species_columns.columns.items():
+            spec, field_arrays = encode_column(f'population/{i}/{field}',
+                                               field,
+                                               column)
+            fields[field] = spec
+            arrays.update(field_arrays)
+        header['species'].append({
+            'name': species,
+            'count': len(species_columns),
+            'dimensionality': species_columns.dimensionality,
+            'statistics': species_statistics,
+            'fields': fields
+        })
+    return header, arrays
+
+
+def decode_population(header, arrays, fields=None):
+    """
+    Decode a population, reversing :func:`encode_population`.
+
+    Parameters
+    ----------
+    header : dict
+        Population part of the snapshot header.
+    arrays : mapping of np.ndarray
+        Stored arrays, keyed by name.
+    fields : list of str, optional
+        Only decode these fields.
+
+    Returns
+    -------
+    population : PopulationStore
+        Decoded population.
+    statistics : dict
+        Stored statistics per species.
+    """
+    species_columns = {}
+    statistics = {}
+    for i, species_header in enumerate(header['species']):
+        species = species_header['name']
+        columns = {}
+        for field, spec in species_header['fields'].items():
+            if fields is not None and field not in fields:
+                continue
+            columns[field] = decode_column(f'population/{i}/{field}',
+                                           field,
+                                           spec,
+                                           arrays,
+                                           species_header['count'])
+        species_columns[species] = SpeciesColumns(
+            species,
+            columns,
+            dimensionality=species_header['dimensionality']
+        )
+        statistics[species] = species_header['statistics']
+    population = PopulationStore(
+        species_columns,
+        [species_header['name'] for species_header in header['species']]
+    )
+    return population, statistics
+
+
+def encode_world(world, references=None):
+    """
+    Encode a world.
+
+    Parameters
+    ----------
+    world : World
+        World to encode.
+    references : dict, optional
+        References to layers saved separately (see
+        :mod:`blossom.simulation.layer_store`), which are stored in the
+        header instead of as arrays.
+
+    Returns
+    -------
+    header : dict
+        World part of the snapshot header, with all non-grid fields.
+    arrays : dict of np.ndarray
+        World grids, keyed by name.
+    """
+    references = references or {}
+    header = {}
+    arrays = {}
+    for field, value in world.to_dict().items():
+        if field in references:
+            header[field] = references[field]
+        elif field in world_layers and value is not None:
+            arrays[f'world/{field}'] = np.asarray(value)
+        elif isinstance(value, np.ndarray):
+            arrays[f'world/{field}'] = value
+        else:
+            header[field] = value
+    return header, arrays
+
+
+def decode_world(header, arrays, data_dir=None):
+    """
+    Decode a world, reversing :func:`encode_world`. Referenced layers are
+    opened as memory maps, relative to data_dir.
+    """
+    init_dict = {}
+    for field, value in header.items():
+        if is_reference(value):
+            value = load_layer(data_dir, value)
+        init_dict[field] = value
+    for key in arrays:
+        if key.startswith('world/'):
+            init_dict[key[len('world/'):]] = arrays[key]
+    return World(init_dict)
+
+
+def _equal(a, b):
+    try:
+        return type(a) is type(b) and bool(a == b)
+    except (ValueError, TypeError):
+        # Ambiguous comparisons, e.g. of arrays
+        return False
+
+
+def _changed_rows(old, new):
+    """
+    Mask of rows that differ between two columns of equal length, or None if
+    the columns can't be compared row by row (e.g. their dtypes differ).
+    """
+    if old.dtype != new.dtype or old.shape != new.shape:
+        return None
+    if len(new) == 0:
+        return np.zeros(0, dtype=bool)
+    if new.dtype.kind in 'biuf':
+        changed = old != new
+        if new.dtype.kind == 'f':
+            changed &= ~(np.isnan(old) & np.isnan(new))
+        return changed.reshape(len(new), -1).any(axis=1)
+    return np.fromiter((not _equal(a, b) for a, b in zip(old, new)),
+                       dtype=bool,
+                       count=len(new))
+
+
+def _match_ids(keyframe_ids, ids):
+    """
+    Row of each organism in the keyframe, or -1 for organisms not in it.
+    """
+    source = np.full(len(ids), -1, dtype='int64')
+    if len(keyframe_ids) == 0 or len(ids) == 0:
+        return source
+    order = np.argsort(keyframe_ids, kind='stable')
+    sorted_ids = keyframe_ids[order]
+    positions = np.minimum(np.searchsorted(sorted_ids, ids),
+                           len(sorted_ids) - 1)
+    found = sorted_ids[positions] == ids
+    source[found] = order[positions[found]]
+    return source
+
+
+def encode_species_delta(key, keyframe, species_columns):
+    """
+    Encode the columns of a single species as a delta against a keyframe.
+
+    Organisms are matched to the keyframe by ID. Survivors are stored as the
+    keyframe rows they came from: either as the rows removed since the
+    keyframe, if survivors kept their order and births were appended, or
+    otherwise as the source row of every organism.
+
+    Parameters
+    ----------
+    key : str
+        Prefix for the names of arrays storing the species.
+    keyframe : SpeciesColumns or None
+        Columns of the species in the keyframe, if it was present.
+    species_columns : SpeciesColumns
+        Current columns of the species.
+
+    Returns
+    -------
+    header : dict
+        JSON-serializable description of the delta.
+    arrays : dict of np.ndarray
+        Arrays to store, keyed by name.
+    """
+    keyframe_columns = keyframe.columns if keyframe is not None else {}
+    keyframe_count = len(keyframe) if keyframe is not None else 0
+    ids = species_columns.columns['organism_id']
+    source = _match_ids(
+        keyframe_columns.get('organism_id', np.empty(0, dtype=ids.dtype)),
+        ids
+    )
+    survived = source >= 0
+    kept = source[survived]
+    n_survivors = len(kept)
+
+    arrays = {}
+    if survived[:n_survivors].all() and np.all(np.diff(kept) > 0):
+        order = 'keyframe'
+        arrays[f'{key}/removed'] = np.setdiff1d(np.arange(keyframe_count),
+                                                kept)
+    else:
+        order = 'permuted'
+        arrays[f'{key}/source'] = source
+
+    fields = {}
+    for field, column in species_columns.columns.items():
+        field_key = f'{key}/{field}'
+        survivors = column[survived]
+        changed = None
+        if field in keyframe_columns:
+            changed = _changed_rows(keyframe_columns[field][kept], survivors)
+        if changed is not None and not changed.any():
+            survivors_spec = {'kind': 'unchanged'}
+        elif changed is not None and 2 * changed.sum() <= n_survivors:
+            rows = np.flatnonzero(changed)
+            spec, field_arrays = encode_column(f'{field_key}/survivors',
+                                               field,
+                                               survivors[rows])
+            survivors_spec = {'kind': 'sparse', 'values': spec}
+            arrays[f'{field_key}/rows'] = rows
+            arrays.update(field_arrays)
+        else:
+            spec, field_arrays = encode_column(f'{field_key}/survivors',
+                                               field,
+                                               survivors)
+            survivors_spec = {'kind': 'full', 'values': spec}
+            arrays.update(field_arrays)
+
+        born_spec = None
+        if n_survivors < len(column):
+            born_spec, field_arrays = encode_column(f'{field_key}/born',
+                                                    field,
+                                                    column[~survived])
+            arrays.update(field_arrays)
+        fields[field] = {'survivors': survivors_spec, 'born': born_spec}
+
+    header = {
+        'name': species_columns.species_name,
+        'count': len(species_columns),
+        'dimensionality': species_columns.dimensionality,
+        'keyframe_count': keyframe_count,
+        'survivors': n_survivors,
+        'order': order,
+        'fields': fields
+    }
+    return header, arrays
+
+
+def decode_species_delta(key, keyframe, header, arrays, fields=None):
+    """
+    Decode the columns of a single species, reversing
+    :func:`encode_species_delta`.
+
+    Parameters
+    ----------
+    key : str
+        Prefix for the names of arrays storing the species.
+    keyframe : SpeciesColumns or None
+        Columns of the species in the keyframe, if it was present.
+    header : dict
+        Description of the delta.
+    arrays : mapping of np.ndarray
+        Stored arrays, keyed by name.
+    fields : list of str, optional
+        Only decode these fields.
+
+    Returns
+    -------
+    species_columns : SpeciesColumns
+        Decoded columns.
+    """
+    n_survivors = header['survivors']
+    n_born = header['count'] - n_survivors
+    if header['order'] == 'keyframe':
+        kept = np.delete(np.arange(header['keyframe_count']),
+                         arrays[f'{key}/removed'])
+        positions = None
+    else:
+        source = arrays[f'{key}/source']
+        survived = source >= 0
+        kept = source[survived]
+        positions = np.concatenate([np.flatnonzero(survived),
+                                    np.flatnonzero(~survived)])
+
+    columns = {}
+    for field, spec in header['fields'].items():
+        if fields is not None and field not in fields:
+            continue
+        field_key = f'{key}/{field}'
+        survivors_spec = spec['survivors']
+        if survivors_spec['kind'] == 'full':
+            survivors = decode_column(f'{field_key}/survivors',
+                                      field,
+                                      survivors_spec['values'],
+                                      arrays,
+                                      n_survivors)
+        else:
+            survivors = keyframe.columns[field][kept]
+            if survivors_spec['kind'] == 'sparse':
+                rows = arrays[f'{field_key}/rows']
+                survivors[rows] = decode_column(f'{field_key}/survivors',
+                                                field,
+                                                survivors_spec['values'],
+                                                arrays,
+                                                len(rows))
+        if spec['born'] is not None:
+            born = decode_column(f'{field_key}/born',
+                                 field,
+                                 spec['born'],
+                                 arrays,
+                                 n_born)
+            column = np.concatenate([survivors, born])
+        else:
+            column = survivors
+        if positions is not None:
+            ordered = np.empty_like(column)
+            ordered[positions] = column
+            column = ordered
+        columns[field] = column
+    return SpeciesColumns(header['name'],
+                          columns,
+                          dimensionality=header['dimensionality'])
+
+
+def encode_population_delta(keyframe, population, statistics=None):
+    """
+    Encode a population stored in columns as a delta against a keyframe.
+
+    Parameters
+    ----------
+    keyframe : PopulationStore
+        Population saved in the keyframe.
+    population : PopulationStore
+        Population to encode.
+    statistics : dict, optional
+        Statistics per species to store, as in population dicts. Computed
+        from the columns if not provided.
+
+    Returns
+    -------
+    header : dict
+        Population part of the snapshot header.
+    arrays : dict of np.ndarray
+        Arrays to store, keyed by name.
+    """
+    header = {'species': []}
+    arrays = {}
+    for i, species in enumerate(population.species_names):
+        species_columns = population.species[species]
+        species_header, species_arrays = encode_species_delta(
+            f'population/{i}',
+            keyframe.species.get(species),
+            species_columns
+        )
+        if statistics is None:
+            species_header['statistics'] = species_columns.statistics()
+        else:
+            species_header['statistics'] = statistics[species]
+        header['species'].append(species_header)
+        arrays.update(species_arrays)
+    return header, arrays
+
+
+def decode_population_delta(keyframe, header, arrays, fields=None):
+    """
+    Decode a population, reversing :func:`encode_population_delta`.
+
+    Parameters
+    ----------
+    keyframe : PopulationStore
+        Population saved in the keyframe, with at least the requested
+        fields.
+    header : dict
+        Population part of the snapshot header.
+    arrays : mapping of np.ndarray
+        Stored arrays, keyed by name.
+    fields : list of str, optional
+        Only decode these fields.
+
+    Returns
+    -------
+    population : PopulationStore
+        Decoded population.
+    statistics : dict
+        Stored statistics per species.
+    """
+    species_columns = {}
+    statistics = {}
+    for i, species_header in enumerate(header['species']):
+        species = species_header['name']
+        species_columns[species] = decode_species_delta(
+            f'population/{i}',
+            keyframe.species.get(species),
+            species_header,
+            arrays,
+            fields=fields
+        )
+        statistics[species] = species_header['statistics']
+    population = PopulationStore(
+        species_columns,
+        [species_header['name'] for species_header in header['species']]
+    )
+    return population, statistics
+
+
+def encode_grids_delta(keyframe_arrays, world_arrays):
+    """
+    Encode world grids as a delta against the grids of a keyframe.
+
+    Parameters
+    ----------
+    keyframe_arrays : mapping of np.ndarray
+        Grids saved in the keyframe, as returned by :func:`encode_world`.
+    world_arrays : dict of np.ndarray
+        Current grids, as returned by :func:`encode_world`.
+
+    Returns
+    -------
+    grids : dict
+        JSON-serializable description of how each grid is stored.
+    arrays : dict of np.ndarray
+        Arrays to store, keyed by name.
+    """
+    grids = {}
+    arrays = {}
+    for key, grid in world_arrays.items():
+        changed = None
+        if key in keyframe_arrays:
+            old = keyframe_arrays[key]
+            if old.shape == grid.shape and old.dtype == grid.dtype:
+                changed = _changed_rows(old.reshape(-1), grid.reshape(-1))
+        if changed is not None and not changed.any():
+            grids[key] = {'kind': 'unchanged'}
+        elif changed is not None and 2 * changed.sum() <= changed.size:
+            index = np.flatnonzero(changed)
+            grids[key] = {'kind': 'sparse'}
+            arrays[f'{key}/index'] = index
+            arrays[f'{key}/values'] = grid.reshape(-1)[index]
+        else:
+            grids[key] = {'kind': 'full'}
+            arrays[key] = grid
+    return grids, arrays
+
+
+def decode_grids_delta(keyframe_arrays, grids, arrays):
+    """
+    Decode world grids, reversing :func:`encode_grids_delta`.
+
+    Returns
+    -------
+    world_arrays : dict of np.ndarray
+        Grids keyed by name, to be passed to :func:`decode_world`.
+    """
+    world_arrays = {}
+    for key, spec in grids.items():
+        if spec['kind'] == 'full':
+            world_arrays[key] = arrays[key]
+        else:
+            grid = np.array(keyframe_arrays[key])
+            if spec['kind'] == 'sparse':
+                grid.reshape(-1)[arrays[f'{key}/index']] = \
+                    arrays[f'{key}/values']
+            world_arrays[key] = grid
+    return world_arrays
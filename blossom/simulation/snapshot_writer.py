@@ -0,0 +1,95 @@
+"""
+Background saving of universe datasets.
+
+Saving the state at every time step (serializing, writing the log and the
+random state) can take longer than the step itself. A SnapshotWriter saves
+copies of the universe state (see :class:`dataset_io.UniverseState`) on a
+separate thread, so the next step can be computed in the meantime.
+"""
+
+import atexit
+import queue
+import threading
+
+from . import dataset_io as dio
+
+
+class SnapshotWriter(object):
+    """
+    Thread saving universe states in the order they are submitted.
+
+    At most ``max_pending`` states wait in the queue; submitting more blocks
+    until the writer catches up, which bounds the memory held by pending
+    states. Errors raised while saving are re-raised in the submitting
+    thread, on the next call to submit, flush or close.
+    """
+
+    def __init__(self, max_pending=2):
+        """
+        Parameters
+        ----------
+        max_pending : int
+            Maximum number of states waiting to be saved.
+        """
+        if max_pending < 1:
+            raise ValueError('max_pending must be at least 1')
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run,
+                                        name='blossom-snapshot-writer',
+                                        daemon=True)
+        self._thread.start()
+        # Save everything that is still pending when the interpreter exits
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            state = self._queue.get()
+            try:
+                if state is None:
+                    return
+                if self._error is None:
+                    dio.save_universe(state, checkpoint=state.checkpoint)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError('Saving universe state failed') from error
+
+    def submit(self, state):
+        """
+        Queue a universe state for saving, waiting if too many states are
+        pending.
+
+        Parameters
+        ----------
+        state : UniverseState
+            Copy of the universe state.
+        """
+        if self._closed:
+            raise RuntimeError('SnapshotWriter is closed')
+        self._raise_error()
+        self._queue.put(state)
+
+    def flush(self):
+        """
+        Wait until all submitted states are saved.
+        """
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Save all pending states and stop the writer thread.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+            atexit.unregister(self.close)
+        self._raise_error()
@@ -0,0 +1,110 @@
+"""
+Conditions for stopping runs early.
+
+A stop condition is a callable taking the universe, checked after every time
+step of ``Universe.run``, which returns a reason for stopping (e.g.
+'extinction'), or None to carry on. A run that stops early saves a final
+checkpoint and logs its last time step as usual, and the reason is kept in
+``Universe.stop_reason``. Conditions run in worker processes during sweeps,
+so they should be picklable, i.e. module-level functions or instances of
+module-level classes, like the built-in ones.
+"""
+
+
+def alive_counts(universe):
+    """
+    Number of living organisms of each species.
+    """
+    return {species: universe.population_dict[species]['statistics']['alive']
+            for species in universe.population_dict}
+
+
+class Extinction(object):
+    """
+    Stop when species have no living organisms left.
+    """
+
+    def __init__(self, species=None, any_species=False):
+        """
+        Parameters
+        ----------
+        species : str or list of str, optional
+            Species to watch. Defaults to all species.
+        any_species : bool
+            Whether to stop as soon as any watched species is extinct, rather
+            than once they all are.
+        """
+        if isinstance(species, str):
+            species = [species]
+        self.species = species
+        self.any_species = any_species
+
+    def __call__(self, universe):
+        counts = alive_counts(universe)
+        species = self.species if self.species is not None else list(counts)
+        extinct = [counts.get(name, 0) == 0 for name in species]
+        if any(extinct) if self.any_species else all(extinct):
+            return 'extinction'
+        return None
+
+
+class Explosion(object):
+    """
+    Stop when the number of living organisms exceeds a limit.
+    """
+
+    def __init__(self, limit, species=None):
+        """
+        Parameters
+        ----------
+        limit : int
+            Maximum number of living organisms.
+        species : str or list of str, optional
+            Species counted. Defaults to all species.
+        """
+        if isinstance(species, str):
+            species = [species]
+        self.limit = limit
+        self.species = species
+
+    def __call__(self, universe):
+        counts = alive_counts(universe)
+        species = self.species if self.species is not None else list(counts)
+        if sum(counts.get(name, 0) for name in species) > self.limit:
+            return 'explosion'
+        return None
+
+
+def from_spec(stop_spec):
+    """
+    Build stop conditions from a spec, as found in sweep specs, e.g.
+    ``{'extinction': True, 'explosion': 10000}``.
+
+    Parameters
+    ----------
+    stop_spec : dict
+        Either 'extinction' (True for the extinction of all species, or the
+        species to watch, any of which going extinct stops the run), and
+        'explosion' (the limit on living organisms of all species, or a dict
+        with 'limit' and 'species').
+
+    Returns
+    -------
+    conditions : list of callable
+        Stop conditions.
+    """
+    conditions = []
+    for name, value in (stop_spec or {}).items():
+        if name == 'extinction':
+            if value is True:
+                conditions.append(Extinction())
+            elif value:
+                conditions.append(Extinction(value, any_species=True))
+        elif name == 'explosion':
+            if isinstance(value, dict):
+                conditions.append(Explosion(**value))
+            else:
+                conditions.append(Explosion(value))
+        else:
+            raise ValueError(f'Invalid stop condition: {name}')
+    return conditions
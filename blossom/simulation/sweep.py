@@ -0,0 +1,661 @@
+"""
+Parameter sweeps over the fields of a config file.
+
+A sweep spec names the config to start from, and the parameters to vary, by
+their dotted path in the config, e.g. ``species[0].drinking.metabolism`` or
+``world.water.peak``. List items can be selected by index, or by name for
+lists of named items such as species (``species[prey].max_age``). A spec is
+a dict, or a YAML file, such as::
+
+    config: config.yml
+    method: lhs          # grid, random or lhs (Latin hypercube)
+    samples: 50          # number of points, for random and lhs
+    sample_seed: 0       # seed for drawing the points
+    seeds: 2             # seeds per point (a number or a list)
+    parameters:
+      species[prey].drinking.metabolism: {low: 1, high: 4, integer: true}
+      world.water.peak: {low: 50, high: 500, log: true}
+      species[prey].movement: [simple_random, stay]
+
+Parameters are given as a list of values, a range (``low`` and ``high``,
+with ``num`` points for grids, optionally spaced logarithmically with
+``log`` and rounded with ``integer``), or a single fixed value. Grids run
+every combination of values. Random and Latin hypercube sweeps draw
+``samples`` points, picking list values uniformly.
+
+Every point is run with every seed, in a pool of worker processes. The
+outcome of each run is gathered in a single npz file of columns (see
+:func:`load_results`), with one row per run, keyed by the parameter values.
+Failed runs and runs that exceeded the organism limit are recorded with
+their status, without stopping the sweep. Runs only save checkpoints at their
+start and end, unless the config says otherwise.
+
+Runs can stop early, e.g. once all species are extinct or the population
+explodes, with stop conditions (see :mod:`blossom.simulation.stopping`)::
+
+    stop:
+      extinction: true     # or the species to watch, e.g. [prey]
+      explosion: 20000     # limit on living organisms
+
+Adaptive sweeps use successive halving to spend time steps on the most
+promising points. All points are first run for ``min_timesteps`` time steps.
+Points with a run that failed or stopped early drop out, and only the best
+``1 / eta`` of the others, by mean score over their seeds, are resumed from
+their last checkpoint for ``eta`` times as many time steps, and so on until
+the config's number of time steps. If every point of a round drops out, as
+many of the next-ranked points of the round before are promoted instead.
+Runs of points that drop out or aren't promoted are recorded as ``pruned``,
+unless they failed or stopped early themselves::
+
+    adaptive:
+      min_timesteps: 10
+      eta: 3
+      score: coexistence   # or population
+
+The built-in scores are the final number of living organisms of the
+rarest species (``coexistence``) and of all species (``population``).
+"""
+
+import re
+import copy
+import json
+import datetime
+import itertools
+from pathlib import Path
+import click
+import numpy as np
+import yaml
+
+from . import run_log
+from . import stopping
+from . import dataset_io as dio
+from .utils import cast_to_list
+from .universe import config_options, universe_options
+from .ensemble import run_replicates, report
+
+
+methods = ['grid', 'random', 'lhs']
+
+# Value of integer result columns for runs that didn't get that far
+MISSING = -1
+
+
+def parse_path(path):
+    """
+    Split a dotted config path into keys.
+
+    Parameters
+    ----------
+    path : str
+        Dotted path, e.g. 'species[0].drinking.metabolism'.
+
+    Returns
+    -------
+    keys : list of str or int
+        Dict keys, list indices (int) and list item names (str, within
+        brackets in the path), e.g. ['species', 0, 'drinking',
+        'metabolism'].
+    """
+    keys = []
+    for part in path.split('.'):
+        match = re.fullmatch(r'([^\[\]]+)((?:\[[^\[\]]+\])*)', part)
+        if match is None:
+            raise ValueError(f'Invalid config path: {path}')
+        keys.append(match.group(1))
+        for selector in re.findall(r'\[([^\[\]]+)\]', match.group(2)):
+            if re.fullmatch(r'-?\d+', selector):
+                keys.append(int(selector))
+            else:
+                keys.append(('name', selector))
+    return keys
+
+
+def _child_key(container, key, path):
+    """
+    Key or index of a child of a config container.
+    """
+    if isinstance(container, list):
+        if isinstance(key, int):
+            if -len(container) <= key < len(container):
+                return key
+        elif isinstance(key, tuple):
+            for i, item in enumerate(container):
+                if isinstance(item, dict) and item.get('name') == key[1]:
+                    return i
+    elif isinstance(container, dict) and not isinstance(key, (int, tuple)):
+        if key in container:
+            return key
+    raise ValueError(f'Config path not found: {path}')
+
+
+def get_value(cfg, path):
+    """
+    Get the value at a dotted path in a config.
+    """
+    value = cfg
+    for key in parse_path(path):
+        value = value[_child_key(value, key, path)]
+    return value
+
+
+def set_value(cfg, path, value):
+    """
+    Set the value at a dotted path in a config, in place. The path must
+    already exist, except for the top-level Universe options (e.g.
+    'organism_limit').
+    """
+    keys = parse_path(path)
+    if len(keys) == 1 and keys[0] in config_options:
+        cfg[keys[0]] = value
+        return
+    container = cfg
+    for key in keys[:-1]:
+        container = container[_child_key(container, key, path)]
+    container[_child_key(container, keys[-1], path)] = value
+
+
+def _to_python(values):
+    return [value.item() if isinstance(value, np.generic) else value
+            for value in values]
+
+
+def _grid_values(parameter, path):
+    """
+    Values of a parameter on a grid.
+    """
+    if isinstance(parameter, list):
+        return parameter
+    if not isinstance(parameter, dict):
+        return [parameter]
+    if 'num' not in parameter:
+        raise ValueError(f'Grid ranges need a number of points (num): {path}')
+    space = np.geomspace if parameter.get('log') else np.linspace
+    values = space(parameter['low'], parameter['high'], parameter['num'])
+    if parameter.get('integer'):
+        values = np.unique(np.round(values).astype(int))
+    return _to_python(values)
+
+
+def _scale(parameter, u):
+    """
+    Values of a parameter at quantiles u in [0, 1).
+    """
+    if isinstance(parameter, list):
+        return [parameter[int(x * len(parameter))] for x in u]
+    if not isinstance(parameter, dict):
+        return [parameter] * len(u)
+    low, high = parameter['low'], parameter['high']
+    if parameter.get('log'):
+        values = np.exp(np.log(low) + u * (np.log(high) - np.log(low)))
+    else:
+        values = low + u * (high - low)
+    if parameter.get('integer'):
+        values = np.round(values).astype(int)
+    return _to_python(values)
+
+
+def sample_points(parameters, method='grid', samples=None, seed=None):
+    """
+    Draw the points of a sweep.
+
+    Parameters
+    ----------
+    parameters : dict
+        Parameters to vary, keyed by config path.
+    method : str
+        Either 'grid', 'random' or 'lhs' (Latin hypercube, which splits each
+        parameter's range into ``samples`` equal strata and draws one point
+        in each).
+    samples : int, optional
+        Number of points, for random and Latin hypercube sweeps.
+    seed : int, optional
+        Seed for drawing points.
+
+    Returns
+    -------
+    points : list of dict
+        Parameter values of each point, keyed by config path.
+    """
+    if method not in methods:
+        raise ValueError(f'Invalid sweep method: {method}')
+    paths = list(parameters)
+    if method == 'grid':
+        values = [_grid_values(parameters[path], path) for path in paths]
+        return [dict(zip(paths, combination))
+                for combination in itertools.product(*values)]
+
+    if samples is None or samples < 1:
+        raise ValueError(f'{method} sweeps need a number of samples')
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for path in paths:
+        if method == 'random':
+            u = rng.random(samples)
+        else:
+            u = (rng.permutation(samples) + rng.random(samples)) / samples
+        columns[path] = _scale(parameters[path], u)
+    return [{path: columns[path][i] for path in paths}
+            for i in range(samples)]
+
+
+def load_spec(spec_fn):
+    """
+    Read a sweep spec from a YAML file. The config path is made relative to
+    the current directory.
+    """
+    spec_fn = Path(spec_fn)
+    with open(spec_fn, 'r') as f:
+        spec = yaml.load(f, Loader=yaml.FullLoader)
+    if 'config' in spec:
+        spec['config'] = str(spec_fn.parent / spec['config'])
+    return spec
+
+
+def load_config(config_fn):
+    """
+    Read a config file as a dict, with linked module filenames resolved
+    relative to the config's directory.
+    """
+    config_fn = Path(config_fn).resolve()
+    with open(config_fn, 'r') as f:
+        cfg = yaml.load(f, Loader=yaml.FullLoader)
+    for species_cfg in cfg.get('species', []):
+        linked_modules = species_cfg.get('linked_modules')
+        if linked_modules is not None:
+            species_cfg['linked_modules'] = [
+                str(config_fn.parent / fn) for fn in cast_to_list(linked_modules)
+            ]
+    return cfg
+
+
+def run_outcome(project_dir, result):
+    """
+    Summarize a run from its run log: the last time step logged, and the
+    final and peak number of living organisms of each species.
+
+    Returns
+    -------
+    outcome : dict
+        Last logged time step ('timestep'), and final and peak counts, keyed
+        by species name ('final' and 'peak').
+    """
+    project_dir = Path(project_dir)
+    outcome = {'timestep': None, 'final': {}, 'peak': {}}
+    if result['run'] is None:
+        return outcome
+    log_fn = run_log.find_log(project_dir / 'logs' / result['run'],
+                              project_dir.name)
+    records, _ = run_log.read(log_fn)
+    for record in records:
+        outcome['timestep'] = record['world']['timestep']
+        for species, statistics in record['species'].items():
+            outcome['final'][species] = statistics['alive']
+            outcome['peak'][species] = max(outcome['peak'].get(species, 0),
+                                           statistics['alive'])
+    return outcome
+
+
+def coexistence(outcome):
+    """
+    Score a run by the final number of living organisms of its rarest
+    species.
+    """
+    return min(outcome['final'].values(), default=0)
+
+
+def population(outcome):
+    """
+    Score a run by its final number of living organisms.
+    """
+    return sum(outcome['final'].values())
+
+
+# Built-in scores for adaptive sweeps, by name
+scores = {'coexistence': coexistence, 'population': population}
+
+
+def rung_budgets(min_timesteps, max_timesteps, eta=3):
+    """
+    Time steps run by the points still in an adaptive sweep, at each round
+    (rung) of successive halving.
+    """
+    if min_timesteps < 1 or eta < 2:
+        raise ValueError('min_timesteps must be at least 1, and eta at '
+                         'least 2')
+    budgets = []
+    budget = min_timesteps
+    while budget < max_timesteps:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(max_timesteps)
+    return budgets
+
+
+def _column(values):
+    if all(isinstance(value, (bool, np.bool_)) for value in values):
+        return np.array(values, dtype=bool)
+    if all(isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+           for value in values):
+        return np.array(values, dtype=np.int64)
+    if all(isinstance(value, (int, float, np.number)) for value in values):
+        return np.array(values, dtype=float)
+    return np.array([str(value) for value in values])
+
+
+def write_results(fn, spec, rows, adaptive=False):
+    """
+    Save the results of a sweep as an npz file of columns.
+
+    Parameters
+    ----------
+    fn : str
+        Results filename.
+    spec : dict
+        Sweep spec.
+    rows : list of dict
+        One row per run, with keys 'point', 'seed', 'run', 'status',
+        'error', 'timestep', 'parameters' (values keyed by config path),
+        'final' and 'peak' (counts keyed by species).
+    adaptive : bool
+        Whether the rows are from an adaptive sweep, with the keys 'rung'
+        and 'score'.
+    """
+    species_names = sorted({species for row in rows
+                            for species in row['final']})
+    columns = {
+        'point': np.array([row['point'] for row in rows], dtype=np.int64),
+        'seed': np.array([row['seed'] for row in rows], dtype=np.int64),
+        'run': np.array([row['run'] or '' for row in rows]),
+        'status': np.array([row['status'] for row in rows]),
+        'error': np.array([row['error'] or '' for row in rows]),
+        'timestep': np.array([MISSING if row['timestep'] is None
+                              else row['timestep'] for row in rows],
+                             dtype=np.int64),
+    }
+    if adaptive:
+        columns['rung'] = np.array([row['rung'] for row in rows],
+                                   dtype=np.int64)
+        columns['score'] = np.array([row['score'] for row in rows],
+                                    dtype=float)
+    for path in spec['parameters']:
+        columns[f'parameters/{path}'] = _column([row['parameters'][path]
+                                                 for row in rows])
+    for species in species_names:
+        for stat in ['final', 'peak']:
+            columns[f'species/{species}/{stat}'] = np.array(
+                [row[stat].get(species, MISSING) for row in rows],
+                dtype=np.int64
+            )
+    columns['spec'] = np.array(json.dumps(spec))
+    with open(fn, 'wb') as f:
+        np.savez(f, **columns)
+
+
+def load_results(fn):
+    """
+    Load the results of a sweep.
+
+    Parameters
+    ----------
+    fn : str
+        Results filename.
+
+    Returns
+    -------
+    results : dict
+        Columns, with one row per run: 'point' (index of the point), 'seed',
+        'run' (name of its directories), 'status' ('completed',
+        'failed', 'pruned' for runs dropped by an adaptive sweep, or the
+        reason the run stopped early), 'error', 'timestep' (last time step
+        logged, or -1), 'parameters/<path>' per parameter, and
+        'species/<name>/final' and 'species/<name>/peak' (final and peak
+        number of living organisms, or -1) per species. Adaptive sweeps
+        also have 'rung' (last round of successive halving reached) and
+        'score' (NaN for runs that dropped out before scoring). The sweep
+        spec is under 'spec'.
+    """
+    with np.load(fn, allow_pickle=False) as npz:
+        results = {key: npz[key] for key in npz.files}
+    results['spec'] = json.loads(str(results['spec']))
+    return results
+
+
+def _run_tasks(tasks, rows, project_dir, max_workers, verbose):
+    """
+    Run tasks for run_replicate, and update their rows with the results and
+    the outcomes of the runs.
+    """
+    results = run_replicates(
+        tasks,
+        max_workers=max_workers,
+        callback=(lambda i, result: report(result)) if verbose else None
+    )
+    for row, result in zip(rows, results):
+        row.update(result)
+        row.update(run_outcome(project_dir, result))
+
+
+def successive_halving(point_rows, point_cfgs, point_options, project_dir,
+                       min_timesteps=None, eta=3, score=coexistence,
+                       max_workers=None, verbose=True):
+    """
+    Run the points of an adaptive sweep by successive halving.
+
+    Parameters
+    ----------
+    point_rows : list of list of dict
+        Rows of the runs of each point, one per seed, with keys 'point' and
+        'seed'. Updated in place.
+    point_cfgs : list of dict
+        Config of each point.
+    point_options : list of dict
+        Universe keyword arguments of each point.
+    project_dir : Path
+        Project directory of the runs.
+    min_timesteps : int, optional
+        Time steps run by every point, defaulting to about 1 / eta**3 of the
+        longest run.
+    eta : int
+        Factor by which the number of points is cut, and the number of time
+        steps increased, at each round.
+    score : callable
+        Score of a run, from its outcome (see :func:`run_outcome`). Higher
+        is better.
+    max_workers : int, optional
+        Maximum number of runs at a time.
+    verbose : bool
+        Whether to print a line as each run ends.
+    """
+    max_timesteps = max(options['end_time'] for options in point_options)
+    if min_timesteps is None:
+        min_timesteps = max(1, max_timesteps // eta**3)
+    budgets = rung_budgets(min_timesteps, max_timesteps, eta)
+    for rows in point_rows:
+        for row in rows:
+            row.update(run=None, rung=-1, score=np.nan)
+
+    # Points that finished a rung, by rank, but weren't promoted
+    waiting = {}
+    active = list(range(len(point_rows)))
+    rung = 0
+    while True:
+        budget = budgets[rung]
+        tasks, rows = [], []
+        for i in active:
+            options = dict(point_options[i],
+                           end_time=min(budget, point_options[i]['end_time']))
+            for row in point_rows[i]:
+                if row['run'] is None:
+                    tasks.append((point_cfgs[i], project_dir, row['seed'],
+                                  options, f'point{i:04d}-s{row["seed"]}'))
+                else:
+                    dataset_fn = dio.find_datasets(
+                        project_dir / 'data' / row['run']
+                    )[-1]
+                    tasks.append((None, project_dir, row['seed'], options,
+                                  None, dataset_fn))
+                row['rung'] = rung
+                rows.append(row)
+        _run_tasks(tasks, rows, project_dir, max_workers, verbose)
+
+        # Points with a failed or stopped run drop out, and points that ran
+        # for all their time steps are done
+        candidates = []
+        for i in active:
+            if all(row['status'] == 'completed' for row in point_rows[i]):
+                for row in point_rows[i]:
+                    row['score'] = score(row)
+                if point_options[i]['end_time'] > budget:
+                    candidates.append(i)
+        if rung == len(budgets) - 1:
+            break
+        if len(candidates) > 0:
+            candidates.sort(key=lambda i: -np.mean([row['score']
+                                                    for row in point_rows[i]]))
+            active = candidates[:max(1, int(np.ceil(len(candidates) / eta)))]
+            waiting[rung] = candidates[len(active):]
+            rung += 1
+            continue
+
+        # Every point dropped out, so the next-ranked points of the latest
+        # rung with any left are promoted in their place
+        previous = rung - 1
+        while previous >= 0 and len(waiting.get(previous, [])) == 0:
+            previous -= 1
+        if previous < 0:
+            break
+        promoted = waiting[previous][:len(active)]
+        waiting[previous] = waiting[previous][len(active):]
+        active = promoted
+        rung = previous + 1
+
+    # Runs that stopped short of their last time step without a reason of
+    # their own were cut short by the sweep
+    for i, rows in enumerate(point_rows):
+        for row in rows:
+            if (row['status'] == 'completed'
+                    and row['timestep'] != point_options[i]['end_time']):
+                row['status'] = 'pruned'
+
+
+def run_sweep(spec, project_dir=None, max_workers=None, results_fn=None,
+              verbose=True, stop_conditions=None, score=None, **options):
+    """
+    Run a parameter sweep, in a pool of worker processes.
+
+    Parameters
+    ----------
+    spec : str or dict
+        Sweep spec, or the filename of a YAML spec. Config paths in spec
+        files are relative to the spec.
+    project_dir : str, optional
+        Project directory of the sweep's runs. Defaults to a directory named
+        after the spec file, next to it, or to the config's directory.
+    max_workers : int, optional
+        Maximum number of runs at a time. Defaults to the number of CPUs.
+    results_fn : str, optional
+        Filename of the results. Defaults to a timestamped npz file in the
+        project directory.
+    verbose : bool
+        Whether to print a line as each run ends.
+    stop_conditions : list of callable, optional
+        Stop conditions for the runs, in addition to those of the spec. They
+        must be picklable.
+    score : callable, optional
+        For adaptive sweeps, the score of a run from its outcome (see
+        :func:`run_outcome`), overriding the spec's.
+    **options
+        Universe options for the options that the config file doesn't set,
+        as for ``blossom run``.
+
+    Returns
+    -------
+    results_fn : Path
+        Filename of the results.
+    """
+    if not isinstance(spec, dict):
+        spec_fn = Path(spec).resolve()
+        spec = load_spec(spec_fn)
+        if project_dir is None:
+            project_dir = spec_fn.parent / spec_fn.stem
+    config_fn = Path(spec['config']).resolve()
+    if project_dir is None:
+        project_dir = config_fn.parent
+    project_dir = Path(project_dir).resolve()
+    project_dir.mkdir(parents=True, exist_ok=True)
+    if results_fn is None:
+        datestring = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        results_fn = project_dir / f'sweep-{datestring}.npz'
+
+    cfg = load_config(config_fn)
+    seeds = spec.get('seeds', [cfg.get('seed', 0)])
+    if isinstance(seeds, int):
+        seeds = list(range(seeds))
+    points = sample_points(spec['parameters'],
+                           method=spec.get('method', 'grid'),
+                           samples=spec.get('samples'),
+                           seed=spec.get('sample_seed'))
+    # Check every path before starting any run
+    for path in spec['parameters']:
+        set_value(copy.deepcopy(cfg), path, None)
+    options.setdefault('checkpoint_every', None)
+    options['stop_conditions'] = (stopping.from_spec(spec.get('stop'))
+                                  + list(stop_conditions or []))
+
+    point_cfgs, point_options, point_rows = [], [], []
+    for i, point in enumerate(points):
+        point_cfg = copy.deepcopy(cfg)
+        for path, value in point.items():
+            set_value(point_cfg, path, value)
+        point_cfgs.append(point_cfg)
+        point_options.append(universe_options(point_cfg, **options))
+        point_rows.append([{'point': i, 'seed': seed, 'parameters': point}
+                           for seed in seeds])
+
+    adaptive = spec.get('adaptive')
+    if adaptive is not None:
+        if score is None:
+            score = scores[adaptive.get('score', 'coexistence')]
+        successive_halving(point_rows, point_cfgs, point_options,
+                           project_dir,
+                           min_timesteps=adaptive.get('min_timesteps'),
+                           eta=adaptive.get('eta', 3),
+                           score=score,
+                           max_workers=max_workers,
+                           verbose=verbose)
+    else:
+        tasks = [(point_cfgs[i], project_dir, row['seed'], point_options[i],
+                  f'point{i:04d}-s{row["seed"]}')
+                 for i, rows in enumerate(point_rows) for row in rows]
+        _run_tasks(tasks, [row for rows in point_rows for row in rows],
+                   project_dir, max_workers, verbose)
+
+    spec = dict(spec, config=str(config_fn), seeds=seeds)
+    write_results(results_fn, spec,
+                  [row for rows in point_rows for row in rows],
+                  adaptive=adaptive is not None)
+    return Path(results_fn)
+
+
+@click.command(name='sweep')
+@click.argument('spec_fn', type=click.Path(exists=True))
+@click.option('-j', '--max-workers', type=int,
+              help='Maximum number of runs at a time (default: number of '
+                   'CPUs)')
+@click.option('-o', '--output', type=click.Path(),
+              help='Filename of the results (npz)')
+@click.option('-d', '--project-dir', type=click.Path(),
+              help='Directory of the runs (default: named after the spec)')
+def run_sweep_command(spec_fn, max_workers=None, output=None,
+                      project_dir=None):
+    """
+    Run a parameter sweep from a spec file.
+    """
+    results_fn = run_sweep(spec_fn,
+                           project_dir=project_dir,
+                           max_workers=max_workers,
+                           results_fn=output)
+    results = load_results(results_fn)
+    failed = int(np.sum(results['status'] == 'failed'))
+    print(f'{len(results["status"]) - failed} of {len(results["status"])} '
+          f'runs succeeded; results saved to {results_fn}')
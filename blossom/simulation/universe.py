@@ -5,13 +5,22 @@ from pathlib import Path
 import datetime
 
 import time
+import warnings
 import numpy as np
 
 from . import parse_intent
 from . import utils
+from . import run_log
 from . import dataset_io as dio
+from . import compression as cmp
 from . import parameter_io as pio
 from . import population_funcs as pf
+from . import population_store as ps
+from . import columnar_step as cs
+from .id_allocator import IDAllocator
+from .snapshot_writer import SnapshotWriter
+from .layer_store import LayerStore
+from .parallel_step import ParallelStepper
 
 
 class Universe(object):
@@ -22,6 +31,7 @@ class Universe(object):
     def __init__(self,
                  dataset_fn=None,
                  config_fn=None,
+                 config_dict=None,
                  world_param_fn=None,
                  species_param_fns=None,
                  world_param_dict={},
@@ -32,6 +42,24 @@ class Universe(object):
                  project_dir='datasets/',
                  pad_zeros=4,
                  seed=None,
+                 engine='object',
+                 consumption='first_come',
+                 export_uuids=False,
+                 snapshot_format='json',
+                 background_save=False,
+                 max_pending_saves=2,
+                 checkpoint_every=1,
+                 checkpoint_interval=None,
+                 checkpoint_on_exit=True,
+                 memmap_world=False,
+                 keyframe_every=None,
+                 compression=None,
+                 compression_level=None,
+                 workers=1,
+                 tiles=None,
+                 shared_world=True,
+                 run_name=None,
+                 stop_conditions=None,
                  **kwargs):
         """
         Initialize universe based on either parameter files or saved datasets.
@@ -42,6 +70,8 @@ class Universe(object):
             Filename of saved organism and world datasets
         config_fn : str 
             Filename of config .yml file
+        config_dict : dict
+            Contents of a config file, e.g. with modified parameters
         world_param_fn : str
             Filename of world parameter file
         species_param_fns : list of str
@@ -63,12 +93,98 @@ class Universe(object):
             Number of zeroes to pad in dataset filenames
         seed : int, Generator, optional
             Random seed for the simulation
+        engine : str
+            Population engine, either 'object' (one Organism object per
+            organism), 'columnar' (organism fields stored in NumPy columns
+            per species) or 'parallel' (Organism objects, stepped tile by
+            tile in a process pool; see
+            :mod:`blossom.simulation.parallel_step`)
+        consumption : str
+            For the columnar engine, how vectorized drinking and eating split
+            resources between organisms on the same cell: 'first_come'
+            (random order, each takes what is left) or 'proportional'
+        export_uuids : bool
+            Whether to write organism IDs to saved datasets as UUID strings
+            instead of integers
+        snapshot_format : str
+            Format of saved datasets, either 'json' or 'npz' (per-species
+            columns and world grids as NumPy arrays, with a JSON header)
+        background_save : bool
+            Whether to save datasets on a background thread while the next
+            time step is computed
+        max_pending_saves : int
+            With background saving, the maximum number of time steps waiting
+            to be saved before stepping blocks
+        checkpoint_every : int, optional
+            Save a full checkpoint every checkpoint_every time steps
+        checkpoint_interval : float, optional
+            Save a full checkpoint at least every checkpoint_interval seconds
+        checkpoint_on_exit : bool
+            Whether to save a checkpoint when the run stops
+        memmap_world : bool
+            Whether to keep world grids in versioned, memory-mapped layer
+            files, referenced by checkpoints instead of stored in them
+        keyframe_every : int, optional
+            With the 'npz' snapshot format, save every keyframe_every-th
+            checkpoint in full and the checkpoints in between as deltas
+            against it
+        compression : str, optional
+            Codec to compress saved datasets and the run log with, either
+            'gzip', 'lzma' or 'zlib'
+        compression_level : int, optional
+            Compression level (or preset, for lzma), using each codec's
+            default if None
+        workers : int
+            For the parallel engine, the number of worker processes
+        tiles : list of int, optional
+            For the parallel engine, the number of tiles along each axis of
+            the world. Results depend on the tiles, but not on the number of
+            workers.
+        shared_world : bool
+            For the parallel engine with several workers, whether to keep the
+            world grids in shared memory, which worker processes change in
+            place, rather than sending a copy of the world with every tile
+        run_name : str, optional
+            Name of the run's data and log directories, which defaults to the
+            start time and seed. A number is appended if it is already taken.
+        stop_conditions : list of callable, optional
+            Conditions checked after each time step of a run, which end the
+            run early if they return a reason for stopping, such as
+            'extinction' (see :mod:`blossom.simulation.stopping`)
         """
+        if engine not in ['object', 'columnar', 'parallel']:
+            raise ValueError(f'Invalid population engine: {engine}')
+        self.engine = engine
+        if consumption not in cs.consumption_modes:
+            raise ValueError(f'Invalid consumption mode: {consumption}')
+        self.consumption = consumption
+        if snapshot_format not in dio.snapshot_formats:
+            raise ValueError(f'Invalid snapshot format: {snapshot_format}')
+        self.snapshot_format = snapshot_format
+        if checkpoint_every is not None and checkpoint_every < 1:
+            raise ValueError('checkpoint_every must be at least 1')
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_on_exit = checkpoint_on_exit
+        self.memmap_world = memmap_world
+        self.layer_store = None
+        self.world_layers = None
+        self.keyframes = None
+        if keyframe_every is not None:
+            if snapshot_format != 'npz':
+                raise ValueError('Delta snapshots require the npz format')
+            self.keyframes = dio.Keyframes(keyframe_every)
+        cmp.check_codec(compression)
+        self.compression = compression
+        self.compression_level = compression_level
+
         # Set random seeds for the entire simulation
         self.initial_seed = seed
         if seed is None:
             self.initial_seed = np.random.default_rng().integers(2**32)
         self.rng = np.random.default_rng(self.initial_seed)
+        self.ids = IDAllocator(seed=self.initial_seed)
+        self.export_uuids = export_uuids
 
         self.start_timestamp = time.time()
         self.last_timestamp = self.start_timestamp
@@ -85,6 +201,10 @@ class Universe(object):
             self.config_fn = Path(self.config_fn).resolve()
             input_count += 1
 
+        self.config_dict = config_dict
+        if self.config_dict is not None:
+            input_count += 1
+
         self.world_param_fn = world_param_fn
         self.species_param_fns = species_param_fns
         if self.world_param_fn is not None and self.species_param_fns is not None:
@@ -113,15 +233,42 @@ class Universe(object):
         self.end_time = end_time
         self.pad_zeros = pad_zeros
 
-        self.initialize(seed=seed, project_dir=project_dir)
-        self.organisms = pf.get_organism_list(self.population_dict)
-        self.organisms_by_location = pf.hash_by_location(self.organisms)
+        self.writer = None
+        self.background_save = False
+        self.stepper = None
+        self.population = None
+        self._organisms = None
+        self._organisms_by_location = None
+        self.last_checkpoint_time = None
+        self.last_checkpoint_timestamp = self.start_timestamp
+
+        self.initialize(seed=seed, project_dir=project_dir, run_name=run_name)
+        if self.engine == 'columnar':
+            self._set_population(ps.PopulationStore.from_population_dict(
+                self.population_dict,
+                dimensionality=self.world.dimensionality
+            ))
+        else:
+            self.organisms = pf.get_organism_list(self.population_dict)
+            self.organisms_by_location = pf.hash_by_location(self.organisms)
+        if self.engine == 'parallel':
+            self.stepper = ParallelStepper(self.world.world_size,
+                                           tiles=tiles,
+                                           workers=workers,
+                                           shared_world=shared_world)
         self.species_names = sorted(list(self.population_dict.keys()))
         self.intent_list = []
 
         self.organism_limit = kwargs.get('organism_limit')
+        self.stop_conditions = list(stop_conditions or [])
+        self.stop_reason = None
+
+        # The initial checkpoint is saved directly, and the background writer
+        # is started on the next save, and again after each call to close
+        self.background_save = background_save
+        self.max_pending_saves = max_pending_saves
 
-    def initialize(self, seed=None, project_dir=None):
+    def initialize(self, seed=None, project_dir=None, run_name=None):
         """
         Initialize world and organisms in the universe, from either saved
         datasets or from parameter files (and subsequently writing the
@@ -133,17 +280,30 @@ class Universe(object):
                                                                                 seed=seed)
             self.rng = config_params['rng']
             self.initial_seed = config_params['initial_seed']
+            self.ids = config_params['ids']
+            self.current_time = self.world.current_time
+            self.last_checkpoint_time = self.current_time
 
             self.project_dir = self.dataset_fn.parents[2]
             self.run_data_dir = self.dataset_fn.parents[0]
             self.run_logs_dir = self.project_dir / 'logs' / self.run_data_dir.name
             self.run_logs_dir.mkdir(parents=True, exist_ok=True)
+
+            # Time steps after the checkpoint will be logged again
+            run_log.truncate(run_log.find_log(self.run_logs_dir,
+                                              self.project_dir.name),
+                             self.current_time)
+            if self.memmap_world:
+                self.layer_store = LayerStore(self.run_data_dir, self.world)
         else:
-            if self.config_fn is not None:
-                self.population_dict, self.world, config_params = pio.load_from_config(self.config_fn,
+            if self.config_fn is not None or self.config_dict is not None:
+                config = (self.config_fn if self.config_fn is not None
+                          else self.config_dict)
+                self.population_dict, self.world, config_params = pio.load_from_config(config,
                                                                                        seed=seed)
                 self.rng = config_params['rng']
                 self.initial_seed = config_params['initial_seed']
+                self.ids = config_params['ids']
                 self.current_time = self.world.current_time
             elif self.world_param_fn is not None and self.species_param_fns is not None:
                 self.world = pio.load_world_from_param_file(self.world_param_fn)
@@ -151,35 +311,143 @@ class Universe(object):
                                     fns=self.species_param_fns,
                                     init_world=self.world,
                                     custom_module_fns=self.custom_module_fns,
-                                    seed=self.rng)
+                                    seed=self.rng,
+                                    ids=self.ids)
             elif self.world_param_fn != {} and self.species_param_fns != [{}]:
                 self.world = pio.load_world_from_dict(self.world_param_dict)
                 self.population_dict = pio.load_species_from_dict(
                                     init_dicts=self.species_param_dicts,
                                     init_world=self.world,
                                     custom_module_fns=self.custom_module_fns,
-                                    seed=self.rng)
+                                    seed=self.rng,
+                                    ids=self.ids)
             else:
                 raise ValueError('No valid intialization provided')
         
             # Save / directory structure
             self.project_dir = Path(project_dir).resolve()
-            datestring = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-            self.run_data_dir = self.project_dir / 'data' / f'{datestring}-s{self.initial_seed}'
-            self.run_data_dir.mkdir(parents=True, exist_ok=True)
-            self.run_logs_dir = self.project_dir / 'logs' / f'{datestring}-s{self.initial_seed}'
-            self.run_logs_dir.mkdir(parents=True, exist_ok=True)
-            dio.save_universe(self)
-
-    def step(self):
+            if run_name is None:
+                datestring = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+                run_name = f'{datestring}-s{self.initial_seed}'
+            self.run_data_dir, self.run_logs_dir = dio.make_run_dirs(
+                self.project_dir,
+                run_name
+            )
+            if self.memmap_world:
+                self.layer_store = LayerStore(self.run_data_dir)
+            self.save(checkpoint=True)
+
+    def step(self, save=True):
         """
         Steps through one time step, iterating over all organisms and
-        computing new organism states. Saves all organisms and the world
-        to file at the end of each step.
+        computing new organism states. Logs statistics at the end of each
+        step, and saves all organisms and the world to file when a checkpoint
+        is due.
         """
         # Increment time step
         self.current_time += 1
 
+        if self.engine == 'columnar':
+            self._step_columnar()
+        elif self.engine == 'parallel':
+            self._step_parallel()
+        else:
+            self._step_object()
+
+        # Potential changes to the world would go here
+        self.world.step()
+
+        # Save universe state
+        now = time.time()
+        self.elapsed_time = now - self.last_timestamp
+        self.last_timestamp = now
+        if save:
+            self.save()
+
+    def check_stop_conditions(self):
+        """
+        Check the stop conditions at the current time step.
+
+        Returns
+        -------
+        reason : str or None
+            Reason for stopping given by the first condition met, or None.
+        """
+        for condition in self.stop_conditions:
+            reason = condition(self)
+            if reason:
+                return reason if isinstance(reason, str) else getattr(
+                    condition, '__name__', type(condition).__name__
+                )
+        return None
+
+    def checkpoint_due(self):
+        """
+        Whether a checkpoint should be saved at the current time step,
+        according to checkpoint_every and checkpoint_interval.
+        """
+        if self.last_checkpoint_time is None:
+            return True
+        if (self.checkpoint_every is not None
+                and self.current_time - self.last_checkpoint_time
+                >= self.checkpoint_every):
+            return True
+        if (self.checkpoint_interval is not None
+                and time.time() - self.last_checkpoint_timestamp
+                >= self.checkpoint_interval):
+            return True
+        return False
+
+    def save(self, checkpoint=None):
+        """
+        Log statistics for the current time step and save a checkpoint if
+        one is due, either directly or by passing a copy of the state to the
+        background writer.
+
+        Parameters
+        ----------
+        checkpoint : bool, optional
+            Whether to save a checkpoint. If None, follow the checkpoint
+            cadence.
+        """
+        if checkpoint is None:
+            checkpoint = self.checkpoint_due()
+        if checkpoint and self.layer_store is not None:
+            self.world_layers = self.layer_store.commit(self.world)
+        if self.background_save and self.writer is None:
+            self.writer = SnapshotWriter(max_pending=self.max_pending_saves)
+        if self.writer is None:
+            dio.save_universe(self, checkpoint=checkpoint)
+        else:
+            self.writer.submit(dio.UniverseState(self, checkpoint=checkpoint))
+        if checkpoint:
+            self.last_checkpoint_time = self.current_time
+            self.last_checkpoint_timestamp = time.time()
+
+    def close(self):
+        """
+        Wait for all pending saves to finish and stop the background writer
+        and worker processes, and free shared memory. Pending records of a
+        compressed run log are compressed. The universe can keep running
+        afterwards, e.g. with a later end time.
+        """
+        try:
+            if self.writer is not None:
+                writer, self.writer = self.writer, None
+                writer.close()
+        finally:
+            if self.compression is not None:
+                log_fn = run_log.log_filename(self.run_logs_dir,
+                                              self.project_dir.name,
+                                              compression=self.compression)
+                run_log.flush(log_fn, level=self.compression_level)
+            if self.stepper is not None:
+                self.stepper.close(self.world)
+
+    def _step_object(self):
+        """
+        Step organisms stored as a list of Organism objects.
+        """
         # This is just updating the age, not evaluating whether an organism
         # is at death, since organism actions should be evaluated based on
         # the current state. Age needs to be updated so that every organism
@@ -201,21 +469,125 @@ class Universe(object):
                 self.intent_list.append(organism.step(self))
 
         # Parse intent list and ensure it is valid
-        self.organisms = parse_intent.parse(self.intent_list, 
-                                            last_organisms, 
-                                            seed=self.rng)
-        self.population_dict = pf.get_population_dict(self.organisms,
+        organisms = parse_intent.parse(self.intent_list, 
+                                       last_organisms, 
+                                       seed=self.rng)
+        self.ids.assign(organisms)
+        self.population_dict = pf.get_population_dict(organisms,
                                                       self.species_names)
+        # Keep organisms grouped by species, in the order they are saved in,
+        # so that a run resumed from a checkpoint continues identically
+        self.organisms = pf.get_organism_list(self.population_dict)
         self.organisms_by_location = pf.hash_by_location(self.organisms)
 
-        # Potential changes to the world would go here
-        self.world.step()
+    def _step_parallel(self):
+        """
+        Step organisms stored as a list of Organism objects, evaluating their
+        intents tile by tile in a process pool, and resolving them all
+        together.
+        """
+        last_organisms = self.organisms
+        self.intent_list = self.stepper.intents(self, last_organisms)
 
-        # Save universe state
-        now = time.time()
-        self.elapsed_time = now - self.last_timestamp
-        self.last_timestamp = now
-        dio.save_universe(self)
+        organisms = parse_intent.parse(self.intent_list,
+                                       last_organisms,
+                                       seed=self.rng)
+        self.ids.assign(organisms)
+        self.population_dict = pf.get_population_dict(organisms,
+                                                      self.species_names)
+        self.organisms = pf.get_organism_list(self.population_dict)
+        self.organisms_by_location = pf.hash_by_location(self.organisms)
+
+    def _step_columnar(self):
+        """
+        Step organisms stored in per-species columns. The current state (with
+        updated ages) is a copy of the columns rather than a clone of every
+        organism, and actions with vectorized behavior methods are applied to
+        all organisms of a species at once.
+        """
+        last_population = self.population.select_alive()
+
+        current_population = last_population.copy().increment_age()
+        self._set_population(current_population)
+
+        next_population = current_population.copy()
+        self.intent_list = cs.StepIntents()
+        batches = {}
+        for species in self.species_names:
+            intents, batches[species] = cs.step_species(
+                self,
+                last_population.species[species],
+                current_population.species[species],
+                next_population.species[species]
+            )
+            self.intent_list.extend(intents)
+
+        kept_rows, others = cs.resolve(self.intent_list,
+                                       last_population,
+                                       next_population,
+                                       seed=self.rng)
+        for species in self.species_names:
+            self.ids.assign(others[species])
+
+        # Settle resource requests of selected intents per cell, then apply
+        # metabolism to organisms handled by vectorized behaviors
+        cs.consume(self, batches, kept_rows, mode=self.consumption)
+        for species, batch in batches.items():
+            cs.update_health(batch.species_columns,
+                             np.intersect1d(batch.all_rows(),
+                                            kept_rows[species]))
+
+        self._set_population(cs.assemble(next_population,
+                                         kept_rows,
+                                         others,
+                                         self.world.dimensionality))
+
+    def _set_population(self, population):
+        """
+        Set the columnar population. The population dict's organism lists,
+        the organism list and the location hash are views of its rows, which
+        are only built if they are used, e.g. by custom behaviors.
+        """
+        self.population = population
+        self.population_dict = self.population.to_population_dict()
+        self._organisms = None
+        self._organisms_by_location = None
+
+    @property
+    def organisms(self):
+        """
+        List of all organisms, in species order.
+        """
+        if self._organisms is None and self.population is not None:
+            self._organisms = pf.get_organism_list(self.population_dict)
+        return self._organisms
+
+    @organisms.setter
+    def organisms(self, organisms):
+        self._organisms = organisms
+
+    @property
+    def organisms_by_location(self):
+        """
+        Lists of organisms keyed by location tuple.
+        """
+        if self._organisms_by_location is None and self.population is not None:
+            self._organisms_by_location = self.population.hash_by_location(
+                self.organisms
+            )
+        return self._organisms_by_location
+
+    @organisms_by_location.setter
+    def organisms_by_location(self, organisms_by_location):
+        self._organisms_by_location = organisms_by_location
+
+    def organism_count(self):
+        """
+        Number of organisms, living or dead, at the current time step.
+        """
+        if self.population is not None:
+            return len(self.population)
+        return len(self.organisms)
 
     def current_info(self, verbosity=1, expanded=True):
         total_num = sum([self.population_dict[species]['statistics']['total']
@@ -278,14 +650,94 @@ class Universe(object):
 
     def run(self, verbosity=1, expanded=True):
         print(self.current_info(verbosity=verbosity, expanded=expanded))
-        while self.current_time < self.end_time:
-            self.step()
-            print(self.current_info(verbosity=verbosity, expanded=expanded))
+        try:
+            while self.current_time < self.end_time:
+                self.step(save=False)
+                over_limit = (self.organism_limit is not None
+                              and self.organism_count() > self.organism_limit)
+                if over_limit:
+                    self.stop_reason = 'organism_limit'
+                else:
+                    self.stop_reason = self.check_stop_conditions()
+                last_step = (self.stop_reason is not None
+                             or self.current_time >= self.end_time)
+                self.save(checkpoint=(True if last_step
+                                      and self.checkpoint_on_exit else None))
+                print(self.current_info(verbosity=verbosity, expanded=expanded))
+
+                if over_limit:
+                    print(f'Exceeded organism limit! ({self.organism_count()} '
+                          f'> {self.organism_limit})')
+                    break
+                if self.stop_reason is not None:
+                    print(f'Stopped early: {self.stop_reason}')
+                    break
+        except BaseException:
+            # A background save that failed as well must not mask the error
+            # that stopped the run
+            try:
+                self.close()
+            except Exception as error:
+                warnings.warn(f'{error}: {error.__cause__!r}', RuntimeWarning)
+            raise
+        self.close()
+
+
+# Universe options that can be set in config files, with their defaults
+config_options = {
+    'timesteps': 1000,
+    'organism_limit': None,
+    'engine': 'object',
+    'consumption': 'first_come',
+    'export_uuids': False,
+    'snapshot_format': 'json',
+    'background_save': False,
+    'checkpoint_every': 1,
+    'checkpoint_interval': None,
+    'memmap_world': False,
+    'keyframe_every': None,
+    'compression': None,
+    'compression_level': None,
+    'workers': 1,
+    'tiles': None,
+    'shared_world': True,
+}
+
+
+def find_config(project_dir):
+    """
+    Find the single config file (.yml) in a project directory.
+    """
+    config_path = list(Path(project_dir).glob('*.yml'))
+    if len(config_path) == 0:
+        raise ValueError('No config files')
+    elif len(config_path) > 1:
+        raise ValueError('Multiple config files located')
+    return config_path[0]
 
-            if self.organism_limit is not None and len(self.organisms) > self.organism_limit:
-                print(f'Exceeded organism limit! ({len(self.organisms)} '
-                      f'> {self.organism_limit})')
-                break
+
+def universe_options(cfg, **options):
+    """
+    Get Universe keyword arguments from the options set in a config file.
+
+    Parameters
+    ----------
+    cfg : dict
+        Contents of the config file.
+    **options
+        Values of the options that the config file doesn't set, e.g. from the
+        CLI. Other options get their default values.
+
+    Returns
+    -------
+    kwargs : dict
+        Keyword arguments for Universe, other than the initialization method,
+        project_dir and seed.
+    """
+    kwargs = dict(config_options, **options)
+    kwargs.update({key: cfg[key] for key in config_options if key in cfg})
+    kwargs['end_time'] = kwargs.pop('timesteps')
+    return kwargs
 
 
 @click.command(name='run')
@@ -299,7 +751,40 @@ class Universe(object):
               help='Level of progress detail to print')
 @click.option('-s', '--seed', type=int,
               help='Random seed')
-def run_universe(timesteps=1000, organism_limit=None, restart=False, verbosity=4, seed=None):
+@click.option('-e', '--engine',
+              type=click.Choice(['object', 'columnar', 'parallel']),
+              default='object',
+              help='Population engine')
+@click.option('-w', '--workers', type=int, default=1,
+              help='Number of worker processes for the parallel engine')
+@click.option('--shared-world/--no-shared-world', default=True,
+              help='Keep world grids in shared memory for parallel workers '
+                   '(default), or send a copy to every tile')
+@click.option('-b', '--background-save', is_flag=True, default=False,
+              help='Save datasets on a background thread')
+@click.option('-c', '--checkpoint-every', type=int, default=1,
+              help='Save a full checkpoint every N timesteps')
+@click.option('--checkpoint-interval', type=float,
+              help='Save a full checkpoint at least every T seconds')
+@click.option('--resume', is_flag=True, default=False,
+              help='Resume from the latest checkpoint of the last run')
+@click.option('-f', '--snapshot-format',
+              type=click.Choice(list(dio.snapshot_formats)),
+              default='json',
+              help='Format of saved datasets')
+@click.option('-z', '--compression',
+              type=click.Choice(list(cmp.codecs)),
+              help='Compress saved datasets and logs')
+@click.option('--compression-level', type=int,
+              help='Compression level')
+@click.option('-k', '--keyframe-every', type=int,
+              help='With npz datasets, save every Nth checkpoint in full and '
+                   'the others as deltas')
+def run_universe(timesteps=1000, organism_limit=None, restart=False, verbosity=4, seed=None,
+                 engine='object', snapshot_format='json', background_save=False,
+                 checkpoint_every=1, checkpoint_interval=None, resume=False,
+                 keyframe_every=None, compression=None,
+                 compression_level=None, workers=1, shared_world=True):
     project_dir = Path('.').resolve()
 
     # logs_path = project_dir / 'logs'
@@ -325,26 +810,35 @@ def run_universe(timesteps=1000, organism_limit=None, restart=False, verbosity=4
     #             fn.unlink()
 
     # Run even if not restarting, such as first run
-    # Use .yml 
-    config_path = list(project_dir.glob('*.yml'))
-    if len(config_path) == 1:
-        config_path = config_path[0]
-        with open(config_path, 'r') as f:
-            cfg = yaml.load(f, Loader=yaml.FullLoader)
-        timesteps = cfg.get('timesteps', timesteps)
-        organism_limit = cfg.get('organism_limit', organism_limit)
-
-        universe = Universe(config_fn=config_path, 
-                            project_dir=project_dir,
-                            end_time=timesteps, 
-                            seed=seed,
-                            organism_limit=organism_limit)
-        universe.run(verbosity=verbosity, expanded=False)
-        return
-    elif len(config_path) == 0:
-        raise ValueError('No config files')
-    else:
-        raise ValueError('Multiple config files located')
+    config_path = find_config(project_dir)
+    with open(config_path, 'r') as f:
+        cfg = yaml.load(f, Loader=yaml.FullLoader)
+    options = universe_options(cfg,
+                               timesteps=timesteps,
+                               organism_limit=organism_limit,
+                               engine=engine,
+                               snapshot_format=snapshot_format,
+                               background_save=background_save,
+                               checkpoint_every=checkpoint_every,
+                               checkpoint_interval=checkpoint_interval,
+                               keyframe_every=keyframe_every,
+                               compression=compression,
+                               compression_level=compression_level,
+                               workers=workers,
+                               shared_world=shared_world)
+
+    init_kwargs = {'config_fn': config_path}
+    if resume:
+        dataset_fn = dio.find_latest_checkpoint(project_dir)
+        if dataset_fn is None:
+            raise ValueError('No checkpoints to resume from')
+        init_kwargs = {'dataset_fn': dataset_fn}
+
+    universe = Universe(**init_kwargs,
+                        project_dir=project_dir,
+                        seed=seed,
+                        **options)
+    universe.run(verbosity=verbosity, expanded=False)
 
 
 # At its simplest, the entire executable could just be written like this
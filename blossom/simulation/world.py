@@ -21,6 +21,9 @@ class World(object):
         for custom_field in (init_keys - default_keys):
             setattr(self, custom_field, init_dict[custom_field])
 
+        # Grid layers changed in place since the last checkpoint
+        self._changed_layers = set()
+
     def to_dict(self):
         """
         Convert World to dict.
@@ -31,5 +34,13 @@ class World(object):
                        if not key.startswith('_')}
         return public_vars
 
+    def mark_changed(self, layer):
+        """
+        Record that a grid layer (e.g. 'water') was changed in place, so that
+        a LayerStore saves a new version of it at the next checkpoint without
+        comparing it with the saved version. Unmarked layers are compared.
+        """
+        self._changed_layers.add(layer)
+
     def step(self):
         self.current_time += 1
@@ -12,7 +12,7 @@ from pathlib import Path
 import json 
 import humanfriendly
 
-from .parsing import read_log
+from ..simulation import run_log
 
 
 @click.command()
@@ -78,7 +78,7 @@ def dashboard(track_dir, port=8888):
         html.Div(id='dropdown-dummy-div'),
         dcc.Store(id='elapsed-store'),
         dcc.Store(id='size-store'),
-        dcc.Store(id='dataset-filenames-store'),
+        dcc.Store(id='log-offset-store'),
         dcc.Interval(
             id='interval-component', 
             interval=1000
@@ -131,7 +131,7 @@ def dashboard(track_dir, port=8888):
 
     @callback(
         Output('multiplot-graph', 'figure'),
-        Output('dataset-filenames-store', 'data'),
+        Output('log-offset-store', 'data'),
         Output('elapsed-store', 'data'),
         Output('size-store', 'data'),
         Input('dataset-dropdown', 'value')
@@ -152,10 +152,12 @@ def dashboard(track_dir, port=8888):
                             row=3, col=1)
         # figure.update_layout(height=600, uirevision=True, margin=dict(t=40))
         if run_name is not None:
-            run_dir = track_dir / 'logs' / run_name
-            all_fns = [str(x) for x in Path(run_dir).glob('*.log')]
-            if all_fns != []:
-                species = list(read_log(all_fns[0])['species'].keys())
+            log_fn = run_log.find_log(track_dir / 'logs' / run_name,
+                                      track_dir.resolve().name)
+            # Species names come from the first record
+            records, _ = run_log.read(log_fn, limit=1)
+            if records != []:
+                species = list(records[0]['species'].keys())
                 for i, s in enumerate(species):
                     figure.add_trace(row=1, col=1,
                                      trace=go.Scatter(x=[], 
@@ -177,7 +179,7 @@ def dashboard(track_dir, port=8888):
                                                   line=dict(color='black'),
                                                   name='ratio',
                                                   showlegend=False))
-                return figure, {'analyzed_fns': []}, 0, 0
+                return figure, {'offset': 0}, 0, 0
             
         figure.add_trace(row=1, col=1,
                          trace=go.Scatter(x=[], 
@@ -188,39 +190,38 @@ def dashboard(track_dir, port=8888):
         figure.add_trace(row=3, col=1,
                          trace=go.Scatter(x=[], 
                                           y=[],))
-        return figure, {'analyzed_fns': []}, 0, 0
+        return figure, {'offset': 0}, 0, 0
 
     @callback(
         Output('multiplot-graph', 'extendData'),
-        Output('dataset-filenames-store', 'data', allow_duplicate=True),
+        Output('log-offset-store', 'data', allow_duplicate=True),
         Output('elapsed-store', 'data', allow_duplicate=True),
         Output('size-store', 'data', allow_duplicate=True),
         Input('interval-component', 'n_intervals'),
         State('dataset-dropdown', 'value'),
         State('multiplot-graph', 'figure'),
-        State('dataset-filenames-store', 'data'),
+        State('log-offset-store', 'data'),
         State('elapsed-store', 'data'),
         State('size-store', 'data'),
         prevent_initial_call=True
     )
-    def update_multiplot_data(n_intervals, run_name, figure, dataset_fns, elapsed_time, size):
+    def update_multiplot_data(n_intervals, run_name, figure, log_offset, elapsed_time, size):
         if run_name is None:
-            return None, dataset_fns, 0, 0
-        run_dir = track_dir / 'logs' / run_name
+            return None, log_offset, 0, 0
+        log_fn = run_log.find_log(track_dir / 'logs' / run_name,
+                                  track_dir.resolve().name)
 
-        dataset_fns = dataset_fns or {'analyzed_fns': []}
+        # Only read records appended since the last update
+        log_offset = log_offset or {'offset': 0}
+        records, offset = run_log.read(log_fn, log_offset['offset'])
 
-        all_fns = [str(x) for x in Path(run_dir).glob('*.log')]
-        fns = sorted(set(all_fns) - set(dataset_fns['analyzed_fns']))
-
-        if len(all_fns) == 0:
-            return None, dataset_fns, 0, 0
-        species = list(read_log(all_fns[0])['species'].keys())
+        if len(records) == 0:
+            return None, log_offset, elapsed_time, size
+        species = list(records[0]['species'].keys())
 
         x = []
         y = []
-        for fn in fns:
-            log_dict = read_log(fn)
+        for log_dict in records:
             x.append(log_dict['world']['timestep'])
             y.append(log_dict['species'])
             elapsed_time += log_dict['world']['elapsed_time']
@@ -236,8 +237,7 @@ def dashboard(track_dir, port=8888):
             },
             list(range(2 * len(species) + 1))
         ]
-        dataset_fns['analyzed_fns'].extend(fns)
-        return extendData, dataset_fns, elapsed_time, size
+        return extendData, {'offset': offset}, elapsed_time, size
     
     app.run(port=port, debug=True)
 
@@ -1,5 +1,5 @@
-import json
 import glob
+from functools import cached_property
 from pathlib import Path
 
 import matplotlib  
@@ -9,24 +9,130 @@ import numpy as np
 
 from blossom import dataset_io
 from blossom import population_funcs
+from blossom.simulation import run_log
 
 
 def read_log(fn):
-    with open(fn, 'r') as f:
-        return json.load(f)
+    """
+    Read all records of a run log (see :mod:`blossom.simulation.run_log`).
+    """
+    records, _ = run_log.read(fn)
+    return records
 
 
 class Snapshot(object):
     """
     Single time snapshot of universe.
+
+    Parts of the dataset are only read and decoded when first accessed: the
+    statistics and world come from the header and grids alone, columns only
+    decode the fields asked for, and Organism objects are only built when
+    ``organisms`` (or ``population_dict``) is used. JSON datasets are parsed
+    once, when first needed.
     """
 
-    def __init__(self, dataset_fn):
-        self.population_dict, self.world, _ = dataset_io.load_universe(dataset_fn)
-        self.organisms_by_location = population_funcs.hash_by_location(
-            population_funcs.get_organism_list(self.population_dict)
-        )
-        self.current_time = self.world.current_time
+    def __init__(self, dataset_fn, keyframe_cache=None):
+        """
+        Parameters
+        ----------
+        dataset_fn : str
+            Filename of the saved dataset
+        keyframe_cache : dict, optional
+            Decoded keyframes shared between snapshots of the same run, for
+            datasets saved as deltas
+        """
+        self.dataset_fn = Path(dataset_fn)
+        self.format = dataset_io.dataset_format(self.dataset_fn)
+        self.keyframe_cache = keyframe_cache
+
+    @cached_property
+    def _universe_dict(self):
+        return dataset_io.read_json_file(self.dataset_fn)
+
+    @cached_property
+    def header(self):
+        """
+        Header of an npz dataset, or the world and run information of a JSON
+        dataset.
+        """
+        if self.format == 'npz':
+            return dataset_io.read_npz_header(self.dataset_fn)
+        return {'world': self._universe_dict['world'],
+                'info': self._universe_dict['info']}
+
+    @property
+    def current_time(self):
+        return self.header['world']['current_time']
+
+    @cached_property
+    def statistics(self):
+        """
+        Saved statistics per species.
+        """
+        if self.format == 'npz':
+            return {
+                species_header['name']: species_header['statistics']
+                for species_header in self.header['population']['species']
+            }
+        return {
+            species: species_dict['statistics']
+            for species, species_dict
+            in self._universe_dict['population'].items()
+        }
+
+    @cached_property
+    def world(self):
+        if self.format == 'npz':
+            return dataset_io.read_npz_world(self.dataset_fn)
+        return dataset_io.world_from_dict(self._universe_dict['world'],
+                                          self.dataset_fn.parent)
+
+    def columns(self, fields=None, species=None):
+        """
+        Organism fields as columns, without building Organism objects.
+
+        Parameters
+        ----------
+        fields : list of str, optional
+            Fields to decode. All fields if None.
+        species : list of str, optional
+            Species to include. All species if None.
+
+        Returns
+        -------
+        columns : dict
+            Dict of columns keyed by field name, per species
+        """
+        if self.format == 'npz':
+            population, _ = dataset_io.read_npz_population(
+                self.dataset_fn,
+                fields=fields,
+                keyframe_cache=self.keyframe_cache
+            )
+        else:
+            population, _ = dataset_io.population_from_dict(
+                self._universe_dict['population'],
+                fields=fields,
+                dimensionality=self.header['world']['dimensionality']
+            )
+        return {
+            species_name: species_columns.columns
+            for species_name, species_columns in population.species.items()
+            if species is None or species_name in species
+        }
+
+    @cached_property
+    def population_dict(self):
+        population_dict, _, _ = dataset_io.read_dataset(self.dataset_fn)
+        return population_dict
+
+    @cached_property
+    def organisms(self):
+        return population_funcs.get_organism_list(self.population_dict)
+
+    @cached_property
+    def organisms_by_location(self):
+        return population_funcs.hash_by_location(self.organisms)
 
     def plot_2d(self, label, attr_func):
         """
@@ -51,20 +157,80 @@ class TimeSeries(object):
 
     def __init__(self, dataset_dir):
         self.dataset_dir = Path(dataset_dir)
-        self.dataset_fns = sorted(self.dataset_dir.glob('*.json'))
+        self.dataset_fns = dataset_io.find_datasets(self.dataset_dir)
         self.index = 0
+        self.keyframe_cache = {}
 
     def __iter__(self):
         return self
 
     def __next__(self):
         try:
-            ds = Snapshot(self.dataset_fns[self.index])
+            ds = Snapshot(self.dataset_fns[self.index],
+                          keyframe_cache=self.keyframe_cache)
         except IndexError:
             raise StopIteration
         self.index += 1
         return ds
 
+    def snapshots(self):
+        """
+        Iterate over lazily loaded snapshots, independently of iteration over
+        the TimeSeries itself.
+        """
+        for ds_fn in self.dataset_fns:
+            yield Snapshot(ds_fn, keyframe_cache=self.keyframe_cache)
+
+    def statistics(self):
+        """
+        Species statistics of every dataset, as arrays over time. For npz
+        datasets, only headers are read.
+
+        Returns
+        -------
+        timesteps : np.ndarray
+            Time step of each dataset
+        statistics : dict
+            Arrays of each statistic (e.g. 'alive'), per species. Species
+            missing from a dataset count as 0.
+        """
+        timesteps = []
+        rows = []
+        for ds in self.snapshots():
+            timesteps.append(ds.current_time)
+            rows.append(ds.statistics)
+        statistics = {}
+        for i, row in enumerate(rows):
+            for species, species_statistics in row.items():
+                species_arrays = statistics.setdefault(species, {})
+                for key, value in species_statistics.items():
+                    if key not in species_arrays:
+                        species_arrays[key] = np.zeros(len(rows))
+                    species_arrays[key][i] = value
+        return np.array(timesteps), statistics
+
+    def project(self, fields, species=None):
+        """
+        Iterate over a few organism fields across all datasets, decoding only
+        these fields. Datasets saved as deltas share decoded keyframes.
+
+        Parameters
+        ----------
+        fields : list of str
+            Fields to decode.
+        species : list of str, optional
+            Species to include. All species if None.
+
+        Yields
+        ------
+        timestep : int
+            Time step of the dataset
+        columns : dict
+            Dict of columns keyed by field name, per species
+        """
+        for ds in self.snapshots():
+            yield ds.current_time, ds.columns(fields=fields, species=species)
+
     def plot_ts(self, attr_funcs):
         """
         attr_funcs is a list of tuples (label, function), where the function
@@ -72,8 +238,7 @@ class TimeSeries(object):
         simulation.
         """
         attr_vals = {label: [] for label, func in attr_funcs}
-        for ds_fn in self.dataset_fns:
-            ds = Snapshot(ds_fn)
+        for ds in self.snapshots():
             for label, attr_func in attr_funcs:
                 attr_vals[label].append(attr_func(ds))
 
@@ -0,0 +1,85 @@
+"""
+Microbenchmark of Organism cloning, comparing the slotted fast clone with the
+previous approach of re-running __init__ on the organism's dict.
+
+The legacy path is a copy of Organism as it was before the slotted layout and
+the dispatch tables: every field is set with setattr on a plain instance, and
+linked custom modules are executed again on every construction.
+"""
+import sys
+import copy
+import timeit
+import importlib.util
+
+from context import blossom
+from blossom.simulation import default_fields
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+
+class LegacyOrganism(object):
+    """
+    Organism with the original __init__, to_dict and clone.
+    """
+
+    def __init__(self, init_dict={}):
+        for (field, default) in default_fields.organism_fields.items():
+            setattr(self, field, init_dict.get(field, default))
+
+        init_keys = set(init_dict.keys())
+        default_keys = set(default_fields.organism_fields.keys())
+        for custom_field in (init_keys - default_keys):
+            setattr(self, custom_field, init_dict[custom_field])
+
+        if self.drinking_type is not None and self.water_current is None:
+            self.water_current = self.water_initial
+
+        if self.eating_type is not None and self.food_current is None:
+            self.food_current = self.food_initial
+
+        if self.custom_module_fns is not None:
+            self._custom_modules = []
+            for i, path in enumerate(self.custom_module_fns):
+                spec = importlib.util.spec_from_file_location(str(i), path)
+                temp_module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(temp_module)
+                self._custom_modules.append(temp_module)
+
+    def to_dict(self):
+        organism_vars = vars(self)
+        public_vars = {key: val
+                       for key, val in organism_vars.items()
+                       if not key.startswith('_')}
+        return public_vars
+
+    @classmethod
+    def clone(cls, organism):
+        new_organism = cls(organism.to_dict())
+        new_organism.ancestry = copy.copy(new_organism.ancestry)
+        new_organism.location = copy.copy(new_organism.location)
+        return new_organism
+
+
+init_dict = {
+    'organism_id': 0,
+    'species_name': 'species1',
+    'movement_type': 'simple_random',
+    'reproduction_type': 'pure_replication',
+    'drinking_type': 'constant_drink',
+    'action_type': 'move_reproduce_drink',
+    'water_capacity': 40,
+    'water_initial': 20,
+    'water_metabolism': 1,
+    'water_intake': 4,
+    'max_time_without_water': 3,
+    'location': [3, 4],
+    'ancestry': [0, 1, 2],
+    'custom_module_fns': None,
+}
+
+for label, cls in [('legacy', LegacyOrganism),
+                   ('fast', blossom.Organism)]:
+    organism = cls(init_dict)
+    seconds = min(timeit.repeat(lambda: cls.clone(organism), number=N,
+                                repeat=3))
+    print(f'{label:>8}: {seconds / N * 1e6:.2f} us per clone')
@@ -0,0 +1,72 @@
+"""
+Benchmark of dataset write throughput and size with each codec, against
+plain JSON. Datasets are saved from a universe run for a few time steps.
+Throughput is given in MiB of plain JSON written per second, so that all
+formats and codecs are compared on the same amount of data.
+"""
+import sys
+import time
+import types
+import tempfile
+from pathlib import Path
+import numpy as np
+
+from context import blossom
+from blossom.simulation import dataset_io as dio
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+REPEAT = 3
+
+universe = blossom.Universe(
+    world_param_dict={'world_size': [100, 100],
+                      'dimensionality': 2,
+                      'water': np.full([100, 100], 50.0)},
+    species_param_dicts=[{
+        'species_name': 'species1',
+        'population_size': N,
+        'movement_type': 'simple_random',
+        'reproduction_type': 'pure_replication',
+        'drinking_type': 'constant_drink',
+        'action_type': 'move_reproduce_drink',
+        'water_capacity': 40,
+        'water_initial': 20,
+        'water_metabolism': 1,
+        'water_intake': 4,
+        'max_time_without_water': 3,
+        'max_age': 20,
+        'custom_module_fns': None,
+    }],
+    project_dir=tempfile.mkdtemp(),
+    seed=0,
+    checkpoint_on_exit=False
+)
+for _ in range(3):
+    universe.step(save=False)
+
+plain_size = None
+with tempfile.TemporaryDirectory() as tmp_dir:
+    for snapshot_format in ['json', 'npz']:
+        for compression in [None, 'zlib', 'gzip', 'lzma']:
+            for level in ([None] if compression is None else [1, 6]):
+                state = types.SimpleNamespace(**vars(universe))
+                state.snapshot_format = snapshot_format
+                state.compression = compression
+                state.compression_level = level
+                state.keyframes = None
+                state.run_data_dir = Path(tmp_dir)
+                seconds = []
+                for _ in range(REPEAT):
+                    start = time.perf_counter()
+                    data_fn = dio.save_checkpoint(state)
+                    seconds.append(time.perf_counter() - start)
+                size = data_fn.stat().st_size
+                if plain_size is None:
+                    plain_size = size
+                label = f'{snapshot_format} {compression or "none"}'
+                if level is not None:
+                    label += f' -{level}'
+                print(f'{label:>16}: {size / 2**20:8.2f} MiB '
+                      f'({plain_size / size:6.1f}x), '
+                      f'{min(seconds) * 1e3:8.1f} ms, '
+                      f'{plain_size / 2**20 / min(seconds):8.1f} MiB/s')
+                data_fn.unlink()
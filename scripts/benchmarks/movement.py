@@ -0,0 +1,51 @@
+"""
+Benchmark of per-organism movement against the vectorized species-level
+movement kernel.
+"""
+import sys
+import time
+import types
+import numpy as np
+
+from context import blossom
+from blossom.simulation.organism_behavior import movement
+from blossom.simulation.population_store import SpeciesColumns
+
+WORLD_SIZE = [1000, 1000]
+
+universe = types.SimpleNamespace(
+    rng=np.random.default_rng(0),
+    world=blossom.World({'world_size': WORLD_SIZE, 'dimensionality': 2})
+)
+
+for n in [int(x) for x in sys.argv[1:]] or [10**5, 10**6]:
+    locations = universe.rng.integers(0, WORLD_SIZE[0], size=(n, 2))
+
+    species_columns = SpeciesColumns(
+        'species1',
+        {'location': locations.copy(), 'alive': np.ones(n, dtype=bool)},
+        dimensionality=2
+    )
+    start = time.perf_counter()
+    movement.simple_random_vectorized(species_columns,
+                                      np.arange(n),
+                                      universe)
+    vectorized = time.perf_counter() - start
+
+    template = blossom.Organism({'organism_id': 0,
+                                 'species_name': 'species1',
+                                 'location': [0, 0],
+                                 'custom_module_fns': None})
+    n_scalar = min(n, 10**5)
+    organisms = []
+    for location in locations[:n_scalar].tolist():
+        organism = template.clone_self()
+        organism.location = location
+        organisms.append(organism)
+    start = time.perf_counter()
+    for organism in organisms:
+        movement.simple_random(organism, universe)
+    scalar = (time.perf_counter() - start) * n / n_scalar
+
+    print(f'N = {n}: scalar {scalar:.3f} s, vectorized {vectorized:.4f} s '
+          f'({scalar / vectorized:.0f}x)')
@@ -0,0 +1,75 @@
+"""
+Benchmark of the parallel engine's time per step with increasing numbers of
+worker processes, with and without shared world grids, against the serial
+object engine. Also checks that every configuration gives the same
+population.
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from context import blossom
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+STEPS = 5
+SIZE = 200
+
+
+def make_universe(engine, workers=1, shared_world=False):
+    return blossom.Universe(
+        world_param_dict={'world_size': [SIZE, SIZE],
+                          'dimensionality': 2,
+                          'water': np.full([SIZE, SIZE], 50.0)},
+        species_param_dicts=[{
+            'species_name': 'species1',
+            'population_size': N,
+            'movement_type': 'simple_random',
+            'reproduction_type': 'pure_replication',
+            'drinking_type': 'constant_drink',
+            'action_type': 'move_reproduce_drink',
+            'water_capacity': 40,
+            'water_initial': 20,
+            'water_metabolism': 1,
+            'water_intake': 4,
+            'max_time_without_water': 3,
+            'max_age': 20,
+            'custom_module_fns': None,
+        }],
+        project_dir=tempfile.mkdtemp(),
+        seed=0,
+        checkpoint_on_exit=False,
+        engine=engine,
+        workers=workers,
+        shared_world=shared_world
+    )
+
+
+def run(engine, workers=1, shared_world=False):
+    universe = make_universe(engine, workers, shared_world)
+    # First step starts the worker processes
+    universe.step(save=False)
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        universe.step(save=False)
+    seconds = (time.perf_counter() - start) / STEPS
+    universe.close()
+    ids = sorted(organism.organism_id for organism in universe.organisms)
+    return seconds, ids
+
+
+serial, _ = run('object')
+print(f'{"object":>16}: {serial * 1e3:8.1f} ms/step')
+reference = None
+workers = 1
+while workers <= os.cpu_count():
+    for shared_world in ([False] if workers == 1 else [False, True]):
+        seconds, ids = run('parallel', workers, shared_world)
+        if reference is None:
+            reference = ids
+        label = f'parallel x{workers}' + (' shm' if shared_world else '')
+        print(f'{label:>16}: {seconds * 1e3:8.1f} ms/step '
+              f'({serial / seconds:5.2f}x), '
+              f'{"same" if ids == reference else "DIFFERENT"} population')
+    workers *= 2
@@ -0,0 +1,66 @@
+import numpy as np
+
+from blossom.simulation.universe import Universe
+
+
+CONFIG = '''
+species:
+  - name: grazer
+    population: 20
+    max_age: 100
+    action: move_only
+    movement: simple_random
+    linked_modules: []
+world:
+  dimensionality: 2
+  size: [6, 6]
+timesteps: 8
+seed: 0
+'''
+
+
+def write_config(project_dir):
+    """
+    Config file of a single species moving around a small world.
+    """
+    config_fn = project_dir / 'config.yml'
+    config_fn.write_text(CONFIG)
+    return config_fn
+
+
+def species_dict(**fields):
+    """
+    Species that moves, replicates and drinks with built-in behaviors.
+    """
+    return dict({'species_name': 'species1',
+                 'population_size': 50,
+                 'movement_type': 'simple_random',
+                 'reproduction_type': 'pure_replication',
+                 'drinking_type': 'constant_drink',
+                 'action_type': 'move_reproduce_drink',
+                 'water_capacity': 40,
+                 'water_initial': 20,
+                 'water_metabolism': 1,
+                 'water_intake': 4,
+                 'max_time_without_water': 3,
+                 'max_age': 8,
+                 'custom_module_fns': None},
+                **fields)
+
+
+def make_universe(project_dir, seed=0, **kwargs):
+    """
+    Small two-species universe with limited water.
+    """
+    return Universe(
+        world_param_dict={'world_size': [10, 10],
+                          'dimensionality': 2,
+                          'water': np.full([10, 10], 30.)},
+        species_param_dicts=[species_dict(),
+                             species_dict(species_name='species2',
+                                          population_size=30,
+                                          water_intake=6)],
+        project_dir=project_dir,
+        seed=seed,
+        **kwargs
+    )
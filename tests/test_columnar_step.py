@@ -0,0 +1,79 @@
+import types
+import numpy as np
+import pytest
+
+from blossom.simulation import columnar_step as cs
+from blossom.simulation.world import World
+from blossom.simulation.population_store import SpeciesColumns
+
+
+def test_allocate_proportional():
+    available = np.array([10., 4., 100.])
+    cells = np.array([0, 0, 1, 1, 1, 2])
+    requested = np.array([6., 6., 2., 2., 4., 5.])
+    granted = cs.allocate(available, cells, requested, mode='proportional')
+    assert np.allclose(granted, [5., 5., 1., 1., 2., 5.])
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_allocate_first_come(seed):
+    rng = np.random.default_rng(seed)
+    available = rng.integers(0, 10, size=5).astype(float)
+    cells = rng.integers(0, 5, size=40)
+    requested = rng.integers(1, 4, size=40).astype(float)
+    granted = cs.allocate(available, cells, requested,
+                          mode='first_come', seed=seed)
+
+    assert np.all(granted >= 0) and np.all(granted <= requested)
+    for cell in range(5):
+        on_cell = cells == cell
+        assert np.isclose(granted[on_cell].sum(),
+                          min(available[cell], requested[on_cell].sum()))
+        # Requests are served in full, except at most one that gets what is
+        # left
+        partial = (granted[on_cell] > 0) & (granted[on_cell]
+                                            < requested[on_cell])
+        assert partial.sum() <= 1
+
+    again = cs.allocate(available, cells, requested,
+                        mode='first_come', seed=seed)
+    assert np.array_equal(granted, again)
+
+
+def test_allocate_invalid_mode():
+    with pytest.raises(ValueError):
+        cs.allocate(np.ones(1), np.zeros(1, dtype=int), np.ones(1),
+                    mode='greedy')
+
+
+@pytest.mark.parametrize('mode', cs.consumption_modes)
+def test_consume(mode):
+    water = np.array([[10., 3.], [0., 8.]])
+    universe = types.SimpleNamespace(
+        world=World({'world_size': [2, 2],
+                     'dimensionality': 2,
+                     'water': water.copy()}),
+        rng=np.random.default_rng(0)
+    )
+    species_columns = SpeciesColumns(
+        'species1',
+        {'location': np.array([[0, 0], [0, 0], [0, 1], [0, 1], [1, 1]]),
+         'water_current': np.zeros(5),
+         'alive': np.ones(5, dtype=bool)},
+        dimensionality=2
+    )
+    batch = cs.SpeciesBatch(species_columns)
+    batch.add_request('water', np.arange(5), np.array([4., 4., 2., 2., 5.]))
+    # The last organism's intent wasn't selected, so its request is dropped
+    kept_rows = {'species1': np.arange(4)}
+
+    cs.consume(universe, {'species1': batch}, kept_rows, mode=mode)
+
+    levels = species_columns.columns['water_current']
+    assert levels[4] == 0
+    assert np.allclose(levels[:2], [4., 4.])
+    assert np.isclose(levels[2:4].sum(), 3.)
+    assert np.allclose(universe.world.water, [[2., 0.], [0., 8.]])
+    if mode == 'proportional':
+        assert np.allclose(levels[2:4], [1.5, 1.5])
+    assert 'water' in universe.world._changed_layers
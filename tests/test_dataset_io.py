@@ -0,0 +1,48 @@
+import pytest
+
+from blossom.simulation import dataset_io as dio
+from blossom.simulation.organism import Organism
+
+from helpers import make_universe
+
+
+@pytest.fixture
+def json_dataset(tmp_path):
+    universe = make_universe(tmp_path, compression='gzip')
+    for _ in range(3):
+        universe.step()
+    universe.close()
+    return dio.find_datasets(universe.run_data_dir)[-1]
+
+
+@pytest.mark.parametrize('batch_size', [None, 1, 7, 1000])
+def test_json_stream_batches(json_dataset, batch_size):
+    population_dict, world, info = dio.read_json_dataset(json_dataset)
+    # Small chunks, so that values are split across reads
+    with dio.JSONDatasetStream(json_dataset, chunk_size=64) as stream:
+        batches = list(stream.batches(batch_size=batch_size, as_dicts=True))
+
+    streamed = {}
+    for species, organisms in batches:
+        if batch_size is not None:
+            assert len(organisms) <= batch_size
+        streamed.setdefault(species, []).extend(organisms)
+    assert list(streamed) == list(population_dict)
+    for species in population_dict:
+        assert streamed[species] == [
+            organism.to_dict()
+            for organism in population_dict[species]['organisms']
+        ]
+        assert (stream.statistics[species]
+                == population_dict[species]['statistics'])
+    assert stream.info == info
+    assert stream.world_dict['current_time'] == world.current_time
+
+
+def test_json_stream_organisms(json_dataset):
+    with dio.JSONDatasetStream(json_dataset) as stream:
+        batches = list(stream.batches(batch_size=10))
+        with pytest.raises(ValueError):
+            list(stream.batches())
+    assert all(isinstance(organism, Organism)
+               for _, organisms in batches for organism in organisms)
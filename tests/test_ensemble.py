@@ -0,0 +1,49 @@
+import csv
+import pytest
+
+from blossom.simulation import ensemble
+
+from helpers import write_config
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_run_ensemble(tmp_path, max_workers):
+    config_fn = write_config(tmp_path)
+    results, summary_fn = ensemble.run_ensemble(config_fn, 3,
+                                                max_workers=max_workers,
+                                                verbose=False)
+    assert [result['seed'] for result in results] == [0, 1, 2]
+    assert all(result['status'] == 'completed' and result['timestep'] == 8
+               for result in results)
+    assert len({result['run'] for result in results}) == 3
+
+    with open(summary_fn, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 3 * 9
+    assert {(row['seed'], row['timestep']) for row in rows} == {
+        (str(seed), str(timestep))
+        for seed in range(3) for timestep in range(9)
+    }
+    assert all(row['species'] == 'grazer' and row['alive'] == '20'
+               for row in rows)
+
+    with pytest.raises(ValueError):
+        ensemble.run_ensemble(config_fn, [0, 0], verbose=False)
+
+
+def test_failed_and_stopped_runs(tmp_path):
+    config_fn = write_config(tmp_path)
+    results = ensemble.run_replicates(
+        [(config_fn, tmp_path, 0, {'end_time': 5, 'organism_limit': 10}),
+         (config_fn, tmp_path, 1, {'end_time': 5, 'engine': 'invalid'})],
+        max_workers=1
+    )
+    assert results[0]['status'] == 'organism_limit'
+    assert results[0]['timestep'] == 1
+    assert results[1]['status'] == 'failed'
+    assert results[1]['error'] is not None
+
+    rows = ensemble.summarize(tmp_path, results)
+    assert [row['status'] for row in rows] == ['organism_limit'] * 2 + [
+        'failed'
+    ]
@@ -0,0 +1,97 @@
+import uuid
+import numpy as np
+import pytest
+
+from blossom.simulation import dataset_io as dio
+from blossom.simulation.id_allocator import IDAllocator
+from blossom.simulation.universe import Universe
+
+from helpers import make_universe, species_dict
+
+
+LEGACY_REPRODUCTION = '''
+def legacy_replication(organism, universe):
+    child = organism.get_child(seed=universe.rng)
+    child.water_current = organism.water_current = organism.water_current / 2
+    return [organism, child]
+'''
+
+
+def test_allocation():
+    ids = IDAllocator()
+    assert ids.new_id() == 0
+    assert ids.new_ids(3).tolist() == [1, 2, 3]
+    ids.reserve([2, 10, str(uuid.uuid4())])
+    assert ids.new_id() == 11
+
+
+def test_uuid_round_trip():
+    ids = IDAllocator(seed=3)
+    organism_ids = [0, 1, 12345, np.int64(2**40), 2**62 - 1]
+    uuids = [ids.to_uuid(organism_id) for organism_id in organism_ids]
+    assert len(set(uuids)) == len(uuids)
+    assert all(uuid.UUID(value).version == 4 for value in uuids)
+    assert [ids.from_uuid(value) for value in uuids] == organism_ids
+    assert ids.from_uuids(uuids) == dict(zip(uuids, organism_ids))
+
+    # UUIDs from other runs, or random ones, aren't mapped
+    assert IDAllocator(seed=4).from_uuid(uuids[0]) is None
+    assert ids.from_uuid(str(uuid.uuid4())) is None
+    assert ids.from_uuid('not a uuid') is None
+    assert ids.ancestry_to_uuid([0, [1, 2]]) == [uuids[0],
+                                                 [uuids[1], ids.to_uuid(2)]]
+    with pytest.raises(ValueError):
+        ids.to_uuid(-1)
+
+
+@pytest.mark.parametrize('snapshot_format', ['json', 'npz'])
+def test_resume_exported_uuids(tmp_path, snapshot_format):
+    universe = make_universe(tmp_path, end_time=6, export_uuids=True,
+                             engine='columnar',
+                             snapshot_format=snapshot_format)
+    universe.run(verbosity=0)
+    universe.close()
+    dataset_fn = dio.find_datasets(universe.run_data_dir)[-1]
+    population_dict, _, _ = dio.read_dataset(dataset_fn)
+    saved_ids = [organism.organism_id
+                 for species in population_dict
+                 for organism in population_dict[species]['organisms']]
+    assert all(isinstance(organism_id, str) for organism_id in saved_ids)
+
+    resumed = Universe(dataset_fn=dataset_fn, end_time=6,
+                       export_uuids=True, engine='columnar',
+                       snapshot_format=snapshot_format)
+    organisms = list(resumed.organisms)
+    assert sorted(organism.organism_id for organism in organisms) == sorted(
+        resumed.ids.from_uuid(organism_id) for organism_id in saved_ids
+    )
+    assert all(isinstance(parent_id, int)
+               for organism in organisms
+               for parent_id in organism.ancestry)
+    assert resumed.ids.next_id == universe.ids.next_id
+
+
+@pytest.mark.parametrize('engine', ['object', 'columnar', 'parallel'])
+def test_children_without_allocator(tmp_path, engine):
+    module_fn = tmp_path / 'custom.py'
+    module_fn.write_text(LEGACY_REPRODUCTION)
+    universe = Universe(
+        world_param_dict={'world_size': [10, 10],
+                          'dimensionality': 2,
+                          'water': np.full([10, 10], 30.)},
+        species_param_dicts=[
+            species_dict(reproduction_type='legacy_replication',
+                         custom_module_fns=[str(module_fn)])
+        ],
+        project_dir=tmp_path,
+        seed=0,
+        engine=engine,
+        end_time=4
+    )
+    universe.run(verbosity=0)
+    universe.close()
+    organism_ids = [organism.organism_id for organism in universe.organisms]
+    assert len(organism_ids) > 50
+    assert all(isinstance(organism_id, int) for organism_id in organism_ids)
+    assert len(set(organism_ids)) == len(organism_ids)
+    assert max(organism_ids) < universe.ids.next_id
@@ -0,0 +1,75 @@
+import numpy as np
+
+from blossom.simulation import dataset_io as dio
+from blossom.simulation.layer_store import LayerStore
+from blossom.simulation.universe import Universe
+from blossom.simulation.world import World
+
+from helpers import species_dict
+
+
+UNMARKED_DRINK = '''
+def unmarked_drink(organism, universe):
+    x, y = organism.location
+    intake = min(universe.world.water[x][y],
+                 organism.water_capacity - organism.water_current,
+                 organism.water_intake)
+    organism.water_current += intake
+    universe.world.water[x][y] -= intake
+    return [organism]
+'''
+
+
+def make_world(water):
+    return World({'world_size': list(water.shape),
+                  'dimensionality': 2,
+                  'water': water})
+
+
+def test_commit_versions(tmp_path):
+    world = make_world(np.full([4, 4], 5.))
+    store = LayerStore(tmp_path)
+    references = store.commit(world)
+    assert references['water'] == {'layer': 'world/water.v0.npy'}
+
+    # Unmarked, unchanged layers are not saved again
+    assert store.commit(world)['water'] == {'layer': 'world/water.v0.npy'}
+
+    # Unmarked changes are found by comparing with the saved version
+    world.water[1][2] -= 1
+    references = store.commit(world)
+    assert references['water'] == {'layer': 'world/water.v1.npy'}
+    assert np.load(tmp_path / 'world/water.v1.npy')[1, 2] == 4
+
+    world.water[0][0] -= 1
+    world.mark_changed('water')
+    assert store.commit(world)['water'] == {'layer': 'world/water.v2.npy'}
+    assert world._changed_layers == set()
+
+
+def test_unmarked_custom_behavior(tmp_path):
+    module_fn = tmp_path / 'custom.py'
+    module_fn.write_text(UNMARKED_DRINK)
+    species = species_dict(drinking_type='unmarked_drink',
+                           custom_module_fns=[str(module_fn)])
+    universe = Universe(
+        world_param_dict={'world_size': [10, 10],
+                          'dimensionality': 2,
+                          'water': np.full([10, 10], 30.)},
+        species_param_dicts=[species],
+        project_dir=tmp_path,
+        seed=0,
+        memmap_world=True,
+        end_time=4
+    )
+    waters = {}
+    for _ in range(4):
+        universe.step()
+        waters[universe.current_time] = np.array(universe.world.water)
+    universe.close()
+    assert not np.array_equal(waters[1], waters[4])
+
+    for fn in dio.find_datasets(universe.run_data_dir):
+        _, world, _ = dio.read_dataset(fn)
+        if world.current_time in waters:
+            assert np.array_equal(world.water, waters[world.current_time])
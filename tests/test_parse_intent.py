@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from blossom.simulation import parse_intent
+
+
+class Stub(object):
+    """
+    Minimal organism for intent resolution.
+    """
+
+    def __init__(self, organism_id, alive=True):
+        self.organism_id = organism_id
+        self.alive = alive
+
+    def step_without_acting(self):
+        return Stub(self.organism_id, self.alive)
+
+
+def baseline_parse(intent_list, organism_list, seed=None):
+    """
+    Set-based implementation of parse_intent.parse before integer indices.
+    """
+    rng = np.random.default_rng(seed)
+    updated_list = []
+    id_org_dict = {organism.organism_id: organism
+                   for organism in organism_list}
+    new_organism_ids = set()
+    intent_list = list(intent_list)
+    rng.shuffle(intent_list)
+    for organism_set in intent_list:
+        set_ids = set(organism.organism_id for organism in organism_set)
+        if len(new_organism_ids & set_ids) == 0:
+            updated_list.extend(organism_set)
+            new_organism_ids.update(set_ids)
+    for organism_id, organism in id_org_dict.items():
+        if organism_id not in new_organism_ids and organism.alive:
+            updated_list.append(organism)
+    return updated_list
+
+
+def random_intents(rng, n_organisms=50):
+    """
+    Intents of a random population, where some organisms also appear in
+    other organisms' intents (e.g. as prey), and some have children.
+    """
+    organisms = [Stub(i, alive=rng.random() > 0.1) for i in range(n_organisms)]
+    next_id = n_organisms
+    intent_list = []
+    for organism in organisms:
+        if not organism.alive:
+            continue
+        organism_set = [Stub(organism.organism_id)]
+        if rng.random() < 0.3:
+            organism_set.append(Stub(int(rng.integers(n_organisms))))
+        if rng.random() < 0.2:
+            organism_set.append(Stub(next_id))
+            next_id += 1
+        intent_list.append(organism_set)
+    return intent_list, organisms
+
+
+def signature(organism_list):
+    return [(organism.organism_id, organism.alive)
+            for organism in organism_list]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_parse_matches_baseline(seed):
+    rng = np.random.default_rng(seed)
+    intent_list, organisms = random_intents(rng)
+    expected = baseline_parse(intent_list, organisms, seed=seed)
+    result = parse_intent.parse(intent_list, organisms, seed=seed)
+    assert signature(result) == signature(expected)
+
+
+def test_resolve_is_conflict_free():
+    rng = np.random.default_rng(0)
+    intent_lengths = rng.integers(1, 4, size=200)
+    entries = rng.integers(0, 150, size=intent_lengths.sum())
+    order, accepted, claimed = parse_intent.resolve(intent_lengths,
+                                                    entries,
+                                                    n_indices=150,
+                                                    seed=1)
+    offsets = np.concatenate([[0], np.cumsum(intent_lengths)])
+    selected = [np.unique(entries[offsets[k]:offsets[k + 1]])
+                for k in np.flatnonzero(accepted)]
+    selected = np.concatenate(selected)
+    assert len(selected) == len(np.unique(selected))
+    assert np.array_equal(np.flatnonzero(claimed), np.unique(selected))
+    assert sorted(order) == list(range(len(intent_lengths)))
@@ -0,0 +1,33 @@
+import numpy as np
+
+from blossom.simulation import run_log
+from blossom.visualization import parsing
+
+from helpers import make_universe
+
+
+def test_snapshots_and_log(tmp_path):
+    universe = make_universe(tmp_path, engine='columnar',
+                             snapshot_format='npz', end_time=4)
+    universe.run(verbosity=0)
+
+    records = parsing.read_log(run_log.find_log(universe.run_logs_dir,
+                                                tmp_path.name))
+    assert [record['world']['timestep'] for record in records] == list(
+        range(5)
+    )
+
+    series = parsing.TimeSeries(universe.run_data_dir)
+    timesteps, statistics = series.statistics()
+    assert timesteps.tolist() == list(range(5))
+    for record, i in zip(records, range(5)):
+        for species, species_statistics in record['species'].items():
+            assert statistics[species]['alive'][i] == \
+                species_statistics['alive']
+
+    for timestep, columns in series.project(['age'], species=['species1']):
+        assert list(columns) == ['species1']
+        assert 'age' in columns['species1']
+        assert 'water_current' not in columns['species1']
+    snapshot = parsing.Snapshot(series.dataset_fns[-1])
+    assert np.array_equal(snapshot.world.water, universe.world.water)
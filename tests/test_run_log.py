@@ -0,0 +1,140 @@
+import pytest
+
+from blossom.simulation import run_log
+from blossom.simulation import compression as cmp
+
+
+def record(timestep):
+    return {'species': {'species1': {'alive': 100 + timestep % 7,
+                                     'dead': timestep,
+                                     'total': 100 + timestep}},
+            'world': {'timestep': timestep, 'elapsed_time': 0.01},
+            'info': {'initial_seed': 0, 'size': 1000}}
+
+
+def timesteps(records):
+    return [record['world']['timestep'] for record in records]
+
+
+@pytest.fixture(params=[None, 'gzip', 'lzma', 'zlib'])
+def log_fn(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(run_log, 'block_size', 4)
+    return run_log.log_filename(tmp_path, 'project', request.param)
+
+
+def test_read_from_offset(log_fn):
+    assert run_log.read(log_fn)[0] == []
+    for timestep in range(5):
+        run_log.append(log_fn, record(timestep))
+    records, offset = run_log.read(log_fn)
+    assert timesteps(records) == list(range(5))
+
+    for timestep in range(5, 8):
+        run_log.append(log_fn, record(timestep))
+    records, offset = run_log.read(log_fn, offset)
+    assert timesteps(records) == [5, 6, 7]
+    assert run_log.read(log_fn, offset) == ([], offset)
+
+
+def test_read_limit(log_fn):
+    for timestep in range(10):
+        run_log.append(log_fn, record(timestep))
+    offset = 0
+    read = []
+    for _ in range(5):
+        records, offset = run_log.read(log_fn, offset, limit=3)
+        assert len(records) <= 3
+        read.extend(timesteps(records))
+    assert read == list(range(10))
+    assert timesteps(run_log.read(log_fn, limit=1)[0]) == [0]
+
+
+def test_incomplete_record(log_fn):
+    run_log.append(log_fn, record(0))
+    if cmp.get_compression(log_fn) is None:
+        partial = b'{"species": {'
+    else:
+        run_log.flush(log_fn)
+        partial = cmp.compress(b'{"species": {}}\n', 'gzip')[:-3]
+    with open(log_fn, 'ab') as f:
+        f.write(partial)
+    records, offset = run_log.read(log_fn)
+    assert timesteps(records) == [0]
+
+
+def test_truncate(log_fn):
+    for timestep in range(10):
+        run_log.append(log_fn, record(timestep))
+    run_log.truncate(log_fn, 6)
+    run_log.append(log_fn, record(7))
+    assert timesteps(run_log.read(log_fn)[0]) == list(range(8))
+    assert run_log.find_log(log_fn.parent, 'project') == log_fn
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'lzma', 'zlib'])
+def test_compressed_blocks(tmp_path, monkeypatch, compression):
+    monkeypatch.setattr(run_log, 'block_size', 4)
+    log_fn = run_log.log_filename(tmp_path, 'project', compression)
+    pending_fn = run_log.pending_filename(log_fn)
+    run_log.append(log_fn, record(0))
+    assert not log_fn.is_file()
+    assert run_log.find_log(tmp_path, 'project') == log_fn
+    run_log.truncate(log_fn, -1)
+
+    # Records are read one at a time while blocks fill up, without
+    # duplicates across block boundaries
+    offset = 0
+    read = []
+    for timestep in range(10):
+        run_log.append(log_fn, record(timestep))
+        records, offset = run_log.read(log_fn, offset)
+        read.extend(timesteps(records))
+    assert read == list(range(10))
+    assert run_log.find_log(tmp_path, 'project') == log_fn
+    with open(log_fn, 'rb') as f:
+        blocks = list(cmp.iter_frames(f, compression))
+    assert [len(frame.splitlines()) for frame, _ in blocks] == [4, 4]
+    assert pending_fn.is_file()
+
+    run_log.flush(log_fn)
+    assert not pending_fn.is_file()
+    assert timesteps(run_log.read(log_fn)[0]) == list(range(10))
+    assert run_log.read(log_fn, offset)[0] == []
+
+    # Truncating within a block keeps its first records as pending
+    run_log.truncate(log_fn, 5)
+    assert timesteps(run_log.read(log_fn)[0]) == list(range(6))
+    for timestep in range(6, 12):
+        run_log.append(log_fn, record(timestep))
+    assert timesteps(run_log.read(log_fn)[0]) == list(range(12))
+
+
+def test_stale_pending_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_log, 'block_size', 4)
+    log_fn = run_log.log_filename(tmp_path, 'project', 'gzip')
+    for timestep in range(3):
+        run_log.append(log_fn, record(timestep))
+    pending = run_log.pending_filename(log_fn).read_bytes()
+    run_log.append(log_fn, record(3))
+
+    # Pending records left behind after their block was written are ignored
+    run_log.pending_filename(log_fn).write_bytes(pending)
+    assert timesteps(run_log.read(log_fn)[0]) == list(range(4))
+    run_log.append(log_fn, record(4))
+    assert timesteps(run_log.read(log_fn)[0]) == list(range(5))
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'lzma', 'zlib'])
+def test_open_file(tmp_path, compression):
+    fn = cmp.add_suffix(tmp_path / 'dataset.json', compression)
+    assert cmp.get_compression(fn) == compression
+    assert cmp.strip_suffix(fn) == tmp_path / 'dataset.json'
+    text = '{"organisms": []}\n' * 1000
+    with cmp.open_file(fn, 'wt', compression) as f:
+        f.write(text)
+    with cmp.open_file(fn, 'rt', compression) as f:
+        assert f.read() == text
+    if compression is not None:
+        assert fn.stat().st_size < len(text) / 10
+    with pytest.raises(ValueError):
+        cmp.check_codec('bz2')
@@ -0,0 +1,106 @@
+import numpy as np
+
+from blossom.simulation import snapshot_format
+from blossom.simulation import dataset_io as dio
+from blossom.simulation.population_store import PopulationStore, \
+    SpeciesColumns
+
+from helpers import make_universe
+
+
+def organism_dict(organism_id, **fields):
+    return dict({'organism_id': organism_id,
+                 'species_name': 'species1',
+                 'location': [organism_id % 5, organism_id % 3],
+                 'ancestry': list(range(organism_id % 4)),
+                 'alive': True,
+                 'age': organism_id,
+                 'water_current': 10.},
+                **fields)
+
+
+def make_population(organism_dicts):
+    return PopulationStore({
+        'species1': SpeciesColumns.from_dicts('species1',
+                                              organism_dicts,
+                                              dimensionality=2)
+    })
+
+
+def rows(population):
+    species_columns = population.species['species1']
+    return [species_columns.row_dict(i) for i in range(len(species_columns))]
+
+
+def test_population_delta_round_trip():
+    keyframe = make_population([organism_dict(i) for i in range(20)])
+    # Some organisms are gone, some changed and some were born
+    changed = [organism_dict(i) for i in range(20) if i % 7 != 3]
+    changed[0].update(alive=False, cause_of_death='thirst', age_at_death=0)
+    changed[5]['location'] = [4, 4]
+    changed[6]['water_current'] = 2.5
+    changed.append(organism_dict(20, ancestry=[1, 2, [3, 4]]))
+    population = make_population(changed)
+
+    keyframe_header, keyframe_arrays = snapshot_format.encode_population(
+        keyframe
+    )
+    decoded_keyframe, _ = snapshot_format.decode_population(keyframe_header,
+                                                            keyframe_arrays)
+    assert rows(decoded_keyframe) == rows(keyframe)
+
+    header, arrays = snapshot_format.encode_population_delta(keyframe,
+                                                             population)
+    decoded, statistics = snapshot_format.decode_population_delta(
+        decoded_keyframe, header, arrays
+    )
+    assert rows(decoded) == rows(population)
+    assert statistics['species1'] == population.species['species1'] \
+        .statistics()
+
+
+def test_grids_delta_round_trip():
+    keyframe_arrays = {'world/water': np.arange(100.).reshape(10, 10),
+                       'world/food': np.ones((10, 10))}
+    world_arrays = {'world/water': keyframe_arrays['world/water'].copy(),
+                    'world/food': np.zeros((10, 10))}
+    world_arrays['world/water'][3, 4] = -1
+    grids, arrays = snapshot_format.encode_grids_delta(keyframe_arrays,
+                                                       world_arrays)
+    assert grids['world/water']['kind'] == 'sparse'
+    assert grids['world/food']['kind'] == 'full'
+    decoded = snapshot_format.decode_grids_delta(keyframe_arrays,
+                                                 grids,
+                                                 arrays)
+    for key, grid in world_arrays.items():
+        assert np.array_equal(decoded[key], grid)
+
+
+def test_keyframe_datasets(tmp_path):
+    universe = make_universe(tmp_path, engine='columnar',
+                             snapshot_format='npz', keyframe_every=3)
+    expected = {}
+    for _ in range(7):
+        universe.step()
+        expected[universe.current_time] = (universe.population.copy(),
+                                           np.array(universe.world.water))
+    universe.close()
+
+    dataset_fns = dio.find_datasets(universe.run_data_dir)
+    keyframes = 0
+    for fn in dataset_fns:
+        header = dio.read_npz_header(fn)
+        current_time = header['world']['current_time']
+        if current_time not in expected:
+            continue
+        keyframes += 'keyframe' not in header
+        population, world = expected[current_time]
+        saved, _ = dio.read_npz_population(fn)
+        for species in population.species_names:
+            saved_columns = saved.species[species]
+            columns = population.species[species]
+            assert ([saved_columns.row_dict(i)
+                     for i in range(len(saved_columns))]
+                    == [columns.row_dict(i) for i in range(len(columns))])
+        assert np.array_equal(dio.read_npz_world(fn).water, world)
+    assert keyframes == 2
@@ -0,0 +1,97 @@
+import threading
+import numpy as np
+import pytest
+
+from blossom.simulation import dataset_io as dio
+from blossom.simulation.snapshot_writer import SnapshotWriter
+
+from helpers import make_universe
+
+
+class State(object):
+    """
+    Stand-in for a UniverseState.
+    """
+
+    def __init__(self, current_time, checkpoint=True):
+        self.current_time = current_time
+        self.checkpoint = checkpoint
+
+
+class FailingSave(object):
+    """
+    Replacement for dataset_io.save_universe that fails at a given time
+    step.
+    """
+
+    def __init__(self, timestep):
+        self.timestep = timestep
+        self.save_universe = dio.save_universe
+
+    def __call__(self, universe, checkpoint=True):
+        if universe.current_time == self.timestep:
+            raise OSError('Disk full')
+        self.save_universe(universe, checkpoint=checkpoint)
+
+
+def test_saves_in_order(tmp_path, monkeypatch):
+    saved = []
+    monkeypatch.setattr(dio, 'save_universe',
+                        lambda state, checkpoint: saved.append(
+                            (state, threading.current_thread().name)
+                        ))
+    writer = SnapshotWriter(max_pending=1)
+    states = [State(i) for i in range(5)]
+    for state in states:
+        writer.submit(state)
+    writer.flush()
+    assert [state for state, _ in saved] == states
+    assert all(name == 'blossom-snapshot-writer' for _, name in saved)
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(State(5))
+    with pytest.raises(ValueError):
+        SnapshotWriter(max_pending=0)
+
+
+def test_error_is_raised(monkeypatch):
+    monkeypatch.setattr(dio, 'save_universe', FailingSave(1))
+    writer = SnapshotWriter()
+    writer.submit(State(1))
+    with pytest.raises(RuntimeError) as info:
+        writer.flush()
+    assert isinstance(info.value.__cause__, OSError)
+    writer.close()
+
+
+def test_run_again(tmp_path):
+    universe = make_universe(tmp_path / 'background' / 'project', end_time=3,
+                             background_save=True)
+    universe.run(verbosity=0)
+    universe.end_time = 6
+    universe.run(verbosity=0)
+    background = dio.find_datasets(universe.run_data_dir)
+    assert universe.current_time == 6
+
+    universe = make_universe(tmp_path / 'direct' / 'project', end_time=6)
+    universe.run(verbosity=0)
+    direct = dio.find_datasets(universe.run_data_dir)
+    assert [fn.name for fn in background] == [fn.name for fn in direct]
+    for background_fn, direct_fn in zip(background, direct):
+        _, background_world, _ = dio.read_dataset(background_fn)
+        _, direct_world, _ = dio.read_dataset(direct_fn)
+        assert np.array_equal(background_world.water, direct_world.water)
+
+
+def test_step_error_not_masked(tmp_path, monkeypatch):
+    def fail(universe):
+        if universe.current_time == 3:
+            raise ValueError('Step failed')
+
+    monkeypatch.setattr(dio, 'save_universe', FailingSave(2))
+    universe = make_universe(tmp_path, end_time=6, background_save=True,
+                             stop_conditions=[fail])
+    with pytest.warns(RuntimeWarning, match='Disk full'):
+        with pytest.raises(ValueError, match='Step failed'):
+            universe.run(verbosity=0)
+    assert universe.writer is None
@@ -0,0 +1,64 @@
+import pytest
+
+from blossom.simulation import stopping
+
+from helpers import make_universe
+
+
+class Population(object):
+    """
+    Stand-in for a universe, with given numbers of living organisms.
+    """
+
+    def __init__(self, **alive):
+        self.population_dict = {
+            species: {'statistics': {'alive': count}}
+            for species, count in alive.items()
+        }
+
+
+def test_extinction():
+    assert stopping.Extinction()(Population(a=0, b=0)) == 'extinction'
+    assert stopping.Extinction()(Population(a=0, b=3)) is None
+    assert stopping.Extinction('a')(Population(a=0, b=3)) == 'extinction'
+    assert stopping.Extinction(['a', 'b'],
+                               any_species=True)(
+        Population(a=2, b=0)
+    ) == 'extinction'
+    assert stopping.Extinction(['a', 'b'])(Population(a=2, b=0)) is None
+
+
+def test_explosion():
+    assert stopping.Explosion(10)(Population(a=6, b=5)) == 'explosion'
+    assert stopping.Explosion(11)(Population(a=6, b=5)) is None
+    assert stopping.Explosion(5, species='b')(Population(a=6, b=5)) is None
+    assert stopping.Explosion(5, 'a')(Population(a=6, b=5)) == 'explosion'
+
+
+def test_from_spec():
+    extinction, explosion = stopping.from_spec({'extinction': True,
+                                                'explosion': 100})
+    assert extinction.species is None and not extinction.any_species
+    assert explosion.limit == 100 and explosion.species is None
+
+    extinction, explosion = stopping.from_spec({
+        'extinction': ['a'],
+        'explosion': {'limit': 10, 'species': 'b'}
+    })
+    assert extinction.species == ['a'] and extinction.any_species
+    assert explosion.limit == 10 and explosion.species == ['b']
+
+    assert stopping.from_spec(None) == []
+    assert stopping.from_spec({'extinction': False}) == []
+    with pytest.raises(ValueError):
+        stopping.from_spec({'collapse': True})
+
+
+def test_run_stops_early(tmp_path):
+    universe = make_universe(tmp_path, end_time=20,
+                             stop_conditions=[stopping.Explosion(60)])
+    universe.run(verbosity=0)
+    universe.close()
+    assert universe.stop_reason == 'explosion'
+    assert universe.current_time < 20
+    assert sum(stopping.alive_counts(universe).values()) > 60
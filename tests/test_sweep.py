@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from blossom.simulation import sweep
+
+from helpers import write_config
+
+
+class StopSeed(object):
+    """
+    Stop the runs of seed 1 of some points after a few time steps.
+    """
+
+    def __init__(self, points, timestep=3):
+        self.runs = tuple(f'point{i:04d}-s1' for i in points)
+        self.timestep = timestep
+
+    def __call__(self, universe):
+        if (universe.run_data_dir.name.startswith(self.runs)
+                and universe.current_time >= self.timestep):
+            return 'extinction'
+        return None
+
+
+@pytest.fixture
+def config_fn(tmp_path):
+    return write_config(tmp_path)
+
+
+def test_paths():
+    cfg = {'species': [{'name': 'prey', 'drinking': {'metabolism': 1}}]}
+    assert sweep.parse_path('species[prey].drinking.metabolism') == [
+        'species', ('name', 'prey'), 'drinking', 'metabolism'
+    ]
+    sweep.set_value(cfg, 'species[0].drinking.metabolism', 3)
+    assert sweep.get_value(cfg, 'species[prey].drinking.metabolism') == 3
+    with pytest.raises(ValueError):
+        sweep.get_value(cfg, 'species[predator].max_age')
+
+
+@pytest.mark.parametrize('method', ['random', 'lhs'])
+def test_sample_points(method):
+    points = sweep.sample_points({'a': {'low': 1, 'high': 5, 'integer': True},
+                                  'b': ['x', 'y'],
+                                  'c': 7},
+                                 method=method, samples=20, seed=0)
+    assert len(points) == 20
+    assert all(1 <= point['a'] <= 5 and point['b'] in ['x', 'y']
+               and point['c'] == 7 for point in points)
+    if method == 'lhs':
+        # One point in each stratum of every parameter
+        points = sweep.sample_points({'a': {'low': 0, 'high': 1}},
+                                     method=method, samples=20, seed=0)
+        strata = np.floor([point['a'] * 20 for point in points])
+        assert sorted(strata) == list(range(20))
+
+
+def test_rung_budgets():
+    assert sweep.rung_budgets(2, 30, eta=3) == [2, 6, 18, 30]
+    with pytest.raises(ValueError):
+        sweep.rung_budgets(0, 30)
+
+
+def test_adaptive_promotes_after_dropouts(config_fn, tmp_path):
+    spec = {'config': str(config_fn),
+            'method': 'grid',
+            'seeds': 2,
+            'parameters': {'species[grazer].population': [40, 30, 20, 10]},
+            'adaptive': {'min_timesteps': 2, 'eta': 2,
+                         'score': 'population'}}
+    results = sweep.load_results(
+        sweep.run_sweep(spec,
+                        project_dir=tmp_path / 'sweep',
+                        max_workers=1,
+                        verbose=False,
+                        stop_conditions=[StopSeed([0, 1])])
+    )
+    statuses = {(point, seed): (status, timestep)
+                for point, seed, status, timestep
+                in zip(results['point'], results['seed'],
+                       results['status'], results['timestep'])}
+
+    # The best two points drop out once a seed stops, and the next two are
+    # promoted in their place
+    assert statuses[0, 0] == ('pruned', 4)
+    assert statuses[0, 1] == ('extinction', 3)
+    assert statuses[1, 0] == ('pruned', 4)
+    assert statuses[1, 1] == ('extinction', 3)
+    assert statuses[2, 0] == ('completed', 8)
+    assert statuses[2, 1] == ('completed', 8)
+    assert statuses[3, 0] == ('pruned', 4)
+    assert statuses[3, 1] == ('pruned', 4)
+    assert all(timestep == 8
+               for status, timestep in statuses.values()
+               if status == 'completed')
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from blossom.simulation import dataset_io as dio
+from blossom.simulation.universe import Universe
+
+from helpers import make_universe
+
+
+def state(universe):
+    organisms = sorted((organism.to_dict() for organism in universe.organisms),
+                       key=lambda organism_dict: organism_dict['organism_id'])
+    return organisms, np.array(universe.world.water), universe.ids.next_id
+
+
+@pytest.mark.parametrize('engine, snapshot_format', [
+    ('object', 'json'),
+    ('columnar', 'json'),
+    ('columnar', 'npz'),
+    ('parallel', 'npz'),
+])
+def test_resume_from_checkpoint(tmp_path, engine, snapshot_format):
+    kwargs = {'engine': engine,
+              'snapshot_format': snapshot_format,
+              'checkpoint_every': 3}
+    universe = make_universe(tmp_path / 'full', end_time=8, **kwargs)
+    universe.run(verbosity=0)
+    universe.close()
+    expected = state(universe)
+    assert len(expected[0]) > 0
+
+    universe = make_universe(tmp_path / 'resumed', end_time=8, **kwargs)
+    universe.run(verbosity=0)
+    universe.close()
+    checkpoint_fn = [
+        fn for fn in dio.find_datasets(universe.run_data_dir)
+        if dio.read_dataset(fn)[1].current_time == 3
+    ][0]
+
+    universe = Universe(dataset_fn=checkpoint_fn, end_time=8, **kwargs)
+    assert universe.current_time == 3
+    universe.run(verbosity=0)
+    universe.close()
+    organisms, water, next_id = state(universe)
+    assert organisms == expected[0]
+    assert np.array_equal(water, expected[1])
+    assert next_id == expected[2]
+    assert all(isinstance(organism['organism_id'], int)
+               for organism in organisms)